@@ -1,6 +1,6 @@
 # gui/components/audio_player.py
 
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QSlider, QPushButton, QHBoxLayout
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QSlider, QPushButton, QHBoxLayout, QTabWidget
 from PySide6.QtCore import Qt, QUrl, Signal
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 import qtawesome as qta
@@ -9,6 +9,7 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from pydub import AudioSegment
 import os
+from gui.components.spectrogram_view import SpectrogramView
 
 
 class AudioWaveformWidget(QWidget):
@@ -20,6 +21,7 @@ class AudioWaveformWidget(QWidget):
         super().__init__(parent)
         self.audio_data = None
         self.audio_path = None
+        self.spectrogram_path = None
         self.setup_ui()
         self.setup_player()
 
@@ -27,11 +29,17 @@ class AudioWaveformWidget(QWidget):
         """Sets up the UI components."""
         layout = QVBoxLayout(self)
 
-        # Waveform visualization
+        # Waveform and spectrogram visualizations
+        self.view_tabs = QTabWidget()
         self.figure, self.ax = plt.subplots(figsize=(10, 2))
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setMinimumHeight(100)
-        layout.addWidget(self.canvas)
+        self.view_tabs.addTab(self.canvas, "Waveform")
+
+        self.spectrogram_view = SpectrogramView()
+        self.view_tabs.addTab(self.spectrogram_view, "Spectrogram")
+        self.view_tabs.currentChanged.connect(lambda index: self.update_spectrogram())
+        layout.addWidget(self.view_tabs)
 
         # Playback controls
         controls_layout = QHBoxLayout()
@@ -68,6 +76,7 @@ class AudioWaveformWidget(QWidget):
 
         self.audio_path = audio_path
         self.player.setSource(QUrl.fromLocalFile(audio_path))
+        self.update_spectrogram()
 
         try:
             # Load audio data for visualization
@@ -110,6 +119,12 @@ class AudioWaveformWidget(QWidget):
 
         self.canvas.draw()
 
+    def update_spectrogram(self):
+        """Points the spectrogram at the current file, but only while its tab is shown."""
+        if self.audio_path and self.view_tabs.currentWidget() is self.spectrogram_view and self.audio_path != self.spectrogram_path:
+            self.spectrogram_path = self.audio_path
+            self.spectrogram_view.load(self.audio_path)
+
     def toggle_playback(self):
         """Toggles play/pause for the audio file."""
         if self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
@@ -152,6 +167,7 @@ class AudioWaveformWidget(QWidget):
                 position_sample = int(position / self.player.duration() * len(self.audio_data))
                 self.position_line.set_xdata(position_sample)
                 self.canvas.draw_idle()
+            self.spectrogram_view.set_position(position / 1000.0)
 
             self.playbackPositionChanged.emit(position)
 
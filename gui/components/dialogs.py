@@ -9,6 +9,7 @@ import qtawesome as qta
 import os
 import json
 import pandas as pd
+from scripts.dataset_schema import column_names
 
 
 class EnhancedCreateDatasetDialog(QDialog):
@@ -160,10 +161,21 @@ class EnhancedCreateDatasetDialog(QDialog):
 
         self.accept()
 
+    def get_template(self):
+        """Returns the selected template, or None when custom columns are used."""
+        if self.use_template_cb.isChecked():
+            return self.available_templates.get(self.template_selector.currentText())
+        return None
+
     def get_data(self):
         """Returns dataset name, location, and columns."""
+        template = self.get_template()
+        if template:
+            columns = column_names(template)
+        else:
+            columns = [self.custom_columns_list.item(i).text() for i in range(self.custom_columns_list.count())]
         return (
             self.dataset_name_input.text().strip(),
             self.dataset_location_input.text().strip(),
-            [self.custom_columns_list.item(i).text() for i in range(self.custom_columns_list.count())]
+            columns
         )
@@ -4,37 +4,64 @@ from PySide6.QtWidgets import (
     QWidget, QFormLayout, QLineEdit, QPushButton, QFileDialog,
     QMessageBox, QListWidget, QVBoxLayout, QLabel, QHBoxLayout, QProgressBar
 )
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, Signal
 import os
 import shutil
 from scripts.audio_processing import AudioProcessor
+from scripts.app_settings import get_import_options, get_cache_limit_bytes, get_frame_features_enabled
+from scripts.transcode_cache import get_transcode_cache
+from scripts.ingest_job import IngestJob
+from scripts.fingerprint import FingerprintIndex
+from scripts.embeddings import EmbeddingStore
+from scripts.feature_store import FeatureStore
+from scripts.job_scheduler import ScheduledTask, PRIORITY_BATCH, PRIORITY_INTERACTIVE, get_scheduler
 from scripts.logger import logger
 
-class MetadataProcessingWorker(QThread):
-    """Handles batch metadata entry processing in a separate thread."""
+class MetadataProcessingWorker(ScheduledTask):
+    """Runs a resumable ingest job as a background scheduler task, committing rows in batches."""
 
-    progress_updated = Signal(int)
     processing_complete = Signal(int)
 
-    def __init__(self, dataset_manager, file_paths, output_dir):
-        super().__init__()
+    priority = PRIORITY_BATCH
+    COMMIT_BATCH_SIZE = 50  # Files per metadata write
+    FEATURE_BATCH_SIZE = 8  # Files whose frame features are held before the batch is committed early
+
+    def __init__(self, dataset_manager, job):
+        super().__init__(name=f"Import {len(job.pending)} files into {os.path.basename(dataset_manager.dataset_path)}")
         self.dataset_manager = dataset_manager
-        self.file_paths = file_paths
-        self.output_dir = output_dir
-        self.processor = AudioProcessor(normalize=True, target_format="wav")
+        self.job = job
+        self.output_dir = job.output_dir
+        self.processor = AudioProcessor(**job.options, cache=get_transcode_cache(get_cache_limit_bytes()),
+                                        frame_features=get_frame_features_enabled())
 
     def run(self):
-        """Processes multiple metadata entries in batch mode."""
-        total_files = len(self.file_paths)
+        """Processes the job's pending files, checkpointing after every batch."""
+        total_files = len(self.job.inputs)
+        pending = self.job.pending
+        completed = total_files - len(pending)
         added_count = 0
+        batch = []
+        self.fingerprint_index = FingerprintIndex(self.dataset_manager)
+        self.fingerprints = []
+        self.embedding_store = EmbeddingStore(self.dataset_manager)
+        self.embeddings = []
+        self.feature_store = FeatureStore(self.dataset_manager)
+        self.features = []
+
+        for file_path in pending:
+            if self.cancel_requested:
+                logger.info(f"Ingest job {self.job.job_id} cancelled with {total_files - completed} files remaining")
+                break
 
-        for i, file_path in enumerate(self.file_paths):
             try:
                 metadata, converted_path = self.processor.process_audio_file(file_path, self.output_dir)
+                if metadata is None:
+                    raise RuntimeError("audio processing failed")
 
-                # Copy converted file to dataset directory
+                # Copy converted file to dataset directory (normalized output is already written there)
                 audio_dest = os.path.join(self.output_dir, os.path.basename(converted_path))
-                shutil.copy2(converted_path, audio_dest)
+                if os.path.abspath(converted_path) != os.path.abspath(audio_dest):
+                    shutil.copy2(converted_path, audio_dest)
 
                 # Create metadata entry
                 entry = {
@@ -44,19 +71,44 @@ class MetadataProcessingWorker(QThread):
                     "file_format": metadata.get("file_format", ""),
                     "generation_date": metadata.get("generation_date", ""),
                 }
-                self.dataset_manager.log_entry(entry)
-
-                added_count += 1
-                progress = int(((i + 1) / total_files) * 100)
-                self.progress_updated.emit(progress)
-
+                batch.append((file_path, entry))
+                if metadata.get("fingerprint") is not None:
+                    self.fingerprints.append((entry["audio_file"], metadata["fingerprint"]))
+                if metadata.get("embedding") is not None:
+                    self.embeddings.append((entry["audio_file"], metadata["embedding"]))
+                if metadata.get("frame_features") is not None:
+                    self.features.append((entry["audio_file"], metadata.pop("frame_features")))
                 logger.info(f"Processed audio file: {file_path}")
 
             except Exception as e:
                 logger.warning(f"Skipping file due to error: {file_path} - {e}")
+                self.job.mark_failed(file_path, e)
+
+            completed += 1
+            self.progress_updated.emit(int((completed / total_files) * 100))
 
+            # Frame features are large, so holding them caps the batch before COMMIT_BATCH_SIZE does
+            if len(batch) >= self.COMMIT_BATCH_SIZE or len(self.features) >= self.FEATURE_BATCH_SIZE:
+                added_count += self._commit(batch)
+                batch = []
+
+        added_count += self._commit(batch)
+        if self.job.is_complete:
+            self.job.discard()
         self.processing_complete.emit(added_count)
 
+    def _commit(self, batch):
+        """Commits the batch, then stores fingerprints, embeddings and features for the rows it accepted."""
+        added = self.job.commit(batch) if batch else 0
+        accepted = {entry["audio_file"] for file_path, entry in batch if file_path in self.job.done}
+        self.fingerprint_index.add([item for item in self.fingerprints if item[0] in accepted])
+        self.fingerprints = []
+        self.embedding_store.add_pending([item for item in self.embeddings if item[0] in accepted])
+        self.embeddings = []
+        self.feature_store.add([item for item in self.features if item[0] in accepted])
+        self.features = []
+        return added
+
 
 class EntryForm(QWidget):
     """Dialog for adding metadata entries for audio files."""
@@ -68,6 +120,7 @@ class EntryForm(QWidget):
         self.refresh_callback = refresh_callback
         self.audio_files = []
         self.processing_worker = None
+        self.resumable_jobs = IngestJob.find_resumable(dataset_manager)
         self.setup_ui()
 
     def setup_ui(self):
@@ -116,18 +169,33 @@ class EntryForm(QWidget):
         layout.addWidget(self.progress_bar)
 
         # Buttons
-        btn_submit = QPushButton("✅ Submit Entry")
-        btn_submit.clicked.connect(self.submit_entries)
+        self.btn_submit = QPushButton("✅ Submit Entry")
+        self.btn_submit.clicked.connect(self.submit_entries)
 
         btn_clear = QPushButton("❌ Clear Form")
         btn_clear.clicked.connect(self.clear_form)
 
+        self.btn_cancel = QPushButton("⏹ Cancel Import")
+        self.btn_cancel.setVisible(False)
+        self.btn_cancel.clicked.connect(self.cancel_processing)
+
+        self.btn_resume = QPushButton()
+        self.btn_resume.clicked.connect(self.resume_job)
+        self.update_resume_button()
+
         btn_layout = QHBoxLayout()
         btn_layout.addWidget(btn_clear)
+        btn_layout.addWidget(self.btn_resume)
         btn_layout.addStretch()
-        btn_layout.addWidget(btn_submit)
+        btn_layout.addWidget(self.btn_cancel)
+        btn_layout.addWidget(self.btn_submit)
         layout.addLayout(btn_layout)
 
+    def update_resume_button(self):
+        remaining = sum(len(job.pending) for job in self.resumable_jobs)
+        self.btn_resume.setText(f"⏯ Resume Interrupted Import ({remaining} files)")
+        self.btn_resume.setVisible(bool(self.resumable_jobs))
+
     def upload_audio(self):
         """Opens file dialog for selecting audio files."""
         files, _ = QFileDialog.getOpenFileNames(self, "Select Audio Files", filter="Audio Files (*.mp3 *.wav *.flac *.ogg)")
@@ -143,11 +211,19 @@ class EntryForm(QWidget):
             self.file_list.addItem(os.path.basename(file))
 
     def auto_fill_metadata(self):
-        """Auto-fills metadata for the first selected file."""
+        """Auto-fills metadata for the first selected file from an interactive header probe."""
         if self.audio_files:
-            metadata, _ = AudioProcessor().process_audio_file(self.audio_files[0])
-            self.duration.setText(str(metadata.get("duration", "")))
-            self.file_format.setText(metadata.get("file_format", "").upper())
+            get_scheduler().run_function(
+                AudioProcessor().probe, self.audio_files[0],
+                on_result=self.apply_probe_result,
+                name=f"Probe {os.path.basename(self.audio_files[0])}",
+                priority=PRIORITY_INTERACTIVE,
+            )
+
+    def apply_probe_result(self, metadata):
+        """Fills the auto-filled fields from a probe result."""
+        self.duration.setText(str(metadata.get("duration", "")))
+        self.file_format.setText(metadata.get("file_format", "").upper())
 
     def clear_form(self):
         """Clears all input fields and resets the form."""
@@ -166,17 +242,73 @@ class EntryForm(QWidget):
             QMessageBox.warning(self, "Warning", "No audio files selected!")
             return
 
+        job = IngestJob.create(self.dataset_manager, self.audio_files, get_import_options())
+        self.start_job(job)
+
+    def resume_job(self):
+        """Resumes the oldest interrupted ingest job for this dataset."""
+        if self.resumable_jobs:
+            self.start_job(self.resumable_jobs.pop(0))
+
+    def start_job(self, job):
+        """Runs an ingest job on the processing worker."""
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
+        self.btn_submit.setEnabled(False)
+        self.btn_resume.setVisible(False)
+        self.btn_cancel.setVisible(True)
+        self.btn_cancel.setEnabled(True)
 
-        self.processing_worker = MetadataProcessingWorker(self.dataset_manager, self.audio_files, self.dataset_manager.audio_dir)
+        self.processing_worker = MetadataProcessingWorker(self.dataset_manager, job)
         self.processing_worker.progress_updated.connect(self.progress_bar.setValue)
         self.processing_worker.processing_complete.connect(self.on_processing_complete)
-        self.processing_worker.start()
+        self.processing_worker.task_finished.connect(self.on_task_finished)
+        get_scheduler().submit(self.processing_worker)
+
+    def cancel_processing(self):
+        """Stops the running import cleanly between files; it can be resumed later."""
+        if self.processing_worker and self.processing_worker.state in ("queued", "running"):
+            self.btn_cancel.setEnabled(False)
+            self.status_bar.showMessage("Cancelling import after the current file...", 5000)
+            # A queued import is dropped at once and on_task_finished restores the form
+            get_scheduler().cancel(self.processing_worker)
 
     def on_processing_complete(self, added_count):
         """Handles completion of the batch processing task."""
         self.progress_bar.setVisible(False)
-        self.status_bar.showMessage(f"{added_count} audio entries added.", 5000)
+        if self.processing_worker.cancel_requested:
+            self.status_bar.showMessage(f"Import cancelled: {added_count} audio entries added. Reopen the form to resume.", 5000)
+        else:
+            self.status_bar.showMessage(f"{added_count} audio entries added.", 5000)
+        self.processing_worker = None
         self.refresh_callback()
         self.close()
+
+    def on_task_finished(self):
+        """Restores the form when an import ended without reporting, e.g. cancelled while still queued."""
+        worker = self.processing_worker
+        if worker is None:
+            return  # Already handled by on_processing_complete
+        self.processing_worker = None
+        self.progress_bar.setVisible(False)
+        self.btn_submit.setEnabled(True)
+        self.btn_cancel.setVisible(False)
+        self.btn_cancel.setEnabled(True)
+        if not worker.job.is_complete:
+            self.resumable_jobs.insert(0, worker.job)
+            self.update_resume_button()
+        if worker.state == "cancelled":
+            self.status_bar.showMessage("Import cancelled before it started; it can be resumed.", 5000)
+        else:
+            self.status_bar.showMessage("Import stopped unexpectedly; it can be resumed.", 5000)
+
+    def closeEvent(self, event):
+        """Asks a running import to stop at the next file boundary and closes without waiting for it.
+
+        The job's progress log makes the remainder resumable, so there is no
+        need to block the GUI while the current file finishes.
+        """
+        if self.processing_worker and self.processing_worker.state in ("queued", "running"):
+            self.status_bar.showMessage("Import will stop after the current file; reopen the form to resume.", 5000)
+            get_scheduler().cancel(self.processing_worker)
+        super().closeEvent(event)
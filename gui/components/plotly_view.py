@@ -0,0 +1,78 @@
+# gui/components/plotly_view.py
+
+import os
+from PySide6.QtCore import QUrl
+from PySide6.QtWebEngineWidgets import QWebEngineView
+import plotly
+from plotly.offline import get_plotlyjs
+from scripts.logger import logger
+
+ASSET_DIR = os.path.join(os.path.expanduser("~"), ".audionomy", "cache", "plotly")
+
+SHELL_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="plotly-__VERSION__.min.js"></script>
+<style>html, body, #chart { margin: 0; width: 100%; height: 100%; overflow: hidden; }</style>
+</head>
+<body>
+<div id="chart"></div>
+<script>
+  var chart = document.getElementById("chart");
+  var config = {responsive: true, displaylogo: false};
+  function renderFigure(figure) {
+    // Plotly.react diffs against the current plot instead of rebuilding it
+    Plotly.react(chart, figure.data, figure.layout || {}, config);
+  }
+</script>
+</body>
+</html>
+"""
+
+
+def _ensure_assets():
+    """Writes the Plotly bundle and page shell once per installed Plotly version."""
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    version = plotly.__version__
+    bundle_path = os.path.join(ASSET_DIR, f"plotly-{version}.min.js")
+    shell_path = os.path.join(ASSET_DIR, f"shell-{version}.html")
+
+    for path, content in ((bundle_path, get_plotlyjs), (shell_path, lambda: SHELL_HTML.replace("__VERSION__", version))):
+        if not os.path.exists(path):
+            with open(f"{path}.part", "w", encoding="utf-8") as f:
+                f.write(content())
+            os.replace(f"{path}.part", path)
+    return shell_path
+
+
+class PlotlyView(QWebEngineView):
+    """Web view that loads the Plotly bundle once and then receives figures as JSON.
+
+    The page stays resident for the widget's lifetime; each new figure is
+    pushed with runJavaScript and applied with Plotly.react, so refreshing a
+    chart never reloads the multi-megabyte bundle or writes temporary files.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ready = False
+        self.pending_figure = None
+        self.loadFinished.connect(self.on_load_finished)
+        self.load(QUrl.fromLocalFile(_ensure_assets()))
+
+    def on_load_finished(self, ok):
+        if not ok:
+            logger.error("Failed to load the Plotly page shell")
+            return
+        self.ready = True
+        if self.pending_figure is not None:
+            self.show_figure(self.pending_figure)
+            self.pending_figure = None
+
+    def show_figure(self, figure_json):
+        """Renders a figure given as Plotly JSON (e.g. from Figure.to_json())."""
+        if not self.ready:
+            self.pending_figure = figure_json
+            return
+        self.page().runJavaScript(f"renderFigure({figure_json});")
@@ -0,0 +1,196 @@
+# gui/components/spectrogram_view.py
+
+import numpy as np
+from PySide6.QtWidgets import QWidget, QVBoxLayout
+from PySide6.QtCore import QTimer
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from scripts.app_settings import get_cache_limit_bytes
+from scripts.job_scheduler import PRIORITY_INTERACTIVE, get_scheduler
+from scripts.spectrogram_cache import get_spectrogram_cache, SpectrogramTileTask, FLOOR_DB
+from scripts.logger import logger
+
+INITIAL_SPAN = 30.0   # Seconds shown when a file is opened
+MIN_SPAN = 0.5
+DYNAMIC_RANGE = 80.0  # dB below the loudest visible bin that still gets a colour
+
+
+class SpectrogramView(QWidget):
+    """Pannable, zoomable spectrogram drawn from cached tiles.
+
+    Only the tiles under the visible window are read; missing ones are
+    computed by a background task and drawn as they arrive. Scroll to zoom
+    around the cursor and drag to pan.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache = get_spectrogram_cache(get_cache_limit_bytes())
+        self.info = None
+        self.task = None
+        self.view_start = 0.0
+        self.view_span = INITIAL_SPAN
+        self.drag_origin = None
+        self.position_line = None
+        self.image = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.figure = Figure(figsize=(10, 2))
+        self.ax = self.figure.add_axes([0, 0, 1, 1])
+        self.ax.axis("off")
+        self.canvas = FigureCanvas(self.figure)
+        self.canvas.setMinimumHeight(100)
+        layout.addWidget(self.canvas)
+
+        self.canvas.mpl_connect("scroll_event", self.on_scroll)
+        self.canvas.mpl_connect("button_press_event", self.on_press)
+        self.canvas.mpl_connect("motion_notify_event", self.on_drag)
+        self.canvas.mpl_connect("button_release_event", self.on_release)
+
+        # Coalesces bursts of tile_ready signals into one redraw
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.setInterval(50)
+        self.redraw_timer.timeout.connect(self.refresh)
+
+    @property
+    def duration(self):
+        return self.info["samples"] / self.info["sample_rate"] if self.info else 0.0
+
+    def load(self, audio_path):
+        """Switches to a new file; its layout is read off the UI thread."""
+        self.cancel_task()
+        self.info = None
+        self.ax.clear()
+        self.ax.axis("off")
+        self.image = None
+        self.position_line = None
+        self.canvas.draw_idle()
+        get_scheduler().run_function(
+            self.cache.info, audio_path, on_result=self.on_info,
+            on_error=lambda error: logger.warning(f"Spectrogram unavailable for {audio_path}: {error}"),
+            name="Spectrogram layout",
+            priority=PRIORITY_INTERACTIVE,
+        )
+
+    def on_info(self, info):
+        self.info = info
+        self.view_start = 0.0
+        self.view_span = min(INITIAL_SPAN, self.duration) or INITIAL_SPAN
+        self.refresh()
+
+    def cancel_task(self):
+        if self.task is not None:
+            get_scheduler().cancel(self.task)
+            self.task = None
+
+    def visible_frames(self):
+        frames_per_second = self.info["sample_rate"] / self.info["hop_length"]
+        start = max(0, int(self.view_start * frames_per_second))
+        end = min(self.info["frames"], int(np.ceil((self.view_start + self.view_span) * frames_per_second)) + 1)
+        return start, max(start + 1, end)
+
+    def refresh(self):
+        """Draws the visible window from whatever tiles exist and schedules the rest."""
+        if self.info is None:
+            return
+        tile_frames = self.info["tile_frames"]
+        start, end = self.visible_frames()
+        first, last = start // tile_frames, (end - 1) // tile_frames
+
+        tiles, missing = [], []
+        for index in range(first, last + 1):
+            tile = self.cache.load_tile(self.info, index)
+            if tile is None:
+                missing.append(index)
+                width = min(tile_frames, self.info["frames"] - index * tile_frames)
+                tile = np.full((self.info["n_mels"], width), np.nan, dtype=np.float16)
+            tiles.append(tile)
+        if missing:
+            self.schedule(missing, first, last)
+
+        offset = first * tile_frames
+        window = np.concatenate(tiles, axis=1)[:, start - offset:end - offset]
+        self.draw(self.reduce(window), start, end)
+
+    def reduce(self, window):
+        """Max-pools columns down to the canvas width so zoomed-out views stay cheap to draw."""
+        width = max(1, self.canvas.width())
+        factor = window.shape[1] // width
+        if factor > 1:
+            columns = (window.shape[1] // factor) * factor
+            with np.errstate(invalid="ignore"):
+                window = np.fmax.reduce(window[:, :columns].reshape(window.shape[0], -1, factor), axis=2)
+        return window.astype(np.float32)
+
+    def schedule(self, missing, first, last):
+        """Queues missing visible tiles, then one tile either side for smooth panning."""
+        if self.task is not None and self.task.state in ("queued", "running") and set(missing) <= set(self.task.indexes):
+            return
+        self.cancel_task()
+        neighbours = [i for i in (first - 1, last + 1) if 0 <= i < self.info["tiles"]]
+        self.task = SpectrogramTileTask(self.cache, self.info, missing + neighbours)
+        self.task.tile_ready.connect(self.on_tile_ready)
+        get_scheduler().submit(self.task)
+
+    def on_tile_ready(self, index):
+        self.redraw_timer.start()
+
+    def draw(self, window, start, end):
+        hop_seconds = self.info["hop_length"] / self.info["sample_rate"]
+        extent = [start * hop_seconds, end * hop_seconds, 0, self.info["n_mels"]]
+        finite = window[np.isfinite(window)]
+        vmax = float(finite.max()) if finite.size else 0.0
+        vmin = max(FLOOR_DB, vmax - DYNAMIC_RANGE)
+
+        if self.image is None:
+            self.image = self.ax.imshow(window, origin="lower", aspect="auto", cmap="magma", extent=extent,
+                                        vmin=vmin, vmax=vmax, interpolation="nearest")
+            self.position_line = self.ax.axvline(0, color="#e74c3c", linewidth=1)
+        else:
+            self.image.set_data(window)
+            self.image.set_extent(extent)
+            self.image.set_clim(vmin, vmax)
+        self.ax.set_xlim(self.view_start, self.view_start + self.view_span)
+        self.ax.set_ylim(0, self.info["n_mels"])
+        self.ax.axis("off")
+        self.canvas.draw_idle()
+
+    def set_window(self, start, span):
+        span = min(max(span, MIN_SPAN), max(self.duration, MIN_SPAN))
+        self.view_span = span
+        self.view_start = min(max(0.0, start), max(0.0, self.duration - span))
+        self.refresh()
+
+    def set_position(self, seconds):
+        """Moves the playhead, following it when playback leaves the visible window."""
+        if self.info is None or self.position_line is None or not self.isVisible():
+            return
+        self.position_line.set_xdata([seconds, seconds])
+        if not self.view_start <= seconds <= self.view_start + self.view_span:
+            self.set_window(seconds, self.view_span)
+        else:
+            self.canvas.draw_idle()
+
+    def on_scroll(self, event):
+        if self.info is None or event.xdata is None:
+            return
+        scale = 0.8 if event.button == "up" else 1.25
+        span = self.view_span * scale
+        anchor = (event.xdata - self.view_start) / self.view_span
+        self.set_window(event.xdata - anchor * span, span)
+
+    def on_press(self, event):
+        if self.info is not None and event.x is not None:
+            self.drag_origin = (event.x, self.view_start)
+
+    def on_drag(self, event):
+        if self.drag_origin is None or event.x is None:
+            return
+        origin_x, origin_start = self.drag_origin
+        seconds_per_pixel = self.view_span / max(1, self.canvas.width())
+        self.set_window(origin_start - (event.x - origin_x) * seconds_per_pixel, self.view_span)
+
+    def on_release(self, event):
+        self.drag_origin = None
@@ -13,6 +13,7 @@ from gui.views.dataset_view import DatasetView
 from gui.views.visualization_view import VisualizationWidget
 from gui.views.export_view import ExportView
 from gui.views.settings_view import SettingsView
+from gui.views.jobs_view import JobsView
 
 class ModernMainWindow(QMainWindow):
     """Main Application Window with Sidebar Navigation and Dynamic Content Switching"""
@@ -69,12 +70,14 @@ class ModernMainWindow(QMainWindow):
 
         self.export_page = ExportView(self.status_bar)
         self.settings_page = SettingsView(self.status_bar)
+        self.jobs_page = JobsView(self.status_bar)
 
         self.content_stack.addWidget(self.dashboard_page)
         self.content_stack.addWidget(self.datasets_page)
         self.content_stack.addWidget(self.visualization_page)
         self.content_stack.addWidget(self.export_page)
         self.content_stack.addWidget(self.settings_page)
+        self.content_stack.addWidget(self.jobs_page)
 
     def create_sidebar(self):
         """Creates the sidebar with navigation buttons."""
@@ -105,6 +108,7 @@ class ModernMainWindow(QMainWindow):
             ("visualize", "Visualize", "fa5s.chart-bar"),
             ("export", "Export", "fa5s.file-export"),
             ("settings", "Settings", "fa5s.cog"),
+            ("jobs", "Jobs", "fa5s.tasks"),
         ]
 
         for index, (name, label, icon) in enumerate(nav_items):
@@ -127,8 +131,10 @@ class ModernMainWindow(QMainWindow):
     def open_dataset(self, dataset_path):
         """Loads a dataset and switches to the dataset view."""
         from scripts.dataset_manager import DatasetManager
+        from scripts.app_settings import get_settings
 
-        dataset_manager = DatasetManager(dataset_path)
+        versioning = get_settings().value("metadata_versioning", True, type=bool)
+        dataset_manager = DatasetManager(dataset_path, versioning_enabled=versioning)
         dataset_view = DatasetView(dataset_manager, self.status_bar)
 
         # Replace the datasets page
@@ -2,7 +2,6 @@
 
 import os
 import time
-import pandas as pd
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QScrollArea, QFrame, QGridLayout, QLineEdit, QComboBox, 
@@ -44,21 +43,29 @@ class DatasetCard(QFrame):
         audio_dir = os.path.join(self.dataset_path, "audio")
         audio_count = len(os.listdir(audio_dir)) if os.path.exists(audio_dir) else 0
 
-        # Get metadata info
-        metadata_path = os.path.join(self.dataset_path, "metadata.csv")
+        # Get metadata info from the stored aggregates instead of parsing the CSV
         columns_count = 0
-        if os.path.exists(metadata_path):
+        entries_count = 0
+        total_minutes = 0
+        if os.path.exists(os.path.join(self.dataset_path, "metadata.csv")):
             try:
-                df = pd.read_csv(metadata_path)
-                columns_count = len(df.columns)
-            except:
-                pass
+                stats = DatasetManager(self.dataset_path).get_stats()
+                columns_count = len(stats.columns)
+                entries_count = stats.rows
+                duration = stats.column("duration")
+                total_minutes = int(duration["sum"] // 60) if duration else 0
+            except Exception as e:
+                logger.warning(f"Could not load stats for {self.dataset_path}: {e}")
 
         # Display stats
         stats_layout.addWidget(QLabel(qta.icon("fa5s.file-audio", color="#3498db"), f" {audio_count}"), 0, 0)
         stats_layout.addWidget(QLabel("Audio Files"), 0, 1)
-        stats_layout.addWidget(QLabel(qta.icon("fa5s.columns", color="#2ecc71"), f" {columns_count}"), 1, 0)
-        stats_layout.addWidget(QLabel("Columns"), 1, 1)
+        stats_layout.addWidget(QLabel(qta.icon("fa5s.list", color="#9b59b6"), f" {entries_count}"), 1, 0)
+        stats_layout.addWidget(QLabel("Entries"), 1, 1)
+        stats_layout.addWidget(QLabel(qta.icon("fa5s.clock", color="#e67e22"), f" {total_minutes} min"), 2, 0)
+        stats_layout.addWidget(QLabel("Total Duration"), 2, 1)
+        stats_layout.addWidget(QLabel(qta.icon("fa5s.columns", color="#2ecc71"), f" {columns_count}"), 3, 0)
+        stats_layout.addWidget(QLabel("Columns"), 3, 1)
 
         layout.addLayout(stats_layout)
         layout.addStretch()
@@ -172,7 +179,7 @@ class DashboardWidget(QWidget):
             os.makedirs(full_path, exist_ok=True)
 
             dataset_manager = DatasetManager(full_path, create_new=True, columns=columns)
-            dataset_manager.init_metadata()
+            dataset_manager.create_template(columns, dialog.get_template())
 
             self.status_bar.showMessage(f"Dataset '{dataset_name}' created successfully", 5000)
             logger.info(f"Dataset created: {dataset_name}")
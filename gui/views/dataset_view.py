@@ -2,10 +2,11 @@
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView,
-    QHeaderView, QFileDialog, QMessageBox, QToolBar, QLineEdit, QComboBox
+    QHeaderView, QFileDialog, QMessageBox, QToolBar, QLineEdit, QComboBox,
+    QToolButton, QMenu, QInputDialog
 )
-from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
-from PySide6.QtGui import QAction
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal, QSize
+from PySide6.QtGui import QAction, QPixmap
 import qtawesome as qta
 import pandas as pd
 import os
@@ -13,19 +14,28 @@ import os
 from gui.components.audio_player import AudioWaveformWidget
 from gui.components.entry_form import EntryForm
 from scripts.dataset_manager import DatasetManager
+from scripts.job_scheduler import ScheduledTask, PRIORITY_BATCH, get_scheduler
+from scripts.version_store import pick_key_column
+from scripts import dataset_schema
+from scripts.dataset_schema import SchemaValidationError
+from scripts.integrity import AUDIO_COLUMNS
+from scripts.thumbnails import ThumbnailCache, THUMBNAIL_SIZE
+from scripts.logger import logger
 
 
 class DatasetTableModel(QAbstractTableModel):
     """Table Model for displaying dataset metadata efficiently."""
 
-    def __init__(self, dataset_manager):
+    def __init__(self, dataset_manager, thumbnails=None):
         super().__init__()
         self.dataset_manager = dataset_manager
+        self.thumbnails = thumbnails
+        self.pixmaps = {}
         self.load_data()
 
     def load_data(self):
         """Loads dataset metadata into a DataFrame."""
-        self.dataframe = self.dataset_manager.get_metadata() or pd.DataFrame()
+        self.dataframe = self.dataset_manager.get_metadata()
         self.beginResetModel()
         self.endResetModel()
 
@@ -36,14 +46,51 @@ class DatasetTableModel(QAbstractTableModel):
         return len(self.dataframe.columns)
 
     def data(self, index, role):
-        if not index.isValid() or role != Qt.DisplayRole:
+        if not index.isValid():
+            return None
+        if role == Qt.DecorationRole:
+            return self.thumbnail(index)
+        if role != Qt.DisplayRole:
             return None
         return str(self.dataframe.iloc[index.row(), index.column()])
 
+    def thumbnail(self, index):
+        """Returns the pre-rendered waveform for an audio cell; never decodes audio."""
+        if self.thumbnails is None or self.dataframe.columns[index.column()] not in AUDIO_COLUMNS:
+            return None
+        value = self.dataframe.iloc[index.row(), index.column()]
+        if pd.isna(value) or not str(value).strip():
+            return None
+        name = os.path.basename(str(value))
+        if name not in self.pixmaps:
+            path = self.thumbnails.get(name)
+            if path is None:
+                return None
+            self.pixmaps[name] = QPixmap(path)
+        return self.pixmaps[name]
+
+    def reload_thumbnails(self):
+        self.pixmaps.clear()
+        if self.rowCount() and self.columnCount():
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1), [Qt.DecorationRole])
+
     def setData(self, index, value, role=Qt.EditRole):
         if index.isValid() and role == Qt.EditRole:
+            column = self.dataframe.columns[index.column()]
+            try:
+                # The table may be filtered, so write back by the row's label in the full metadata,
+                # pinned to the key value shown here in case the rows moved on disk
+                key = pick_key_column(self.dataframe)
+                row_key = (key, self.dataframe.iloc[index.row()][key]) if key else None
+                saved = self.dataset_manager.update_metadata_value(self.dataframe.index[index.row()], column, value, row_key)
+            except SchemaValidationError as e:
+                logger.warning(f"Rejected edit: {e}")
+                return False
+            if not saved:
+                return False
+            value = dataset_schema.coerce_value(value, self.dataset_manager.template, column)
+            dataset_schema.widen_categories(self.dataframe, column, value)
             self.dataframe.iloc[index.row(), index.column()] = value
-            self.dataset_manager.update_metadata_value(index.row(), self.dataframe.columns[index.column()], value)
             self.dataChanged.emit(index, index)
             return True
         return False
@@ -57,6 +104,84 @@ class DatasetTableModel(QAbstractTableModel):
         return None
 
 
+class IntegrityScanWorker(ScheduledTask):
+    """Runs a dataset integrity scan as a background scheduler task."""
+    scan_complete = Signal(object)
+
+    priority = PRIORITY_BATCH
+
+    def __init__(self, dataset_manager, incremental=True):
+        super().__init__(name=f"Integrity check {os.path.basename(dataset_manager.dataset_path)}")
+        self.dataset_manager = dataset_manager
+        self.incremental = incremental
+
+    def run(self):
+        report = self.dataset_manager.check_integrity(
+            incremental=self.incremental,
+            progress_callback=self.progress_updated.emit,
+            cancel_check=lambda: self.cancel_requested,
+        )
+        self.scan_complete.emit(report)
+
+
+class DuplicateScanWorker(ScheduledTask):
+    """Fingerprints new clips and builds a near-duplicate report as a background scheduler task."""
+    scan_complete = Signal(object)
+
+    priority = PRIORITY_BATCH
+
+    def __init__(self, dataset_manager):
+        super().__init__(name=f"Duplicate scan {os.path.basename(dataset_manager.dataset_path)}")
+        self.dataset_manager = dataset_manager
+
+    def run(self):
+        report = self.dataset_manager.find_duplicates(
+            progress_callback=self.progress_updated.emit,
+            cancel_check=lambda: self.cancel_requested,
+        )
+        self.scan_complete.emit(report)
+
+
+class SimilarSearchWorker(ScheduledTask):
+    """Embeds any clips not yet in the store and finds the clips nearest to one row as a background scheduler task."""
+    search_complete = Signal(int, object)
+
+    priority = PRIORITY_BATCH
+
+    def __init__(self, dataset_manager, row, k=20):
+        super().__init__(name=f"Similarity search {os.path.basename(dataset_manager.dataset_path)}")
+        self.dataset_manager = dataset_manager
+        self.row = row
+        self.k = k
+
+    def run(self):
+        matches = self.dataset_manager.find_similar(
+            self.row, self.k,
+            progress_callback=self.progress_updated.emit,
+            cancel_check=lambda: self.cancel_requested,
+        )
+        if not self.cancel_requested:
+            self.search_complete.emit(self.row, matches)
+
+
+class ThumbnailRenderWorker(ScheduledTask):
+    """Renders missing waveform and spectrogram thumbnails as a background scheduler task."""
+    thumbnails_ready = Signal(int)
+
+    priority = PRIORITY_BATCH
+
+    def __init__(self, thumbnails):
+        super().__init__(name=f"Thumbnails {os.path.basename(thumbnails.dataset_manager.dataset_path)}")
+        self.thumbnails = thumbnails
+
+    def run(self):
+        rendered = self.thumbnails.render_all(
+            progress_callback=self.progress_updated.emit,
+            cancel_check=lambda: self.cancel_requested,
+        )
+        self.thumbnails_ready.emit(rendered)
+
+
 class DatasetView(QWidget):
     """View for displaying, managing, and editing dataset metadata."""
 
@@ -66,8 +191,14 @@ class DatasetView(QWidget):
         super().__init__(parent)
         self.dataset_manager = dataset_manager
         self.status_bar = status_bar
+        self.thumbnails = ThumbnailCache(dataset_manager)
+        self.thumbnail_worker = None
         self.setup_ui()
 
+        # Refresh once per group commit rather than once per imported file
+        self.dataset_manager.commit_queue.committed.connect(self.on_rows_committed)
+        self.dataset_manager.commit_queue.start()
+
     def setup_ui(self):
         """Set up the UI components for dataset management."""
         layout = QVBoxLayout(self)
@@ -85,11 +216,14 @@ class DatasetView(QWidget):
         layout.addWidget(self.toolbar)
 
         # Metadata Table
-        self.table_model = DatasetTableModel(self.dataset_manager)
+        self.table_model = DatasetTableModel(self.dataset_manager, self.thumbnails)
         self.metadata_table = QTableView()
         self.metadata_table.setModel(self.table_model)
+        self.metadata_table.setIconSize(QSize(*THUMBNAIL_SIZE))
+        self.metadata_table.verticalHeader().setDefaultSectionSize(THUMBNAIL_SIZE[1] + 6)
         self.metadata_table.setAlternatingRowColors(True)
         self.metadata_table.setSelectionBehavior(QTableView.SelectRows)
+        self.metadata_table.setSelectionMode(QTableView.ExtendedSelection)
         self.metadata_table.setEditTriggers(QTableView.DoubleClicked)
         self.metadata_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         layout.addWidget(self.metadata_table)
@@ -116,6 +250,42 @@ class DatasetView(QWidget):
         remove_entry_action.triggered.connect(self.remove_entry)
         toolbar.addAction(remove_entry_action)
 
+        # Bulk Edits for the current selection
+        bulk_menu = QMenu(self)
+        bulk_menu.addAction("Set Column...", self.bulk_set_column)
+        bulk_menu.addAction("Find && Replace...", self.bulk_replace)
+        bulk_menu.addAction("Fill Down...", self.bulk_fill_down)
+        bulk_menu.addAction("Compute Column...", self.bulk_compute_column)
+        bulk_menu.addSeparator()
+        bulk_menu.addAction("Declare Computed Column...", self.declare_computed_column)
+        bulk_button = QToolButton()
+        bulk_button.setIcon(qta.icon("fa5s.edit"))
+        bulk_button.setText("Bulk Edit")
+        bulk_button.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
+        bulk_button.setPopupMode(QToolButton.InstantPopup)
+        bulk_button.setMenu(bulk_menu)
+        toolbar.addWidget(bulk_button)
+
+        # Integrity Check
+        integrity_action = QAction(qta.icon("fa5s.stethoscope"), "Check Integrity", self)
+        integrity_action.triggered.connect(self.check_integrity)
+        toolbar.addAction(integrity_action)
+
+        # Similarity search for the selected clip
+        similar_action = QAction(qta.icon("fa5s.search-plus"), "Find Similar", self)
+        similar_action.triggered.connect(self.find_similar)
+        toolbar.addAction(similar_action)
+
+        # Near-duplicate detection
+        duplicates_action = QAction(qta.icon("fa5s.clone"), "Find Duplicates", self)
+        duplicates_action.triggered.connect(self.find_duplicates)
+        toolbar.addAction(duplicates_action)
+
+        # Compaction
+        compact_action = QAction(qta.icon("fa5s.compress-arrows-alt"), "Compact Dataset", self)
+        compact_action.triggered.connect(self.compact_dataset)
+        toolbar.addAction(compact_action)
+
         # Search Bar
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("🔍 Search...")
@@ -128,6 +298,24 @@ class DatasetView(QWidget):
         """Loads dataset metadata into the table model."""
         self.table_model.load_data()
         self.status_bar.showMessage(f"Loaded dataset with {self.table_model.rowCount()} entries", 5000)
+        self.render_thumbnails()
+
+    def render_thumbnails(self):
+        """Renders thumbnails for new or changed clips in the background."""
+        if self.thumbnail_worker is not None and self.thumbnail_worker.state in ("queued", "running"):
+            return
+        self.thumbnail_worker = ThumbnailRenderWorker(self.thumbnails)
+        self.thumbnail_worker.thumbnails_ready.connect(self.on_thumbnails_ready)
+        get_scheduler().submit(self.thumbnail_worker)
+
+    def on_thumbnails_ready(self, rendered):
+        if rendered:
+            self.table_model.reload_thumbnails()
+
+    def on_rows_committed(self, row_count):
+        """Reloads the table after the writer commits a batch of rows."""
+        self.load_dataset()
+        self.datasetUpdated.emit()
 
     def add_entry(self):
         """Opens the entry form to add a new audio entry."""
@@ -135,18 +323,239 @@ class DatasetView(QWidget):
         self.entry_form.setWindowTitle("Add New Audio Entry")
         self.entry_form.show()
 
+    def selected_rows(self):
+        """Returns the current selection as delete_rows/bulk_* keyword arguments, or None if empty.
+
+        Rows are identified by key value when the metadata has a unique key
+        column, otherwise by their label in the (possibly filtered) table.
+        """
+        positions = sorted(index.row() for index in self.metadata_table.selectionModel().selectedRows())
+        if not positions:
+            return None
+        df = self.table_model.dataframe
+        key_column = pick_key_column(df)
+        if key_column:
+            return {"keys": df[key_column].iloc[positions].tolist(), "key_column": key_column}
+        return {"rows": df.index[positions].tolist()}
+
     def remove_entry(self):
-        """Removes the selected metadata entry from the dataset."""
-        selected_rows = set(index.row() for index in self.metadata_table.selectionModel().selectedRows())
-        if not selected_rows:
+        """Removes the selected metadata entries from the dataset in one write."""
+        selection = self.selected_rows()
+        if not selection:
             QMessageBox.warning(self, "Warning", "Please select an entry to remove.")
             return
 
-        df = self.dataset_manager.get_metadata()
-        df = df.drop(index=selected_rows).reset_index(drop=True)
-        df.to_csv(self.dataset_manager.metadata_path, index=False)
+        removed = self.dataset_manager.delete_rows(**selection)
+        self.load_dataset()
+        self.datasetUpdated.emit()
+        self.status_bar.showMessage(f"Removed {removed} entries.", 5000)
+
+    def _bulk_selection(self):
+        selection = self.selected_rows()
+        if not selection:
+            QMessageBox.warning(self, "Warning", "Please select the rows to edit.")
+        return selection
+
+    def _ask_column(self, title, editable=False):
+        columns = [str(c) for c in self.table_model.dataframe.columns]
+        column, ok = QInputDialog.getItem(self, title, "Column:", columns, 0, editable)
+        return column if ok and column else None
+
+    def _run_bulk(self, operation, *args, **selection):
+        """Applies a bulk DatasetManager operation and refreshes the table once."""
+        try:
+            count = operation(*args, **selection)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Bulk edit failed: {e}")
+            return
         self.load_dataset()
-        self.status_bar.showMessage("Entry removed successfully.", 5000)
+        self.datasetUpdated.emit()
+        self.status_bar.showMessage(f"Updated {count} rows.", 5000)
+
+    def bulk_set_column(self):
+        selection = self._bulk_selection()
+        column = selection and self._ask_column("Set Column", editable=True)
+        if not column:
+            return
+        value, ok = QInputDialog.getText(self, "Set Column", f"Value for '{column}':")
+        if ok:
+            self._run_bulk(self.dataset_manager.bulk_set, column, value, **selection)
+
+    def bulk_replace(self):
+        selection = self._bulk_selection()
+        column = selection and self._ask_column("Find & Replace")
+        if not column:
+            return
+        pattern, ok = QInputDialog.getText(self, "Find & Replace", "Find (regular expression):")
+        if not ok or not pattern:
+            return
+        replacement, ok = QInputDialog.getText(self, "Find & Replace", "Replace with:")
+        if ok:
+            self._run_bulk(self.dataset_manager.bulk_replace, column, pattern, replacement, **selection)
+
+    def bulk_fill_down(self):
+        selection = self._bulk_selection()
+        column = selection and self._ask_column("Fill Down")
+        if column:
+            self._run_bulk(self.dataset_manager.fill_down, column, **selection)
+
+    def bulk_compute_column(self):
+        selection = self._bulk_selection()
+        column = selection and self._ask_column("Compute Column", editable=True)
+        if not column:
+            return
+        expression, ok = QInputDialog.getText(self, "Compute Column", "Expression (e.g. duration * sample_rate):")
+        if ok and expression:
+            self._run_bulk(self.dataset_manager.compute_column, column, expression, **selection)
+
+    def declare_computed_column(self):
+        """Adds a computed column to the dataset template; it stays up to date on every write."""
+        column = self._ask_column("Declare Computed Column", editable=True)
+        if not column:
+            return
+        current = (self.dataset_manager.template.get("computed") or {}).get(column, "")
+        if isinstance(current, dict):
+            current = current["expression"]
+        expression, ok = QInputDialog.getText(
+            self, "Declare Computed Column",
+            "Expression over other columns (leave empty to remove):", QLineEdit.Normal, current)
+        if not ok:
+            return
+        try:
+            self.dataset_manager.set_computed_column(column, expression.strip() or None)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Invalid computed column: {e}")
+            return
+        self.load_dataset()
+        self.datasetUpdated.emit()
+        self.status_bar.showMessage(f"Computed column '{column}' updated.", 5000)
+
+    def check_integrity(self):
+        """Scans the dataset's audio files in the background."""
+        self.integrity_worker = IntegrityScanWorker(self.dataset_manager)
+        self.integrity_worker.progress_updated.connect(
+            lambda value: self.status_bar.showMessage(f"Checking integrity... {value}%"))
+        self.integrity_worker.scan_complete.connect(self.show_integrity_report)
+        get_scheduler().submit(self.integrity_worker)
+
+    def show_integrity_report(self, report):
+        """Summarizes an integrity report and offers to apply the suggested fixes."""
+        issues = report["issues"]
+        if not issues:
+            self.status_bar.showMessage(
+                f"Integrity check passed ({report['checked']} checked, {report['skipped_unchanged']} unchanged)", 5000)
+            return
+
+        counts = {}
+        for issue in issues:
+            counts[issue["kind"]] = counts.get(issue["kind"], 0) + 1
+        summary = "\n".join(f"{kind.replace('_', ' ').title()}: {count}" for kind, count in sorted(counts.items()))
+        details = "\n".join(f"[{issue['kind']}] {issue['file']}: {issue['detail']} -> {issue['fix']}" for issue in issues)
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Integrity Report")
+        box.setIcon(QMessageBox.Warning)
+        box.setText(f"Found {len(issues)} issues:\n\n{summary}")
+        box.setInformativeText("Missing files drop their rows, damaged files are moved to quarantine/, "
+                               "and orphan files get new rows.")
+        box.setDetailedText(details)
+        fix_button = box.addButton("Apply Suggested Fixes", QMessageBox.AcceptRole)
+        box.addButton(QMessageBox.Close)
+        box.exec()
+
+        if box.clickedButton() == fix_button:
+            counts = self.dataset_manager.apply_integrity_fixes(issues)
+            self.load_dataset()
+            self.datasetUpdated.emit()
+            self.status_bar.showMessage(
+                "Applied fixes: " + ", ".join(f"{fix} x{count}" for fix, count in counts.items()), 5000)
+
+    def find_similar(self):
+        """Shows the clips most similar to the selected one, nearest first."""
+        positions = self.metadata_table.selectionModel().selectedRows()
+        if len(positions) != 1:
+            QMessageBox.warning(self, "Warning", "Please select a single entry.")
+            return
+        row = int(self.table_model.dataframe.index[positions[0].row()])
+        self.status_bar.showMessage("Searching for similar clips...")
+        # The first search may embed the whole dataset, so it runs as a cancellable batch task
+        self.similar_worker = SimilarSearchWorker(self.dataset_manager, row)
+        self.similar_worker.progress_updated.connect(
+            lambda value: self.status_bar.showMessage(f"Embedding clips for similarity search... {value}%"))
+        self.similar_worker.search_complete.connect(self.show_similar)
+        get_scheduler().submit(self.similar_worker)
+
+    def show_similar(self, row, matches):
+        if not matches:
+            self.status_bar.showMessage("No similar clips found (the selected row may have no audio).", 5000)
+            return
+        df = self.dataset_manager.get_metadata()
+        rows = [row] + [match for match, _ in matches if match < len(df)]
+        self.table_model.dataframe = df.iloc[rows]
+        self.table_model.layoutChanged.emit()
+        self.status_bar.showMessage(f"Showing the {len(rows) - 1} clips most similar to row {row + 1}; clear the search to reset.", 8000)
+
+    def find_duplicates(self):
+        """Looks for near-identical clips (re-renders, re-uploads) in the background."""
+        self.duplicate_worker = DuplicateScanWorker(self.dataset_manager)
+        self.duplicate_worker.progress_updated.connect(
+            lambda value: self.status_bar.showMessage(f"Fingerprinting clips... {value}%"))
+        self.duplicate_worker.scan_complete.connect(self.show_duplicate_report)
+        get_scheduler().submit(self.duplicate_worker)
+
+    def show_duplicate_report(self, report):
+        groups = report["groups"]
+        if not groups:
+            self.status_bar.showMessage(f"No near-duplicates among {report['clips']} clips", 5000)
+            return
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Duplicate Report")
+        box.setIcon(QMessageBox.Information)
+        box.setText(f"Found {len(groups)} groups of near-duplicate clips "
+                    f"({sum(len(group) for group in groups)} clips of {report['clips']}).")
+        box.setDetailedText("\n\n".join("\n".join(group) for group in groups)
+                            + "\n\nMost similar pairs:\n"
+                            + "\n".join(f"{a} ~ {b}: {similarity:.0%}" for a, b, similarity in report["pairs"][:200]))
+        box.exec()
+
+    def compact_dataset(self):
+        """Shows what compaction would reclaim and runs it after confirmation."""
+        get_scheduler().run_function(
+            self.dataset_manager.compact, True,
+            on_result=self.confirm_compaction,
+            on_error=lambda error: QMessageBox.critical(self, "Error", f"Compaction failed: {error}"),
+            name="Compaction dry run",
+        )
+
+    def confirm_compaction(self, report):
+        if not report["bytes_reclaimed"]:
+            self.status_bar.showMessage("Nothing to compact.", 5000)
+            return
+
+        lines = [
+            f"{category.replace('_', ' ').title()}: {totals['count']} ({totals['bytes'] / 1024 / 1024:.1f} MB)"
+            for category, totals in sorted(report["by_category"].items())
+        ]
+        if report["metadata_bytes_saved"]:
+            lines.append(f"Metadata rewrite: {report['metadata_bytes_saved'] / 1024:.1f} KB")
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Compact Dataset")
+        box.setText(f"Compaction would reclaim {report['bytes_reclaimed'] / 1024 / 1024:.1f} MB:\n\n" + "\n".join(lines))
+        box.setDetailedText("\n".join(item["path"] for item in report["items"]))
+        box.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+        if box.exec() != QMessageBox.Yes:
+            return
+
+        get_scheduler().run_function(
+            self.dataset_manager.compact, False, confirmed=report["items"],
+            on_result=lambda result: self.status_bar.showMessage(
+                f"Reclaimed {result['bytes_reclaimed'] / 1024 / 1024:.1f} MB", 5000),
+            on_error=lambda error: QMessageBox.critical(self, "Error", f"Compaction failed: {error}"),
+            name="Compaction",
+            priority=PRIORITY_BATCH,
+        )
 
     def filter_table(self):
         """Filters metadata based on search input."""
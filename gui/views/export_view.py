@@ -3,29 +3,35 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
     QFrame, QGridLayout, QCheckBox, QFileDialog, QMessageBox, QLineEdit,
-    QProgressBar, QFormLayout, QTabWidget, QStackedWidget
+    QProgressBar, QFormLayout, QTabWidget, QStackedWidget, QSpinBox
 )
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, Signal
 import qtawesome as qta
 import os
 import pandas as pd
 import shutil
 
 from scripts.export_handler import ExportHandler
+from scripts.job_scheduler import ScheduledTask, PRIORITY_BATCH, get_scheduler
 
 
-class ExportWorker(QThread):
-    """Handles dataset export in a separate thread to prevent UI freezing."""
-    progress_updated = Signal(int)
+class ExportWorker(ScheduledTask):
+    """Handles dataset export as a background scheduler task to prevent UI freezing."""
     export_complete = Signal(bool, str)
 
+    priority = PRIORITY_BATCH
+
     def __init__(self, dataset_path, export_options):
-        super().__init__()
+        super().__init__(name=f"Export {os.path.basename(dataset_path)}")
         self.dataset_path = dataset_path
         self.export_options = export_options
 
     def run(self):
-        handler = ExportHandler(self.dataset_path, self.export_options)
+        handler = ExportHandler(
+            self.dataset_path, self.export_options,
+            progress_callback=self.progress_updated.emit,
+            cancel_check=lambda: self.cancel_requested,
+        )
         success, message = handler.execute_export()
         self.export_complete.emit(success, message)
 
@@ -92,9 +98,18 @@ class ExportView(QWidget):
         # Export Format Selection
         format_layout = QFormLayout()
         self.format_selector = QComboBox()
-        self.format_selector.addItems(["CSV", "JSON", "ZIP Archive"])
+        self.format_selector.addItems(["CSV", "JSON", "ZIP Archive", "WebDataset Shards"])
+        self.format_selector.currentTextChanged.connect(self.update_format_options)
         format_layout.addRow("Export Format:", self.format_selector)
 
+        # Target shard size, only used by the WebDataset format
+        self.shard_size_input = QSpinBox()
+        self.shard_size_input.setRange(16, 16384)
+        self.shard_size_input.setValue(1024)
+        self.shard_size_input.setSuffix(" MB")
+        self.shard_size_input.setEnabled(False)
+        format_layout.addRow("Shard Size:", self.shard_size_input)
+
         # Destination Folder Selection
         self.destination_input = QLineEdit()
         browse_btn = QPushButton(qta.icon("fa5s.folder-open"), "")
@@ -107,6 +122,10 @@ class ExportView(QWidget):
         layout.addLayout(format_layout)
         return tab
 
+    def update_format_options(self, export_format):
+        """Enables the shard size only for the WebDataset format."""
+        self.shard_size_input.setEnabled(export_format == "WebDataset Shards")
+
     def create_cloud_export_tab(self):
         """Creates the UI for cloud exports (Hugging Face, Kaggle, GitHub)."""
         tab = QWidget()
@@ -189,8 +208,9 @@ class ExportView(QWidget):
         export_options = {
             "format": self.format_selector.currentText(),
             "destination": self.destination_input.text(),
-            "service": self.service_selector.currentText(),
+            "service": self.service_selector.currentText() if self.tabs.currentWidget() is self.cloud_tab else None,
             "repo_name": self.hf_repo_name.text() if self.service_selector.currentText() == "Hugging Face" else None,
+            "shard_mb": self.shard_size_input.value(),
         }
 
         self.progress_bar.setVisible(True)
@@ -199,7 +219,7 @@ class ExportView(QWidget):
         self.export_worker = ExportWorker(dataset_path, export_options)
         self.export_worker.progress_updated.connect(self.progress_bar.setValue)
         self.export_worker.export_complete.connect(self.handle_export_completion)
-        self.export_worker.start()
+        get_scheduler().submit(self.export_worker)
 
     def handle_export_completion(self, success, message):
         """Handles export completion and updates UI."""
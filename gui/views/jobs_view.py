@@ -0,0 +1,78 @@
+# gui/views/jobs_view.py
+
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QFrame, QGridLayout, QTableWidget,
+    QTableWidgetItem, QHeaderView
+)
+from PySide6.QtCore import QTimer
+
+from scripts.job_scheduler import get_scheduler, PRIORITY_BATCH
+
+
+class JobsView(QWidget):
+    """Panel showing the scheduler's queue depth, running tasks and throughput."""
+
+    def __init__(self, status_bar, parent=None):
+        super().__init__(parent)
+        self.status_bar = status_bar
+        self.scheduler = get_scheduler()
+        self.setup_ui()
+
+        self.scheduler.stats_changed.connect(self.update_stats)
+
+        # Throughput decays over time even when nothing changes, so refresh periodically
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(lambda: self.update_stats(self.scheduler.stats()))
+        self.refresh_timer.start(1000)
+        self.update_stats(self.scheduler.stats())
+
+    def setup_ui(self):
+        """Initializes the jobs panel layout."""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        header = QLabel("Background Jobs")
+        header.setObjectName("page-header")
+        layout.addWidget(header)
+
+        # Summary
+        stats_frame = QFrame()
+        stats_frame.setObjectName("section-frame")
+        stats_layout = QGridLayout(stats_frame)
+
+        self.running_label = QLabel("Running: 0 / 0")
+        stats_layout.addWidget(self.running_label, 0, 0)
+
+        self.queued_label = QLabel("Queued: 0")
+        stats_layout.addWidget(self.queued_label, 0, 1)
+
+        self.completed_label = QLabel("Completed: 0")
+        stats_layout.addWidget(self.completed_label, 1, 0)
+
+        self.throughput_label = QLabel("Throughput: 0.0 jobs/min")
+        stats_layout.addWidget(self.throughput_label, 1, 1)
+
+        layout.addWidget(stats_frame)
+
+        # Task Table
+        self.task_table = QTableWidget(0, 4)
+        self.task_table.setHorizontalHeaderLabels(["Task", "Type", "State", "Progress"])
+        self.task_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.task_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.task_table)
+
+    def update_stats(self, stats):
+        """Refreshes the summary labels and the task table."""
+        self.running_label.setText(f"Running: {len(stats['running'])} / {stats['max_workers']}")
+        self.queued_label.setText(f"Queued: {len(stats['queued'])}")
+        self.completed_label.setText(f"Completed: {stats['completed']}")
+        self.throughput_label.setText(f"Throughput: {stats['throughput']:.1f} jobs/min")
+
+        rows = [(name, priority, "Running", f"{progress}%") for name, priority, progress in stats["running"]]
+        rows += [(name, priority, "Queued", "") for name, priority in stats["queued"]]
+
+        self.task_table.setRowCount(len(rows))
+        for row, (name, priority, state, progress) in enumerate(rows):
+            kind = "Batch" if priority >= PRIORITY_BATCH else "Interactive"
+            for column, value in enumerate([name, kind, state, progress]):
+                self.task_table.setItem(row, column, QTableWidgetItem(value))
@@ -11,6 +11,10 @@ import qtawesome as qta
 import os
 import json
 from gui.views.log_viewer import LogViewer
+from scripts.app_settings import NORMALIZATION_PRESETS, DEFAULT_NORMALIZATION_PRESET, get_frame_features_enabled
+from scripts.transcode_cache import get_transcode_cache
+from scripts.spectrogram_cache import get_spectrogram_cache
+from scripts.job_scheduler import get_scheduler
 from scripts.logger import logger
 
 
@@ -134,6 +138,17 @@ class SettingsView(QWidget):
         self.normalize_on_import = QCheckBox("Normalize audio on import")
         form_layout.addRow("", self.normalize_on_import)
 
+        self.normalization_preset = QComboBox()
+        self.normalization_preset.addItems(list(NORMALIZATION_PRESETS.keys()))
+        self.normalize_on_import.toggled.connect(self.normalization_preset.setEnabled)
+        form_layout.addRow("Normalization Target:", self.normalization_preset)
+
+        self.metadata_versioning = QCheckBox("Keep metadata version history")
+        form_layout.addRow("", self.metadata_versioning)
+
+        self.extract_frame_features = QCheckBox("Store frame-level features on import (MFCC, mel, chroma)")
+        form_layout.addRow("", self.extract_frame_features)
+
         layout.addLayout(form_layout)
         return tab
 
@@ -184,6 +199,14 @@ class SettingsView(QWidget):
         self.cache_size.setSuffix(" MB")
         form_layout.addRow("Cache Size:", self.cache_size)
 
+        clear_cache_btn = QPushButton(qta.icon("fa5s.broom"), "Clear Transcode Cache")
+        clear_cache_btn.clicked.connect(self.clear_transcode_cache)
+        form_layout.addRow("", clear_cache_btn)
+
+        clear_spectrogram_btn = QPushButton(qta.icon("fa5s.broom"), "Clear Spectrogram Cache")
+        clear_spectrogram_btn.clicked.connect(self.clear_spectrogram_cache)
+        form_layout.addRow("", clear_spectrogram_btn)
+
         self.max_threads = QSpinBox()
         self.max_threads.setRange(1, 16)
         self.max_threads.setValue(4)
@@ -196,6 +219,16 @@ class SettingsView(QWidget):
         layout.addLayout(form_layout)
         return tab
 
+    def clear_transcode_cache(self):
+        """Deletes every cached transcode result."""
+        get_transcode_cache().clear()
+        self.status_bar.showMessage("Transcode cache cleared", 3000)
+
+    def clear_spectrogram_cache(self):
+        """Deletes every cached spectrogram tile."""
+        get_spectrogram_cache().clear()
+        self.status_bar.showMessage("Spectrogram cache cleared", 3000)
+
     def browse_dataset_location(self):
         """Opens file dialog for selecting dataset location."""
         folder = QFileDialog.getExistingDirectory(self, "Select Default Dataset Location")
@@ -208,6 +241,15 @@ class SettingsView(QWidget):
         self.accent_color.color = QColor(self.settings.value("accent_color", "#3498db"))
         self.accent_color.update_button_color()
 
+        self.default_dataset_location.setText(self.settings.value("default_dataset_location", ""))
+        self.default_audio_format.setCurrentText(self.settings.value("default_audio_format", "WAV"))
+        self.audio_quality.setCurrentText(self.settings.value("audio_quality", "High"))
+        self.normalize_on_import.setChecked(self.settings.value("normalize_on_import", True, type=bool))
+        self.normalization_preset.setCurrentText(self.settings.value("normalization_preset", DEFAULT_NORMALIZATION_PRESET))
+        self.normalization_preset.setEnabled(self.normalize_on_import.isChecked())
+        self.metadata_versioning.setChecked(self.settings.value("metadata_versioning", True, type=bool))
+        self.extract_frame_features.setChecked(get_frame_features_enabled(self.settings))
+
         self.cache_size.setValue(self.settings.value("cache_size", 1000, type=int))
         self.max_threads.setValue(self.settings.value("max_threads", 4, type=int))
         self.enable_hardware_accel.setChecked(self.settings.value("enable_hardware_accel", True, type=bool))
@@ -217,7 +259,20 @@ class SettingsView(QWidget):
         self.settings.setValue("theme", self.theme_selector.currentText())
         self.settings.setValue("accent_color", self.accent_color.get_color())
 
+        self.settings.setValue("default_dataset_location", self.default_dataset_location.text())
+        self.settings.setValue("default_audio_format", self.default_audio_format.currentText())
+        self.settings.setValue("audio_quality", self.audio_quality.currentText())
+        self.settings.setValue("normalize_on_import", self.normalize_on_import.isChecked())
+        self.settings.setValue("normalization_preset", self.normalization_preset.currentText())
+        self.settings.setValue("metadata_versioning", self.metadata_versioning.isChecked())
+        self.settings.setValue("extract_frame_features", self.extract_frame_features.isChecked())
+
+        self.settings.setValue("cache_size", self.cache_size.value())
+        self.settings.setValue("max_threads", self.max_threads.value())
+        self.settings.setValue("enable_hardware_accel", self.enable_hardware_accel.isChecked())
+
         self.settings.sync()
+        get_scheduler().set_max_workers(self.max_threads.value())
         self.status_bar.showMessage("Settings saved successfully", 3000)
 
     def reset_settings(self):
@@ -1,10 +1,8 @@
-import os
-import pandas as pd
-import plotly.express as px
-import tempfile
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QMessageBox
-from PySide6.QtWebEngineWidgets import QWebEngineView
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QMessageBox, QComboBox, QLabel
+from gui.components.plotly_view import PlotlyView
 from scripts.dataset_manager import DatasetManager
+from scripts.job_scheduler import PRIORITY_INTERACTIVE, get_scheduler
+from scripts.plotly_figures import CHART_KINDS, get_figure_cache
 
 class VisualizationWidget(QWidget):
     def __init__(self, dataset_manager: DatasetManager):
@@ -14,29 +12,66 @@ class VisualizationWidget(QWidget):
         self.resize(900, 600)
         self.setup_ui()
 
+        # Redraw after each group commit; unchanged datasets are served from the figure cache.
+        # committed is emitted on the commit queue's writer thread, and only a slot of this
+        # QObject (not a lambda) is queued onto the GUI thread that owns the web view
+        self.dataset_manager.commit_queue.committed.connect(self.on_rows_committed)
+
     def setup_ui(self):
         layout = QVBoxLayout()
 
-        self.web_view = QWebEngineView()
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Chart:"))
+        self.kind_selector = QComboBox()
+        self.kind_selector.addItems(CHART_KINDS)
+        controls.addWidget(self.kind_selector)
+        controls.addWidget(QLabel("X:"))
+        self.x_selector = QComboBox()
+        controls.addWidget(self.x_selector)
+        controls.addWidget(QLabel("Y:"))
+        self.y_selector = QComboBox()
+        controls.addWidget(self.y_selector)
+
+        self.web_view = PlotlyView()
         refresh_btn = QPushButton("🔄 Refresh Visualization")
-        refresh_btn.clicked.connect(self.load_visualization)
+        refresh_btn.clicked.connect(lambda: self.load_visualization())
+        controls.addWidget(refresh_btn)
 
+        layout.addLayout(controls)
         layout.addWidget(self.web_view)
-        layout.addWidget(refresh_btn)
 
         self.setLayout(layout)
+        self.load_columns()
         self.load_visualization()
 
-    def load_visualization(self):
-        df = pd.read_csv(self.dataset_manager.metadata_csv)
-        if df.empty:
-            QMessageBox.warning(self, "No Data", "The dataset is currently empty.")
+    def on_rows_committed(self, count):
+        """Redraws the chart after the writer commits a batch of rows."""
+        self.load_visualization(quiet=True)
+
+    def load_columns(self):
+        stats = self.dataset_manager.get_stats()
+        self.x_selector.clear()
+        self.y_selector.clear()
+        self.x_selector.addItems(stats.columns)
+        self.y_selector.addItems(list(stats.numeric))
+        for selector, default in ((self.x_selector, "song_title"), (self.y_selector, "duration")):
+            if selector.findText(default) >= 0:
+                selector.setCurrentText(default)
+
+    def load_visualization(self, quiet=False):
+        if not self.dataset_manager.get_stats().rows:
+            if not quiet:
+                QMessageBox.warning(self, "No Data", "The dataset is currently empty.")
             return
 
-        fig = px.bar(
-            df, x='song_title', y='duration', color='style_prompt',
-            title="Audionomy Dataset: Audio Duration by Song Title"
+        kind = self.kind_selector.currentText()
+        x, y = self.x_selector.currentText(), self.y_selector.currentText()
+        if kind == "histogram":
+            x, y = y, None  # Histograms show the distribution of the numeric column
+        get_scheduler().run_function(
+            get_figure_cache().get_figure_json, self.dataset_manager, kind, x, y,
+            on_result=self.web_view.show_figure,
+            on_error=lambda error: QMessageBox.warning(self, "Error", f"Could not build chart: {error}"),
+            name=f"Plotly {kind}",
+            priority=PRIORITY_INTERACTIVE,
         )
-        temp_html = tempfile.NamedTemporaryFile(delete=False, suffix='.html')
-        fig.write_html(temp_html.name)
-        self.web_view.load(f"file://{temp_html.name}")
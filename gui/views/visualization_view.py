@@ -7,11 +7,15 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 import qtawesome as qta
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import pandas as pd
 import numpy as np
 import os
 
+from scripts.dataset_manager import DatasetManager
+from scripts.chart_data import get_chart_cache
+from scripts.job_scheduler import PRIORITY_INTERACTIVE, get_scheduler
+
 
 class VisualizationWidget(QWidget):
     """Visualization module for dataset insights, statistics, and charts."""
@@ -72,6 +76,7 @@ class VisualizationWidget(QWidget):
         # Custom Chart Canvas
         self.custom_figure, self.custom_ax = plt.subplots(figsize=(10, 6))
         self.custom_canvas = FigureCanvas(self.custom_figure)
+        self.custom_colorbar = None
         custom_layout.addWidget(self.custom_canvas)
 
         self.tabs.addTab(self.custom_tab, "Custom Charts")
@@ -156,59 +161,82 @@ class VisualizationWidget(QWidget):
             return
 
         dataset_path = self.dataset_selector.itemData(index)
-        metadata_path = os.path.join(dataset_path, "metadata.csv")
 
         try:
-            df = pd.read_csv(metadata_path)
-            self.update_overview(df, dataset_path)
-            self.update_custom_chart_options(df)
+            # Stored aggregates make switching datasets independent of their size
+            stats = DatasetManager(dataset_path).get_stats()
+            self.update_overview(stats, dataset_path)
+            self.update_custom_chart_options(stats)
         except Exception as e:
             print(f"Error loading dataset: {e}")
 
-    def update_overview(self, df, dataset_path):
-        """Updates dataset statistics and default charts."""
-        self.total_files_label.setText(f"Total Files: {len(df)}")
+    def update_overview(self, stats, dataset_path):
+        """Updates dataset statistics from the dataset's running aggregates."""
+        self.total_files_label.setText(f"Total Files: {stats.rows}")
 
-        if 'duration' in df.columns:
-            total_duration = df['duration'].sum()
-            avg_duration = df['duration'].mean()
-            self.total_duration_label.setText(f"Total Duration: {int(total_duration // 60)} min")
-            self.avg_duration_label.setText(f"Average Duration: {int(avg_duration)} sec")
+        duration = stats.column("duration")
+        if duration and duration["count"]:
+            median = stats.quantile("duration", 0.5)
+            self.total_duration_label.setText(f"Total Duration: {int(duration['sum'] // 60)} min")
+            self.avg_duration_label.setText(
+                f"Average Duration: {int(duration['mean'])} sec (median {int(median)} sec)")
 
-        if 'file_format' in df.columns:
-            formats = df['file_format'].unique()
+        formats = stats.value_counts("file_format")
+        if formats:
             self.formats_label.setText(f"File Formats: {', '.join(formats)}")
 
-    def update_custom_chart_options(self, df):
+    def update_custom_chart_options(self, stats):
         """Updates available X and Y axis options for custom charts."""
         self.x_axis_selector.clear()
         self.y_axis_selector.clear()
 
-        numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-        self.x_axis_selector.addItems(df.columns)
-        self.y_axis_selector.addItems(numeric_columns)
+        self.x_axis_selector.addItems(stats.columns)
+        self.y_axis_selector.addItems(list(stats.numeric))
 
     def plot_custom_chart(self):
         """Generates a chart based on user-selected options."""
         dataset_path = self.dataset_selector.itemData(self.dataset_selector.currentIndex())
-        metadata_path = os.path.join(dataset_path, "metadata.csv")
+        if not dataset_path:
+            return
 
-        try:
-            df = pd.read_csv(metadata_path)
-            x_col = self.x_axis_selector.currentText()
-            y_col = self.y_axis_selector.currentText()
-            chart_type = self.chart_type_selector.currentText()
-
-            self.custom_ax.clear()
-            if chart_type == "Bar Chart":
-                df.groupby(x_col)[y_col].mean().plot.bar(ax=self.custom_ax, color='#3498db')
-            elif chart_type == "Scatter Plot":
-                df.plot.scatter(x=x_col, y=y_col, ax=self.custom_ax, color='#3498db')
-            elif chart_type == "Line Chart":
-                df.sort_values(x_col).plot.line(x=x_col, y=y_col, ax=self.custom_ax, color='#3498db')
-            elif chart_type == "Pie Chart":
-                df[x_col].value_counts().plot.pie(ax=self.custom_ax, autopct='%1.1f%%')
-
-            self.custom_canvas.draw()
-        except Exception as e:
-            print(f"Error plotting chart: {e}")
+        x_col = self.x_axis_selector.currentText()
+        y_col = self.y_axis_selector.currentText()
+        chart_type = self.chart_type_selector.currentText()
+
+        # Loading and reducing the data happens off the UI thread; repeat plots hit the cache
+        get_scheduler().run_function(
+            get_chart_cache().get_chart, DatasetManager(dataset_path), x_col, y_col, chart_type,
+            on_result=lambda spec: self.draw_chart(spec, x_col, y_col),
+            on_error=lambda error: print(f"Error plotting chart: {error}"),
+            name=f"Chart {chart_type}",
+            priority=PRIORITY_INTERACTIVE,
+        )
+
+    def draw_chart(self, spec, x_col, y_col):
+        """Draws a prepared chart spec; the number of artists is bounded regardless of row count."""
+        ax = self.custom_ax
+        if self.custom_colorbar is not None:
+            self.custom_colorbar.remove()
+            self.custom_colorbar = None
+        ax.clear()
+        kind = spec["kind"]
+
+        if kind == "bar":
+            ax.bar(range(len(spec["values"])), spec["values"], color='#3498db')
+            ax.set_xticks(range(len(spec["labels"])), spec["labels"], rotation=90)
+        elif kind == "scatter":
+            ax.scatter(spec["x"], spec["y"], s=6, color='#3498db')
+        elif kind == "density":
+            image = ax.imshow(np.ma.masked_equal(spec["counts"], 0), origin="lower", aspect="auto",
+                              extent=spec["extent"], norm=LogNorm(), cmap="viridis")
+            ax.set_title(f"Point density ({spec['rows']} rows)")
+            self.custom_colorbar = self.custom_figure.colorbar(image, ax=ax, label="Points")
+        elif kind == "line":
+            ax.plot(spec["x"], spec["y"], color='#3498db', linewidth=0.8)
+        elif kind == "pie":
+            ax.pie(spec["values"], labels=spec["labels"], autopct='%1.1f%%')
+
+        if kind != "pie":
+            ax.set_xlabel(x_col)
+            ax.set_ylabel(y_col)
+        self.custom_canvas.draw_idle()
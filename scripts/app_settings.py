@@ -0,0 +1,42 @@
+# scripts/app_settings.py
+
+from PySide6.QtCore import QSettings
+
+# Display label -> (normalization mode, target level)
+NORMALIZATION_PRESETS = {
+    "Peak (-1 dBFS)": ("peak", -1.0),
+    "Loudness (-14 LUFS)": ("lufs", -14.0),
+    "Loudness (-23 LUFS, EBU R128)": ("lufs", -23.0),
+}
+DEFAULT_NORMALIZATION_PRESET = "Peak (-1 dBFS)"
+
+
+def get_settings():
+    """Returns the shared application settings store."""
+    return QSettings("Audionomy", "Audionomy")
+
+
+def get_cache_limit_bytes(settings=None):
+    """Returns the configured cache budget in bytes."""
+    settings = settings or get_settings()
+    return settings.value("cache_size", 1000, type=int) * 1024 * 1024
+
+
+def get_frame_features_enabled(settings=None):
+    """Returns whether imports also store frame-level features in the dataset's feature store."""
+    settings = settings or get_settings()
+    return settings.value("extract_frame_features", False, type=bool)
+
+
+def get_import_options(settings=None):
+    """Returns the AudioProcessor keyword arguments configured for imports."""
+    settings = settings or get_settings()
+    preset = settings.value("normalization_preset", DEFAULT_NORMALIZATION_PRESET)
+    mode, target_level = NORMALIZATION_PRESETS.get(preset, NORMALIZATION_PRESETS[DEFAULT_NORMALIZATION_PRESET])
+    return {
+        "normalize": settings.value("normalize_on_import", True, type=bool),
+        "target_format": settings.value("default_audio_format", "WAV").lower(),
+        "normalization_mode": mode,
+        "target_level": target_level,
+        "quality": settings.value("audio_quality", "High"),
+    }
@@ -0,0 +1,335 @@
+# scripts/audio_encoder.py
+
+import atexit
+import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+import numpy as np
+import soundfile as sf
+import soxr
+import mutagen
+from scripts.logger import logger
+
+BLOCK_SIZE = 65536  # Frames per streamed block (~1.5 s at 44.1 kHz)
+
+# Targets encoded in-process by soundfile: format -> (container, subtype override)
+LOSSLESS_FORMATS = {"wav": ("WAV", None), "flac": ("FLAC", None), "ogg": ("OGG", "VORBIS")}
+
+# Targets encoded by the ffmpeg worker pool: format -> (codec, muxer)
+LOSSY_FORMATS = {"mp3": ("libmp3lame", "mp3")}
+
+# Audio Quality setting -> encoding parameters (None keeps the source value)
+QUALITY_PRESETS = {
+    "Low": {"bitrate": "96k", "sample_rate": 22050, "channels": 1, "compression_level": 0.8},
+    "Medium": {"bitrate": "160k", "sample_rate": 44100, "channels": None, "compression_level": 0.5},
+    "High": {"bitrate": "320k", "sample_rate": None, "channels": None, "compression_level": 0.2},
+    "Lossless": {"bitrate": "320k", "sample_rate": None, "channels": None, "compression_level": 0.0},
+}
+
+
+def downmix_matrix(source_channels, channels):
+    """Returns a (source, target) gain matrix folding extra channels into the target layout.
+
+    Sources are taken in WAV order: quad is L, R, Ls, Rs; 3.0 and 5.0 are
+    L, R, C, then surrounds; 5.1 and 7.1 are L, R, C, LFE, then surrounds.
+    Centre and surround channels are mixed in at -3 dB, the LFE is
+    dropped, and each output is scaled down if its gains sum above one so
+    the mix cannot clip.
+    """
+    matrix = np.zeros((source_channels, channels))
+    if channels == 2 and source_channels in (3, 5, 6, 8):
+        matrix[0, 0] = matrix[1, 1] = 1.0
+        matrix[2, :] = 0.707  # Centre to both sides
+        first_surround = 4 if source_channels >= 6 else 3  # Row 3 of 5.1/7.1 is the LFE and stays zero
+        for ch in range(first_surround, source_channels):
+            matrix[ch, (ch - first_surround) % 2] = 0.707
+    else:
+        for ch in range(source_channels):
+            matrix[ch, ch % channels] = 1.0 if ch < channels else 0.707
+    totals = matrix.sum(axis=0)
+    return matrix / np.maximum(totals, 1.0)
+
+
+def remix(block, channels):
+    """Converts a (frames, channels) block to the requested channel count."""
+    source_channels = block.shape[1]
+    if source_channels == channels:
+        return block
+    if channels == 1:
+        return block.mean(axis=1, keepdims=True)
+    if source_channels == 1:
+        return np.repeat(block, channels, axis=1)
+    if source_channels > channels:
+        return (block @ downmix_matrix(source_channels, channels)).astype(block.dtype, copy=False)
+    return np.pad(block, ((0, 0), (0, channels - source_channels)))
+
+
+class BlockStream:
+    """Re-iterable stream of decoded float32 (frames, channels) blocks from an audio file."""
+
+    def __init__(self, file_path, block_size=BLOCK_SIZE, ffmpeg_binary=None):
+        self.file_path = file_path
+        self.block_size = block_size
+        self.ffmpeg = ffmpeg_binary or shutil.which("ffmpeg") or "ffmpeg"
+
+        try:
+            info = sf.info(file_path)
+            self.sample_rate = info.samplerate
+            self.channels = info.channels
+            self.subtype = info.subtype
+            self.native = True
+        except RuntimeError:
+            # Formats libsndfile cannot read are decoded through an ffmpeg pipe;
+            # the stream layout comes from the container header via mutagen.
+            parsed = mutagen.File(file_path)
+            if parsed is None:
+                raise ValueError(f"Unsupported or unrecognized audio format: {file_path}")
+            info = parsed.info
+            self.sample_rate = info.sample_rate
+            self.channels = info.channels
+            self.subtype = None
+            self.native = False
+
+    def __iter__(self):
+        if self.native:
+            with sf.SoundFile(self.file_path) as src:
+                yield from src.blocks(blocksize=self.block_size, dtype="float32", always_2d=True)
+            return
+
+        cmd = [
+            self.ffmpeg, "-hide_banner", "-loglevel", "error", "-i", self.file_path,
+            "-f", "f32le", "-ac", str(self.channels), "-ar", str(self.sample_rate), "pipe:1",
+        ]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        frame_bytes = 4 * self.channels
+        try:
+            while True:
+                chunk = proc.stdout.read(self.block_size * frame_bytes)
+                if not chunk:
+                    break
+                usable = len(chunk) - len(chunk) % frame_bytes
+                yield np.frombuffer(chunk[:usable], dtype="<f4").reshape(-1, self.channels).copy()
+        finally:
+            proc.stdout.close()
+            if proc.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to decode {self.file_path}")
+
+
+class FfmpegWorkerPool:
+    """Keeps warm ffmpeg encoder processes, fed raw PCM over pipes, ready for lossy conversions.
+
+    ffmpeg finalizes its output container when stdin closes, so each process
+    encodes one file. The pool hides the spawn cost by keeping processes
+    pre-started per parameter set and replacing them in the background as
+    they are consumed.
+    """
+
+    def __init__(self, warm_per_key=2, max_keys=4, ffmpeg_binary=None):
+        self.warm_per_key = warm_per_key
+        self.max_keys = max_keys
+        self.ffmpeg = ffmpeg_binary or shutil.which("ffmpeg") or "ffmpeg"
+        self.warm = OrderedDict()  # key -> list of idle processes
+        self.refilling = set()     # Keys with a refill thread running
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def _spawn(self, key):
+        codec, muxer, in_rate, in_channels, out_rate, out_channels, bitrate = key
+        cmd = [
+            self.ffmpeg, "-hide_banner", "-loglevel", "error",
+            "-f", "f32le", "-ar", str(in_rate), "-ac", str(in_channels), "-i", "pipe:0",
+            "-c:a", codec, "-ar", str(out_rate), "-ac", str(out_channels),
+        ]
+        if bitrate:
+            cmd += ["-b:a", bitrate]
+        cmd += ["-f", muxer, "pipe:1"]
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def _acquire(self, key):
+        """Returns an idle process for the key, spawning one only if none is warm."""
+        proc = None
+        with self.lock:
+            idle = self.warm.setdefault(key, [])
+            self.warm.move_to_end(key)
+            while idle and proc is None:
+                candidate = idle.pop()
+                if candidate.poll() is None:
+                    proc = candidate
+            self._evict_locked()
+
+        threading.Thread(target=self._refill, args=(key,), daemon=True).start()
+        return proc or self._spawn(key)
+
+    def _refill(self, key):
+        """Tops up the warm processes for a key in the background.
+
+        Only one refill runs per key, so concurrent acquires cannot spawn
+        past warm_per_key; the running one re-checks the count after each
+        spawn and also covers processes taken meanwhile.
+        """
+        with self.lock:
+            if key in self.refilling:
+                return
+            self.refilling.add(key)
+        while True:
+            with self.lock:
+                if self.closed or key not in self.warm or len(self.warm[key]) >= self.warm_per_key:
+                    self.refilling.discard(key)
+                    return
+            try:
+                proc = self._spawn(key)
+            except OSError as e:
+                logger.warning(f"Could not start a warm ffmpeg encoder: {e}")
+                with self.lock:
+                    self.refilling.discard(key)
+                return
+            with self.lock:
+                if self.closed or key not in self.warm:
+                    proc.kill()
+                    self.refilling.discard(key)
+                    return
+                self.warm[key].append(proc)
+
+    def _evict_locked(self):
+        while len(self.warm) > self.max_keys:
+            _, idle = self.warm.popitem(last=False)
+            for proc in idle:
+                proc.kill()
+
+    def encode(self, blocks, in_rate, in_channels, output_path, codec, muxer, out_rate, out_channels, bitrate=None):
+        """Streams float32 blocks through a warm encoder into output_path.
+
+        If anything fails (including decoding the blocks), the ffmpeg process
+        is killed and the .part output removed.
+        """
+        proc = self._acquire((codec, muxer, in_rate, in_channels, out_rate, out_channels, bitrate))
+        tmp_path = f"{output_path}.part"
+
+        try:
+            with open(tmp_path, "wb") as out:
+                reader = threading.Thread(target=shutil.copyfileobj, args=(proc.stdout, out), daemon=True)
+                reader.start()
+                try:
+                    for block in blocks:
+                        proc.stdin.write(np.ascontiguousarray(block, dtype="<f4").tobytes())
+                except BrokenPipeError:
+                    pass  # ffmpeg exited early; its return code below carries the error
+                except BaseException:
+                    proc.kill()  # Don't let ffmpeg finalize a file from half the input
+                    raise
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                    reader.join()
+                    returncode = proc.wait()
+
+            if returncode != 0:
+                error = proc.stderr.read().decode(errors="replace").strip()
+                raise RuntimeError(f"ffmpeg exited with code {returncode}: {error}")
+            os.replace(tmp_path, output_path)
+            return output_path
+        except BaseException:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        finally:
+            proc.stdout.close()
+            proc.stderr.close()
+
+    def shutdown(self):
+        """Kills every idle worker."""
+        with self.lock:
+            self.closed = True
+            for idle in self.warm.values():
+                for proc in idle:
+                    proc.kill()
+            self.warm.clear()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_ffmpeg_pool():
+    """Returns the process-wide ffmpeg worker pool, creating it on first use."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = FfmpegWorkerPool()
+            atexit.register(_shared_pool.shutdown)
+        return _shared_pool
+
+
+class AudioEncoder:
+    """Encodes decoded audio in-process (lossless) or through the ffmpeg pool (lossy)."""
+
+    def __init__(self, quality="High", pool=None):
+        self.quality = quality if quality in QUALITY_PRESETS else "High"
+        self.options = QUALITY_PRESETS[self.quality]
+        self.pool = pool
+
+    def output_layout(self, sample_rate, channels):
+        """Returns the (sample_rate, channels) the quality preset produces for a source."""
+        return self.options["sample_rate"] or sample_rate, self.options["channels"] or channels
+
+    def encode_file(self, file_path, output_path, target_format):
+        """Decodes a file and encodes it to the target format."""
+        stream = BlockStream(file_path)
+        return self.encode_blocks(stream, stream.sample_rate, stream.channels, output_path, target_format, stream.subtype)
+
+    def encode_blocks(self, blocks, sample_rate, channels, output_path, target_format, source_subtype=None):
+        """Encodes an iterable of float32 (frames, channels) blocks to output_path."""
+        target_format = target_format.lower()
+        out_rate, out_channels = self.output_layout(sample_rate, channels)
+
+        if target_format in LOSSLESS_FORMATS:
+            return self._encode_lossless(blocks, sample_rate, out_rate, out_channels, output_path, target_format, source_subtype)
+        if target_format in LOSSY_FORMATS:
+            codec, muxer = LOSSY_FORMATS[target_format]
+            pool = self.pool or get_ffmpeg_pool()
+            return pool.encode(blocks, sample_rate, channels, output_path, codec, muxer, out_rate, out_channels, self.options["bitrate"])
+        raise ValueError(f"Unsupported format: {target_format}")
+
+    def _encode_lossless(self, blocks, in_rate, out_rate, out_channels, output_path, target_format, source_subtype):
+        container, subtype = LOSSLESS_FORMATS[target_format]
+        if subtype is None:
+            keep_source = source_subtype and out_rate == in_rate and sf.check_format(container, source_subtype)
+            subtype = source_subtype if keep_source else sf.default_subtype(container)
+
+        extra = {}
+        if container == "OGG":
+            extra["compression_level"] = self.options["compression_level"]
+
+        resampler = None
+        if out_rate != in_rate:
+            resampler = soxr.ResampleStream(in_rate, out_rate, out_channels, dtype="float32")
+
+        tmp_path = f"{output_path}.part"
+        try:
+            with sf.SoundFile(tmp_path, "w", samplerate=out_rate, channels=out_channels,
+                              format=container, subtype=subtype, **extra) as dst:
+                for block in blocks:
+                    block = remix(block, out_channels)
+                    if resampler is not None:
+                        block = resampler.resample_chunk(np.ascontiguousarray(block, dtype=np.float32))
+                    dst.write(block)
+                if resampler is not None:
+                    dst.write(resampler.resample_chunk(np.zeros((0, out_channels), dtype=np.float32), last=True))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        os.replace(tmp_path, output_path)
+        logger.debug(f"Encoded {output_path} in-process ({container}/{subtype}, {out_rate} Hz, {out_channels} ch)")
+        return output_path
@@ -5,24 +5,41 @@ import numpy as np
 import librosa
 import librosa.display
 import soundfile as sf
-import matplotlib.pyplot as plt
+import soxr
+from matplotlib.figure import Figure
 from pydub import AudioSegment
 import mutagen
 from mutagen.mp3 import MP3
 from mutagen.flac import FLAC
 from mutagen.oggvorbis import OggVorbis
-from PySide6.QtCore import QThread, Signal
+from PySide6.QtCore import Signal
+from scripts.audio_encoder import AudioEncoder, BlockStream, LOSSY_FORMATS
+from scripts.normalization import StreamingNormalizer
+from scripts.job_scheduler import ScheduledTask, PRIORITY_BATCH
+from scripts.app_settings import get_cache_limit_bytes
+from scripts.spectrogram_cache import get_spectrogram_cache
+from scripts.fingerprint import fingerprint_audio
+from scripts.embeddings import clip_embedding
+from scripts.feature_store import frame_features, HOP_LENGTH
 from scripts.logger import logger
 
+ANALYSIS_RATE = 22050          # Mono rate kept for fingerprints, embeddings and frame features
+ANALYSIS_SECONDS = 600         # Fingerprints and embeddings only look at the first ten minutes
+FEATURE_BLOCK = HOP_LENGTH * 256  # Analysis samples per frame-feature block
+
 
 class AudioProcessor:
     """Handles audio feature extraction, normalization, format conversion, and visualization."""
 
     SUPPORTED_FORMATS = ["wav", "mp3", "flac", "ogg"]
 
-    def __init__(self, normalize=False, target_format="wav"):
+    def __init__(self, normalize=False, target_format="wav", normalization_mode="peak", target_level=None, quality="High", cache=None, frame_features=False):
         self.normalize = normalize
+        self.frame_features = frame_features
         self.target_format = target_format.lower()
+        self.normalizer = StreamingNormalizer(mode=normalization_mode, target_level=target_level)
+        self.encoder = AudioEncoder(quality=quality)
+        self.cache = cache
 
     def process_audio_file(self, file_path, output_dir=None):
         """Processes a single audio file: extracts features, normalizes, and converts format."""
@@ -32,15 +49,26 @@ class AudioProcessor:
 
         try:
             logger.info(f"Processing audio file: {file_path}")
-            audio, sr = librosa.load(file_path, sr=None)
-            metadata = self.extract_metadata(file_path, audio, sr)
-
-            if self.normalize:
-                audio = self.normalize_audio(audio)
-                logger.debug(f"Audio normalized: {file_path}")
+            analysis = self.analyze_stream(file_path)
+            metadata = self.extract_metadata(file_path, self.probe(file_path), analysis)
+            try:
+                # Fingerprint from the samples already decoded here rather than decoding again later
+                metadata["fingerprint"] = fingerprint_audio(analysis["signal"], ANALYSIS_RATE)
+                metadata["embedding"] = clip_embedding(analysis["signal"], ANALYSIS_RATE)
+            except Exception as e:
+                logger.warning(f"Could not fingerprint or embed {file_path}: {e}")
+            if analysis["frame_features"] is not None:
+                metadata["frame_features"] = analysis["frame_features"]
+            del analysis
 
             converted_path = file_path
-            if self.target_format and self.get_file_extension(file_path) != self.target_format:
+            if self.normalize:
+                target_format = self.target_format or self.get_file_extension(file_path)
+                converted_path = self.get_output_path(file_path, target_format, output_dir)
+                extra = self._transcode(file_path, converted_path, target_format, normalized=True)
+                metadata["normalization_gain"] = extra.get("normalization_gain")
+                logger.debug(f"Audio normalized: {file_path} -> {converted_path}")
+            elif self.target_format and self.get_file_extension(file_path) != self.target_format:
                 converted_path = self.convert_audio(file_path, self.target_format, output_dir)
                 logger.info(f"Converted {file_path} to {converted_path}")
 
@@ -49,27 +77,114 @@ class AudioProcessor:
             logger.error(f"Error processing {file_path}: {e}")
             return None, None
 
-    def extract_metadata(self, file_path, audio, sr):
-        """Extracts audio metadata including pitch, tempo, loudness, and tags."""
-        duration = librosa.get_duration(y=audio, sr=sr)
-        tempo, _ = librosa.beat.beat_track(y=audio, sr=sr)
-        pitch = librosa.yin(audio, fmin=50, fmax=5000, sr=sr)
-        avg_pitch = np.mean(pitch) if len(pitch) > 0 else None
-
-        # Extract metadata using Mutagen
-        mutagen_data = self.extract_metadata_tags(file_path)
-
+    def probe(self, file_path):
+        """Reads duration and stream layout from the file header without decoding the audio."""
+        try:
+            info = sf.info(file_path)
+            duration, sample_rate, channels = info.duration, info.samplerate, info.channels
+        except RuntimeError:
+            parsed = mutagen.File(file_path)
+            if parsed is None:
+                raise ValueError(f"Unsupported or unrecognized audio format: {file_path}")
+            info = parsed.info
+            duration = info.length
+            sample_rate = getattr(info, "sample_rate", None)
+            channels = getattr(info, "channels", None)
 
         return {
             "filename": os.path.basename(file_path),
             "duration": round(duration, 2),
+            "sample_rate": sample_rate,
+            "channels": channels,
+            "file_format": self.get_file_extension(file_path),
+        }
+
+    def analyze_stream(self, file_path):
+        """Computes the analysis features of a file from streamed blocks.
+
+        Only the onset envelope, running sums and a mono ANALYSIS_RATE copy
+        of the first ANALYSIS_SECONDS (for fingerprints and embeddings) are
+        kept, so memory does not grow with the clip's length. Frame features,
+        when enabled, are computed per FEATURE_BLOCK of that signal.
+        """
+        stream = BlockStream(file_path)
+        sr = stream.sample_rate
+        resampler = soxr.ResampleStream(sr, ANALYSIS_RATE, 1, dtype="float32")
+        capacity = ANALYSIS_SECONDS * ANALYSIS_RATE
+        signal, kept = [], 0
+        onsets, pitch_sum, pitch_frames, energy, count = [], 0.0, 0, 0.0, 0
+        features = {} if self.frame_features else None
+        pending = np.zeros(0, dtype=np.float32)
+
+        def add_features(samples, final=False):
+            nonlocal features
+            if features is None or not len(samples):
+                return
+            try:
+                block = frame_features(samples, ANALYSIS_RATE)
+            except Exception as e:
+                logger.warning(f"Could not extract frame features for {file_path}: {e}")
+                features = None
+                return
+            # Centered frames overhang the block end; keep one frame per hop except at the end of the clip
+            frames = None if final else len(samples) // HOP_LENGTH
+            for kind, values in block.items():
+                features.setdefault(kind, []).append(values[:frames])
+
+        for block in stream:
+            mono = block.mean(axis=1)
+            energy += float(np.dot(mono, mono))
+            count += len(mono)
+            if len(mono) >= 2048:
+                onsets.append(librosa.onset.onset_strength(y=mono, sr=sr))
+                pitch = librosa.yin(mono, fmin=50, fmax=5000, sr=sr)
+                pitch_sum += float(pitch.sum())
+                pitch_frames += len(pitch)
+
+            resampled = resampler.resample_chunk(mono)
+            if kept < capacity:
+                signal.append(resampled[:capacity - kept])
+                kept += len(signal[-1])
+            if features is not None:
+                pending = np.concatenate([pending, resampled])
+                while len(pending) >= 2 * FEATURE_BLOCK:
+                    add_features(pending[:FEATURE_BLOCK])
+                    pending = pending[FEATURE_BLOCK:]
+
+        resampled = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        if kept < capacity:
+            signal.append(resampled[:capacity - kept])
+        if features is not None:
+            add_features(np.concatenate([pending, resampled]), final=True)
+
+        tempo = None
+        if onsets:
+            tempo, _ = librosa.beat.beat_track(onset_envelope=np.concatenate(onsets), sr=sr)
+            tempo = float(np.atleast_1d(tempo)[0])
+        rms = np.sqrt(energy / count) if count else 0
+        return {
             "sample_rate": sr,
-            "tempo": round(tempo, 2),
-            "pitch": round(avg_pitch, 2) if avg_pitch else None,
+            "tempo": tempo,
+            "pitch": pitch_sum / pitch_frames if pitch_frames else None,
+            "loudness": 20 * np.log10(rms) if rms > 0 else None,
+            "signal": np.concatenate(signal) if signal else np.zeros(0, dtype=np.float32),
+            "frame_features": {kind: np.concatenate(values) for kind, values in features.items()} if features else None,
+        }
+
+    def extract_metadata(self, file_path, info, analysis):
+        """Builds the metadata row from the header probe, streamed analysis and Mutagen tags."""
+        mutagen_data = self.extract_metadata_tags(file_path)
+
+        return {
+            "filename": os.path.basename(file_path),
+            "duration": info["duration"],
+            "sample_rate": analysis["sample_rate"],
+            "tempo": round(analysis["tempo"], 2) if analysis["tempo"] is not None else None,
+            "pitch": round(analysis["pitch"], 2) if analysis["pitch"] else None,
             "bit_depth": self.get_bit_depth(file_path),
-            "channels": self.get_channels(file_path),
+            "channels": info["channels"],
             "file_format": self.get_file_extension(file_path),
-            "loudness": round(loudness, 2) if loudness else None,
+            "loudness": round(analysis["loudness"], 2) if analysis["loudness"] else None,
             "artist": mutagen_data.get("artist", ""),
             "album": mutagen_data.get("album", ""),
             "title": mutagen_data.get("title", ""),
@@ -96,59 +211,123 @@ class AudioProcessor:
             logger.warning(f"Failed to extract metadata tags for {file_path}: {e}")
             return {}
 
+    def get_file_extension(self, file_path):
+        """Returns the lowercase file extension without the dot."""
+        return os.path.splitext(file_path)[1].lstrip(".").lower()
+
+    def get_channels(self, file_path):
+        """Returns the channel count from the file header."""
+        try:
+            return sf.info(file_path).channels
+        except RuntimeError:
+            return AudioSegment.from_file(file_path).channels
+
+    def get_bit_depth(self, file_path):
+        """Returns the PCM bit depth from the file header, or None for compressed formats."""
+        try:
+            subtype = sf.info(file_path).subtype
+        except RuntimeError:
+            return None
+        bit_depths = {"PCM_S8": 8, "PCM_U8": 8, "PCM_16": 16, "PCM_24": 24, "PCM_32": 32, "FLOAT": 32, "DOUBLE": 64}
+        return bit_depths.get(subtype)
+
     def generate_waveform(self, file_path, output_path):
         """Generates and saves a waveform plot of the audio file."""
         audio, sr = librosa.load(file_path, sr=None)
-        plt.figure(figsize=(10, 4))
-        librosa.display.waveshow(audio, sr=sr, alpha=0.8)
-        plt.title("Waveform")
-        plt.xlabel("Time (s)")
-        plt.ylabel("Amplitude")
-        plt.savefig(output_path)
-        plt.close()
+        # Object-oriented Agg figures keep no global pyplot state, so this is safe off the main thread
+        figure = Figure(figsize=(10, 4))
+        ax = figure.add_subplot()
+        librosa.display.waveshow(audio, sr=sr, alpha=0.8, ax=ax)
+        ax.set_title("Waveform")
+        ax.set_xlabel("Time (s)")
+        ax.set_ylabel("Amplitude")
+        figure.savefig(output_path)
 
     def generate_spectrogram(self, file_path, output_path):
-        """Generates and saves a spectrogram of the audio file."""
-        audio, sr = librosa.load(file_path, sr=None)
-        spectrogram = librosa.feature.melspectrogram(y=audio, sr=sr)
-        log_spectrogram = librosa.power_to_db(spectrogram, ref=np.max)
+        """Generates and saves a spectrogram of the audio file from the shared tile cache."""
+        log_spectrogram, info = get_spectrogram_cache(get_cache_limit_bytes()).read(file_path)
+        log_spectrogram = log_spectrogram.astype(np.float32) - log_spectrogram.max()
 
-        plt.figure(figsize=(10, 4))
-        librosa.display.specshow(log_spectrogram, sr=sr, x_axis="time", y_axis="mel")
-        plt.title("Spectrogram")
-        plt.colorbar(format="%+2.0f dB")
-        plt.savefig(output_path)
-        plt.close()
+        figure = Figure(figsize=(10, 4))
+        ax = figure.add_subplot()
+        image = librosa.display.specshow(log_spectrogram, sr=info["sample_rate"], hop_length=info["hop_length"], x_axis="time", y_axis="mel", ax=ax)
+        ax.set_title("Spectrogram")
+        figure.colorbar(image, ax=ax, format="%+2.0f dB")
+        figure.savefig(output_path)
 
     def normalize_audio(self, audio):
-        """Normalizes an audio signal to a target peak level."""
+        """Normalizes an in-memory audio signal to a target peak level."""
         return librosa.util.normalize(audio)
 
+    def get_output_path(self, file_path, target_format, output_dir=None):
+        """Builds the output path for a processed file without ever overwriting the source."""
+        output_dir = output_dir or os.path.dirname(file_path)
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        output_path = os.path.join(output_dir, f"{stem}.{target_format}")
+        if os.path.abspath(output_path) == os.path.abspath(file_path):
+            output_path = os.path.join(output_dir, f"{stem}_normalized.{target_format}")
+        return output_path
+
     def convert_audio(self, file_path, target_format, output_dir=None):
-        """Converts audio to the specified format."""
+        """Converts audio to the specified format.
+
+        Lossless targets are encoded in-process with soundfile; lossy targets
+        are piped through the shared pool of warm ffmpeg encoders.
+        """
         if target_format not in self.SUPPORTED_FORMATS:
             raise ValueError(f"Unsupported format: {target_format}")
 
-        output_dir = output_dir or os.path.dirname(file_path)
-        output_filename = f"{os.path.splitext(os.path.basename(file_path))[0]}.{target_format}"
-        output_path = os.path.join(output_dir, output_filename)
-
-        audio = AudioSegment.from_file(file_path)
-        audio.export(output_path, format=target_format)
+        output_path = self.get_output_path(file_path, target_format, output_dir)
+        self._transcode(file_path, output_path, target_format, normalized=False)
         return output_path
 
+    def transcode_params(self, target_format, normalized):
+        """Returns every parameter that determines the encoded output, used as the cache key."""
+        options = self.encoder.options
+        return {
+            "target_format": target_format,
+            "sample_rate": options["sample_rate"],
+            "channels": options["channels"],
+            "bitrate": options["bitrate"] if target_format in LOSSY_FORMATS else None,
+            "compression_level": options["compression_level"] if target_format == "ogg" else None,
+            "normalization": [self.normalizer.mode, self.normalizer.target_level] if normalized else None,
+        }
+
+    def _transcode(self, file_path, output_path, target_format, normalized):
+        """Encodes (and optionally normalizes) a file, reusing a cached result when one exists."""
+        def produce(path):
+            if normalized:
+                _, measurement = self.normalizer.normalize_file(file_path, path, target_format, encoder=self.encoder)
+                return {"normalization_gain": round(measurement["gain_db"], 2)}
+            self.encoder.encode_file(file_path, path, target_format)
+            return {}
+
+        if self.cache is None:
+            return produce(output_path)
+        extra, _ = self.cache.transcode(file_path, output_path, self.transcode_params(target_format, normalized), produce)
+        return extra
 
-class AudioProcessingWorker(QThread):
-    """Handles batch audio processing in a separate thread."""
 
-    progress_updated = Signal(int)
+class AudioProcessingWorker(ScheduledTask):
+    """Handles batch audio processing as a background scheduler task."""
+
     processing_complete = Signal(list)
 
-    def __init__(self, file_paths, output_dir, normalize=True, target_format="wav"):
+    name = "Audio processing"
+    priority = PRIORITY_BATCH
+
+    def __init__(self, file_paths, output_dir, normalize=True, target_format="wav", normalization_mode="peak", target_level=None, quality="High", cache=None):
         super().__init__()
         self.file_paths = file_paths
         self.output_dir = output_dir
-        self.processor = AudioProcessor(normalize=normalize, target_format=target_format)
+        self.processor = AudioProcessor(
+            normalize=normalize,
+            target_format=target_format,
+            normalization_mode=normalization_mode,
+            target_level=target_level,
+            quality=quality,
+            cache=cache,
+        )
 
     def run(self):
         """Processes audio files in batch mode with threading."""
@@ -156,6 +335,8 @@ class AudioProcessingWorker(QThread):
         total_files = len(self.file_paths)
 
         for i, file_path in enumerate(self.file_paths):
+            if self.cancel_requested:
+                break
             try:
                 metadata, converted_path = self.processor.process_audio_file(file_path, self.output_dir)
                 results.append({"metadata": metadata, "converted_path": converted_path})
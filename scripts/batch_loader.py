@@ -0,0 +1,191 @@
+# scripts/batch_loader.py
+
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import librosa
+from scripts.integrity import row_files
+from scripts.logger import logger
+
+CROP_MODES = ["start", "center", "random"]
+
+
+def decode_clip(path, sample_rate):
+    """Decodes a whole file to mono float32 at sample_rate."""
+    samples, _ = librosa.load(path, sr=sample_rate, mono=True)
+    return samples.astype(np.float32, copy=False)
+
+
+def fit_length(samples, length, crop="start", rng=None):
+    """Crops or zero-pads samples to exactly length values."""
+    if len(samples) < length:
+        return np.pad(samples, (0, length - len(samples)))
+    if crop == "center":
+        start = (len(samples) - length) // 2
+    elif crop == "random":
+        start = int(rng.integers(0, len(samples) - length + 1))
+    else:
+        start = 0
+    return samples[start:start + length]
+
+
+class DecodedClipCache:
+    """Thread-safe LRU of decoded clips bounded by total bytes.
+
+    Keys include the file's size and mtime and the sample rate, so an edited
+    file or a different rate never returns stale audio.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            samples = self.entries.get(key)
+            if samples is not None:
+                self.entries.move_to_end(key)
+            return samples
+
+    def put(self, key, samples):
+        if samples.nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = samples
+            self.total_bytes += samples.nbytes
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+
+
+class BatchIterator:
+    """Iterates a dataset as fixed-shape batches of decoded audio plus metadata rows.
+
+    Each epoch the rows with audio are permuted with a generator seeded by
+    (seed, epoch), so every process sees the same order, then split so rank
+    r of world_size takes every world_size-th row of an equal-length prefix
+    (all ranks yield the same number of batches). Clips are decoded and
+    resampled on a thread pool (the decoders and resampler release the GIL)
+    that runs up to prefetch batches ahead of the consumer.
+
+    Each batch is a dict with "audio" (batch, samples) float32, "valid"
+    (False where decoding failed and the row is silence), "rows" (positions
+    in metadata.csv) and "metadata" (a list of row dicts).
+    """
+
+    def __init__(self, dataset_manager, batch_size=32, sample_rate=16000, clip_seconds=5.0, shuffle=True,
+                 seed=0, rank=0, world_size=1, num_workers=4, prefetch=2, cache_bytes=0, crop="start",
+                 drop_last=False, columns=None):
+        if not 0 <= rank < world_size:
+            raise ValueError(f"rank must be in [0, {world_size}), got {rank}")
+        if crop not in CROP_MODES:
+            raise ValueError(f"crop must be one of {CROP_MODES}, got {crop}")
+
+        self.dataset_manager = dataset_manager
+        self.batch_size = batch_size
+        self.sample_rate = sample_rate
+        self.clip_length = int(round(clip_seconds * sample_rate))
+        self.shuffle = shuffle
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.num_workers = num_workers
+        self.prefetch = max(1, prefetch)
+        self.crop = crop
+        self.drop_last = drop_last
+        self.cache = DecodedClipCache(cache_bytes) if cache_bytes else None
+        self.epoch = 0
+
+        metadata = dataset_manager.get_metadata()
+        names = row_files(metadata)
+        df = metadata[list(columns)] if columns is not None else metadata
+        self.rows = np.array([row for row, name in enumerate(names) if name], dtype=np.int64)
+        self.paths = {row: os.path.join(dataset_manager.audio_dir, names[row]) for row in self.rows}
+        self.records = df.astype(object).where(df.notna(), None).to_dict("records")
+
+    def set_epoch(self, epoch):
+        """Selects the epoch whose shuffle order the next iteration uses (a full pass advances it by one)."""
+        self.epoch = epoch
+
+    def shard(self):
+        """Returns this rank's row positions for the current epoch, in iteration order."""
+        rows = self.rows
+        if self.shuffle:
+            rows = rows[np.random.default_rng([self.seed, self.epoch]).permutation(len(rows))]
+        usable = len(rows) - len(rows) % self.world_size
+        return rows[:usable][self.rank::self.world_size]
+
+    def __len__(self):
+        count = len(self.rows) // self.world_size
+        return count // self.batch_size if self.drop_last else -(-count // self.batch_size)
+
+    def _load(self, row, rng):
+        path = self.paths[row]
+        try:
+            key = None
+            samples = None
+            if self.cache is not None:
+                stat = os.stat(path)
+                key = (path, stat.st_size, stat.st_mtime_ns, self.sample_rate)
+                samples = self.cache.get(key)
+            if samples is None:
+                samples = decode_clip(path, self.sample_rate)
+                if key is not None:
+                    self.cache.put(key, samples)
+            return fit_length(samples, self.clip_length, self.crop, rng), True
+        except Exception as e:
+            logger.warning(f"Could not decode {path}: {e}")
+            return np.zeros(self.clip_length, dtype=np.float32), False
+
+    def _batch(self, rows, futures):
+        audio = np.empty((len(rows), self.clip_length), dtype=np.float32)
+        valid = np.empty(len(rows), dtype=bool)
+        for i, future in enumerate(futures):
+            audio[i], valid[i] = future.result()
+        return {
+            "audio": audio,
+            "valid": valid,
+            "rows": rows,
+            "metadata": [self.records[row] for row in rows],
+        }
+
+    def __iter__(self):
+        rows = self.shard()
+        batches = [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+        if self.drop_last and batches and len(batches[-1]) < self.batch_size:
+            batches.pop()
+        # Random crops get their own generator per clip so results do not depend on worker timing
+        crop_seed = [self.seed, self.epoch]
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+            in_flight = deque()
+            pending = iter(batches)
+
+            def submit_next():
+                batch_rows = next(pending, None)
+                if batch_rows is not None:
+                    futures = [
+                        pool.submit(self._load, int(row), np.random.default_rng(crop_seed + [int(row)]))
+                        for row in batch_rows
+                    ]
+                    in_flight.append((batch_rows, futures))
+
+            for _ in range(self.prefetch):
+                submit_next()
+            try:
+                while in_flight:
+                    batch_rows, futures = in_flight.popleft()
+                    submit_next()  # Keep prefetch batches decoding while this one is consumed
+                    yield self._batch(batch_rows, futures)
+            finally:
+                # Abandoned iteration: drop queued decodes instead of finishing them
+                for _, futures in in_flight:
+                    for future in futures:
+                        future.cancel()
+        self.epoch += 1
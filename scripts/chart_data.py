@@ -0,0 +1,150 @@
+# scripts/chart_data.py
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from scripts.dataset_lock import read_generation
+from scripts.logger import logger
+
+SCATTER_DENSITY_THRESHOLD = 20000  # Above this many points scatters become 2D density images
+DENSITY_BINS = (400, 300)
+LINE_BUCKETS = 2000                # Min/max pairs kept per line chart
+MAX_CATEGORIES = 50                # Bars or pie slices before the rest are folded together
+MAX_DATASETS = 4                   # DataFrames kept in memory
+MAX_SPECS = 64                     # Prepared chart specs kept in memory
+
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    """Bins points into a 2D count grid with one vectorized histogram2d call."""
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    return {"kind": "density", "counts": counts.T, "extent": [x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]]}
+
+
+def minmax_decimate(x, y, buckets=LINE_BUCKETS):
+    """Reduces a line to the min and max point of each x bucket, keeping every visible peak."""
+    order = np.argsort(x, kind="stable")
+    x, y = x[order], y[order]
+    if len(x) <= 2 * buckets:
+        return x, y
+
+    starts = np.linspace(0, len(x), buckets + 1, dtype=np.int64)[:-1]
+    lengths = np.diff(np.append(starts, len(x)))
+    bucket_ids = np.repeat(np.arange(buckets), lengths)
+    # Position of each bucket's min and max within the sorted arrays
+    order_in_bucket = np.lexsort((y, bucket_ids))
+    first = order_in_bucket[starts]
+    last = order_in_bucket[starts + lengths - 1]
+    picks = np.sort(np.concatenate([first, last]))
+    return x[picks], y[picks]
+
+
+def _fold_categories(counts):
+    """Keeps the largest categories and folds the rest into "Other"."""
+    if len(counts) <= MAX_CATEGORIES:
+        return counts
+    top = counts.nlargest(MAX_CATEGORIES - 1)
+    return pd.concat([top, pd.Series({"Other": counts.drop(top.index).sum()})])
+
+
+def prepare_chart(df, x_col, y_col, chart_type):
+    """Reduces a DataFrame to what a chart actually draws, in time bounded by one vectorized pass."""
+    if chart_type == "Pie Chart":
+        counts = _fold_categories(df[x_col].astype(str).value_counts())
+        return {"kind": "pie", "labels": counts.index.tolist(), "values": counts.to_numpy()}
+
+    y = pd.to_numeric(df[y_col], errors="coerce")
+
+    if chart_type == "Bar Chart":
+        x = df[x_col]
+        if pd.api.types.is_numeric_dtype(x) and x.nunique() > MAX_CATEGORIES:
+            # Many distinct numeric x values: mean of y per x bin instead of one bar per value
+            valid = x.notna() & y.notna()
+            edges = np.histogram_bin_edges(x[valid], bins=MAX_CATEGORIES)
+            sums, _ = np.histogram(x[valid], bins=edges, weights=y[valid])
+            counts, _ = np.histogram(x[valid], bins=edges)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = sums / counts
+            labels = [f"{edges[i]:.3g}" for i in range(len(edges) - 1)]
+            return {"kind": "bar", "labels": labels, "values": means}
+        grouped = y.groupby(x.astype(str)).agg(["mean", "size"])
+        if len(grouped) > MAX_CATEGORIES:
+            grouped = grouped.nlargest(MAX_CATEGORIES, "size")
+        return {"kind": "bar", "labels": grouped.index.tolist(), "values": grouped["mean"].to_numpy()}
+
+    x = pd.to_numeric(df[x_col], errors="coerce")
+    if x.isna().all() and df[x_col].notna().any():
+        # Text x axis: plot against category codes in first-seen order
+        x = pd.Series(pd.factorize(df[x_col])[0], index=df.index).where(df[x_col].notna())
+    valid = (x.notna() & y.notna()).to_numpy()
+    x_values = x.to_numpy(dtype=np.float64)[valid]
+    y_values = y.to_numpy(dtype=np.float64)[valid]
+
+    if chart_type == "Scatter Plot":
+        if len(x_values) > SCATTER_DENSITY_THRESHOLD:
+            return density_grid(x_values, y_values)
+        return {"kind": "scatter", "x": x_values, "y": y_values}
+
+    if chart_type == "Line Chart":
+        x_values, y_values = minmax_decimate(x_values, y_values)
+        return {"kind": "line", "x": x_values, "y": y_values}
+
+    raise ValueError(f"Unsupported chart type: {chart_type}")
+
+
+class ChartDataCache:
+    """Keeps recently used dataset DataFrames and prepared chart specs in memory.
+
+    Entries are tagged with the dataset's metadata generation, so any write
+    to the dataset invalidates them without explicit notifications.
+    """
+
+    def __init__(self):
+        self.frames = OrderedDict()  # dataset_path -> (generation, df)
+        self.specs = OrderedDict()   # (dataset_path, generation, x, y, chart_type) -> spec
+        self.lock = threading.Lock()
+
+    def get_frame(self, dataset_manager):
+        dataset_path = dataset_manager.dataset_path
+        generation = read_generation(dataset_path)
+        with self.lock:
+            cached = self.frames.get(dataset_path)
+            if cached and cached[0] == generation:
+                self.frames.move_to_end(dataset_path)
+                return generation, cached[1]
+
+        df, generation = dataset_manager.load_metadata_with_generation()
+        with self.lock:
+            self.frames[dataset_path] = (generation, df)
+            while len(self.frames) > MAX_DATASETS:
+                self.frames.popitem(last=False)
+        return generation, df
+
+    def get_chart(self, dataset_manager, x_col, y_col, chart_type):
+        """Returns the prepared spec for a chart, computing it only once per dataset generation."""
+        generation, df = self.get_frame(dataset_manager)
+        key = (dataset_manager.dataset_path, generation, x_col, y_col, chart_type)
+        with self.lock:
+            if key in self.specs:
+                self.specs.move_to_end(key)
+                return self.specs[key]
+
+        spec = prepare_chart(df, x_col, y_col, chart_type)
+        spec["rows"] = len(df)
+        with self.lock:
+            self.specs[key] = spec
+            while len(self.specs) > MAX_SPECS:
+                self.specs.popitem(last=False)
+        logger.debug(f"Prepared {chart_type} of {y_col} by {x_col} ({len(df)} rows)")
+        return spec
+
+
+_cache = None
+
+
+def get_chart_cache():
+    """Returns the process-wide chart data cache."""
+    global _cache
+    if _cache is None:
+        _cache = ChartDataCache()
+    return _cache
@@ -0,0 +1,223 @@
+# scripts/commit_queue.py
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+import shutil
+from concurrent.futures import Future
+import pandas as pd
+from PySide6.QtCore import QObject, Signal
+from scripts.dataset_lock import DatasetLock, bump_generation
+from scripts.logger import logger
+
+SPOOL_DIR = "commit_spool"
+
+
+def atomic_write_csv(df, path):
+    """Writes a DataFrame to CSV through a temp file and rename so readers never see a partial file."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+    try:
+        with open(tmp_path, "w", newline="") as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def atomic_append_csv(rows, path):
+    """Appends rows to a CSV atomically: copy, append, fsync, rename.
+
+    Copying the existing bytes avoids re-parsing the whole file; a full
+    rewrite is only needed when the rows introduce new columns.
+    """
+    new_df = pd.DataFrame(rows)
+    columns = pd.read_csv(path, nrows=0).columns if os.path.exists(path) else None
+    if columns is None or not set(new_df.columns) <= set(columns):
+        existing = pd.read_csv(path) if columns is not None else pd.DataFrame()
+        atomic_write_csv(pd.concat([existing, new_df], ignore_index=True), path)
+        return
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+    try:
+        shutil.copyfile(path, tmp_path)
+        with open(tmp_path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        with open(tmp_path, "a", newline="") as f:
+            new_df.reindex(columns=columns).to_csv(f, header=False, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class CommitQueue(QObject):
+    """Single in-process writer for a dataset's metadata that coalesces row batches into group commits.
+
+    Threads submit rows with submit(); other processes drop batches into the
+    dataset's commit_spool/ folder with spool(). One writer thread per
+    metadata file gathers both until MAX_BATCH_ROWS rows are waiting or the
+    oldest has waited MAX_DELAY seconds, then appends them in one atomic
+    write and emits committed once. Commits hold the cross-process
+    DatasetLock and advance the generation counter, so appends never race
+    with another process's compare-and-swap save.
+    """
+
+    committed = Signal(int)
+
+    MAX_BATCH_ROWS = 500
+    MAX_DELAY = 0.5  # Seconds
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def for_dataset(cls, metadata_path):
+        """Returns the one commit queue for a metadata file, creating it on first use."""
+        key = os.path.abspath(metadata_path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(key)
+            return cls._instances[key]
+
+    def __init__(self, metadata_path):
+        super().__init__()
+        self.metadata_path = metadata_path
+        self.spool_dir = os.path.join(os.path.dirname(metadata_path), SPOOL_DIR)
+        self.write_lock = threading.RLock()  # Held for every write to metadata_path
+        self.condition = threading.Condition()
+        self.pending = []  # (rows, future, submitted_at)
+        self.after_write = None  # Called with the committed rows while the write lock is held
+        self.thread = None
+        self.stopped = False
+        self.flush_requested = False
+        atexit.register(self.stop)
+
+    @staticmethod
+    def spool(dataset_path, rows):
+        """Hands a row batch to the dataset's writer from any process."""
+        spool_dir = os.path.join(dataset_path, SPOOL_DIR)
+        os.makedirs(spool_dir, exist_ok=True)
+        name = f"{time.time_ns()}_{uuid.uuid4().hex}"
+        tmp_path = os.path.join(spool_dir, f"{name}.part")
+        with open(tmp_path, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+        os.replace(tmp_path, os.path.join(spool_dir, f"{name}.jsonl"))
+
+    def submit(self, rows):
+        """Queues rows for the next group commit; the returned Future resolves once they are written."""
+        future = Future()
+        with self.condition:
+            self.pending.append((list(rows), future, time.monotonic()))
+            self._ensure_thread()
+            self.condition.notify()
+        return future
+
+    def flush(self, timeout=None):
+        """Blocks until everything submitted so far has been written."""
+        with self.condition:
+            futures = [future for _, future, _ in self.pending]
+            self.flush_requested = True
+            self.condition.notify()
+        for future in futures:
+            future.result(timeout)
+
+    def stop(self):
+        """Writes what is pending and stops the writer thread."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    def start(self):
+        """Starts the writer so batches spooled by other processes are picked up without a local submit."""
+        with self.condition:
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name=f"CommitQueue({self.metadata_path})", daemon=True)
+            self.thread.start()
+
+    def _pending_rows(self):
+        return sum(len(rows) for rows, _, _ in self.pending)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.stopped:
+                    if self.pending and (
+                        self._pending_rows() >= self.MAX_BATCH_ROWS
+                        or time.monotonic() - self.pending[0][2] >= self.MAX_DELAY
+                        or self.flush_requested
+                    ):
+                        break
+                    if not self.pending and self._spooled_files():
+                        break
+                    self.condition.wait(self.MAX_DELAY / 4)
+                batch, self.pending = self.pending, []
+                self.flush_requested = False
+                stopping = self.stopped
+
+            self._commit(batch)
+            if stopping:
+                return
+
+    def _spooled_files(self):
+        try:
+            return sorted(name for name in os.listdir(self.spool_dir) if name.endswith(".jsonl"))
+        except FileNotFoundError:
+            return []
+
+    def _read_spool(self):
+        files, rows = [], []
+        for name in self._spooled_files():
+            path = os.path.join(self.spool_dir, name)
+            try:
+                with open(path, "r") as f:
+                    rows.extend(json.loads(line) for line in f if line.strip())
+                files.append(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable spooled batch {path}: {e}")
+        return files, rows
+
+    def _commit(self, batch):
+        spooled_files, spooled_rows = self._read_spool()
+        rows = [row for batch_rows, _, _ in batch for row in batch_rows] + spooled_rows
+        if not rows:
+            for _, future, _ in batch:
+                future.set_result(0)
+            return
+
+        try:
+            dataset_path = os.path.dirname(self.metadata_path)
+            with self.write_lock, DatasetLock(dataset_path):
+                atomic_append_csv(rows, self.metadata_path)
+                if self.after_write:
+                    self.after_write(rows)
+                bump_generation(dataset_path)
+            for path in spooled_files:
+                os.remove(path)
+        except Exception as e:
+            logger.error(f"Group commit of {len(rows)} rows failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        logger.debug(f"Committed {len(rows)} rows to {self.metadata_path}")
+        for batch_rows, future, _ in batch:
+            future.set_result(len(batch_rows))
+        self.committed.emit(len(rows))
@@ -0,0 +1,165 @@
+# scripts/compaction.py
+
+import datetime
+import glob
+import os
+import shutil
+import time
+from scripts.ingest_job import IngestJob
+from scripts.integrity import referenced_files, QUARANTINE_DIR
+from scripts.logger import logger
+
+STAGING_DIRS = ["github_export", "kaggle_export"]
+ORPHAN_GRACE = 3600  # Seconds; newer orphans may belong to an import that has not committed yet
+
+
+def _size(path):
+    """Returns the bytes used by a file or directory tree."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def compact_metadata(df):
+    """Returns df without empty rows and with whole-number float columns stored as integers."""
+    df = df.dropna(how="all").reset_index(drop=True)
+    for column in df.select_dtypes(include="float").columns:
+        values = df[column].dropna()
+        if len(values) and (values == values.round()).all():
+            df[column] = df[column].astype("Int64")
+    return df
+
+
+class DatasetCompactor:
+    """Reclaims space in a dataset folder.
+
+    Removes orphaned audio, expires legacy metadata_backup_*.csv files and
+    old quarantined audio by policy, deletes export staging folders, finished
+    ingest jobs and stale .part files, trims version history, and rewrites
+    metadata.csv compactly.
+    """
+
+    def __init__(self, dataset_manager, keep_backups=3, max_backup_age_days=30, quarantine_days=30):
+        self.dataset_manager = dataset_manager
+        self.keep_backups = keep_backups
+        self.max_backup_age_days = max_backup_age_days
+        self.quarantine_days = quarantine_days
+
+    def plan(self):
+        """Lists what compaction would delete as {"category", "path", "bytes"} items."""
+        dataset_path = self.dataset_manager.dataset_path
+        now = time.time()
+        items = []
+
+        def add(category, path):
+            items.append({"category": category, "path": path, "bytes": _size(path)})
+
+        # Orphaned audio, sparing files an unfinished import may still commit
+        df = self.dataset_manager.load_metadata()
+        referenced = set(referenced_files(df))
+        cutoff = now - ORPHAN_GRACE
+        unfinished = IngestJob.find_resumable(self.dataset_manager)
+        started = [datetime.datetime.fromisoformat(job.created_at).timestamp() for job in unfinished if job.created_at]
+        if started:
+            cutoff = min(cutoff, min(started))
+        audio_dir = self.dataset_manager.audio_dir
+        if os.path.isdir(audio_dir):
+            with os.scandir(audio_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file() or entry.name in referenced:
+                        continue
+                    # Imports place files with copy2, which keeps the source mtime; ctime is when it landed here
+                    stat = entry.stat()
+                    if max(stat.st_mtime, stat.st_ctime) < cutoff:
+                        add("orphan_audio", entry.path)
+
+        # Legacy full-file backups: keep the newest few that are within the age limit
+        backups = sorted(glob.glob(os.path.join(dataset_path, "metadata_backup_*.csv")), key=os.path.getmtime, reverse=True)
+        max_age = now - self.max_backup_age_days * 86400
+        for index, path in enumerate(backups):
+            if index >= self.keep_backups or os.path.getmtime(path) < max_age:
+                add("metadata_backup", path)
+
+        for name in STAGING_DIRS:
+            path = os.path.join(dataset_path, name)
+            if os.path.isdir(path):
+                add("export_staging", path)
+
+        quarantine_dir = os.path.join(dataset_path, QUARANTINE_DIR)
+        if os.path.isdir(quarantine_dir):
+            expiry = now - self.quarantine_days * 86400
+            for name in os.listdir(quarantine_dir):
+                path = os.path.join(quarantine_dir, name)
+                if os.path.getmtime(path) < expiry:
+                    add("quarantine", path)
+
+        if os.path.isdir(self.dataset_manager.jobs_dir):
+            unfinished_ids = {job.job_id for job in unfinished}
+            for job_id in os.listdir(self.dataset_manager.jobs_dir):
+                if job_id not in unfinished_ids:
+                    add("finished_job", os.path.join(self.dataset_manager.jobs_dir, job_id))
+
+        # Temp files abandoned by interrupted atomic writes
+        for pattern in ["*.part", os.path.join("versions", "*.part")]:
+            for path in glob.glob(os.path.join(dataset_path, pattern)):
+                if os.path.getmtime(path) < now - ORPHAN_GRACE:
+                    add("temp_file", path)
+
+        return items
+
+    def run(self, dry_run=True, confirmed=None):
+        """Compacts the dataset (or only reports what would change) and returns a report.
+
+        confirmed is the item list from an earlier dry run; a real run then
+        deletes only those items that the current plan still lists, never
+        anything the user was not shown.
+        """
+        items = self.plan()
+        if confirmed is not None:
+            paths = {item["path"] for item in confirmed}
+            items = [item for item in items if item["path"] in paths]
+        metadata_before = os.path.getsize(self.dataset_manager.metadata_path) if os.path.exists(self.dataset_manager.metadata_path) else 0
+        metadata_after = metadata_before
+
+        if not dry_run:
+            for item in items:
+                try:
+                    if os.path.isdir(item["path"]):
+                        shutil.rmtree(item["path"])
+                    else:
+                        os.remove(item["path"])
+                except OSError as e:
+                    logger.warning(f"Could not remove {item['path']}: {e}")
+                    item["bytes"] = 0
+
+            if metadata_before:
+                self.dataset_manager.modify_metadata(compact_metadata)
+                metadata_after = os.path.getsize(self.dataset_manager.metadata_path)
+            self.dataset_manager.version_store.apply_retention()
+        elif metadata_before:
+            compacted = compact_metadata(self.dataset_manager.load_metadata())
+            metadata_after = len(compacted.to_csv(index=False).encode())
+
+        by_category = {}
+        for item in items:
+            totals = by_category.setdefault(item["category"], {"count": 0, "bytes": 0})
+            totals["count"] += 1
+            totals["bytes"] += item["bytes"]
+
+        report = {
+            "dry_run": dry_run,
+            "items": items,
+            "by_category": by_category,
+            "metadata_bytes_saved": max(0, metadata_before - metadata_after),
+            "bytes_reclaimed": sum(item["bytes"] for item in items) + max(0, metadata_before - metadata_after),
+        }
+        action = "Would reclaim" if dry_run else "Reclaimed"
+        logger.info(f"{action} {report['bytes_reclaimed']} bytes in {self.dataset_manager.dataset_path}")
+        return report
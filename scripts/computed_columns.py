@@ -0,0 +1,220 @@
+# scripts/computed_columns.py
+
+import ast
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from scripts.version_store import pick_key_column
+from scripts.logger import logger
+
+COMPUTED_DIR = "computed"
+STATE_FILE = "state.json"
+
+
+def parse_computed(template):
+    """Normalizes a template's "computed" section to {column: {"expression", "scope"}}.
+
+    Entries are either an expression string or {"expression": ..., "scope":
+    "row" | "table"}. Row-scoped expressions (the default) depend only on
+    their own row and are recomputed incrementally; table-scoped ones (e.g.
+    "duration / duration.max()") are always recomputed in full.
+    """
+    specs = {}
+    for column, spec in ((template or {}).get("computed") or {}).items():
+        if isinstance(spec, str):
+            spec = {"expression": spec}
+        specs[column] = {"expression": spec["expression"], "scope": spec.get("scope", "row")}
+    return specs
+
+
+def expression_inputs(expression, columns):
+    """Returns the columns an expression reads, including `backticked` names."""
+    quoted = re.findall(r"`([^`]*)`", expression)
+    names = set(quoted)
+    parsed = re.sub(r"`[^`]*`", "_", expression)
+    names.update(node.id for node in ast.walk(ast.parse(parsed, mode="eval")) if isinstance(node, ast.Name))
+    return sorted(names & set(columns))
+
+
+def dependency_graph(specs, columns):
+    """Maps each computed column to the columns it reads and returns a valid evaluation order."""
+    available = set(columns) | set(specs)
+    graph = {column: expression_inputs(spec["expression"], available) for column, spec in specs.items()}
+
+    order, state = [], {}
+
+    def visit(column, path):
+        if state.get(column) == "done":
+            return
+        if state.get(column) == "visiting":
+            raise ValueError(f"Computed columns form a cycle: {' -> '.join(path + [column])}")
+        state[column] = "visiting"
+        for dependency in graph[column]:
+            if dependency in specs:
+                visit(dependency, path + [column])
+        state[column] = "done"
+        order.append(column)
+
+    for column in specs:
+        visit(column, [])
+    return graph, order
+
+
+def _hash_rows(df, columns):
+    if not columns:
+        return np.zeros(len(df), dtype=np.uint64)
+    return pd.util.hash_pandas_object(df[columns].astype(str), index=False).values
+
+
+class ComputedColumns:
+    """Evaluates a dataset's computed columns and tracks which rows are up to date.
+
+    Computed values are stored as ordinary metadata columns. For each column,
+    <dataset>/computed/<column>.npz keeps a hash of every row's inputs keyed
+    by a hash of the row key, so a refresh only re-evaluates rows whose
+    inputs changed, and downstream columns follow through the dependency
+    graph.
+    """
+
+    def __init__(self, dataset_path, template=None):
+        self.computed_dir = os.path.join(dataset_path, COMPUTED_DIR)
+        self.state_path = os.path.join(self.computed_dir, STATE_FILE)
+        self.specs = parse_computed(template)
+        self.pending_state = None
+
+    def evaluate(self, df, column):
+        """Evaluates one computed column over df with a single vectorized pandas expression."""
+        result = df.eval(self.specs[column]["expression"], engine="python")
+        if not isinstance(result, pd.Series):
+            result = pd.Series(result, index=df.index)
+        return result
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _hash_path(self, column):
+        return os.path.join(self.computed_dir, f"{re.sub(r'[^A-Za-z0-9_.-]', '_', column)}.npz")
+
+    def _row_keys(self, df):
+        key = pick_key_column(df)
+        if key is None:
+            return np.arange(len(df), dtype=np.uint64)
+        return pd.util.hash_pandas_object(df[key].astype(str), index=False).values
+
+    def _stale_rows(self, column, keys, input_hashes):
+        try:
+            with np.load(self._hash_path(column)) as stored:
+                previous_keys, previous_hashes = stored["keys"], stored["hashes"]
+        except (OSError, KeyError, ValueError):
+            return np.ones(len(keys), dtype=bool)
+
+        index = pd.Index(previous_keys)
+        if not index.is_unique:
+            return np.ones(len(keys), dtype=bool)
+        positions = index.get_indexer(keys)
+        found = positions >= 0
+        stale = ~found
+        stale[found] = previous_hashes[positions[found]] != input_hashes[found]
+        return stale
+
+    def refresh(self, df, force=False):
+        """Returns a copy of df with every computed column up to date, recomputing only stale rows.
+
+        Call save_state() once it has been written so the next refresh knows
+        which rows are current.
+        """
+        if not self.specs:
+            return df
+
+        df = df.copy()
+        try:
+            graph, order = dependency_graph(self.specs, df.columns)
+        except (ValueError, SyntaxError) as e:
+            logger.error(f"Skipping computed columns: {e}")
+            return df
+        state = self._load_state()
+        keys = self._row_keys(df)
+        new_state, hashes = {}, {}
+
+        for column in order:
+            spec = self.specs[column]
+            inputs = graph[column]
+            input_hashes = _hash_rows(df, inputs)
+            previous = state.get(column)
+
+            if force or spec["scope"] == "table" or column not in df.columns or previous is None \
+                    or previous["expression"] != spec["expression"]:
+                stale = np.ones(len(df), dtype=bool)
+            else:
+                stale = self._stale_rows(column, keys, input_hashes)
+
+            if stale.any():
+                try:
+                    values = self.evaluate(df if stale.all() else df[stale], column)
+                except Exception as e:
+                    # Leave the column as it is and retry on the next refresh
+                    logger.warning(f"Could not compute column {column}: {e}")
+                    continue
+                if stale.all():
+                    df[column] = values
+                else:
+                    # concat keeps the column's dtype unless the new values need a wider one
+                    df[column] = pd.concat([df.loc[~stale, column], values]).reindex(df.index)
+                logger.debug(f"Recomputed {int(stale.sum())} rows of computed column {column}")
+
+            new_state[column] = {"expression": spec["expression"], "scope": spec["scope"], "inputs": inputs}
+            hashes[column] = input_hashes
+
+        self.pending_state = (new_state, keys, hashes)
+        return df
+
+    def compute_rows(self, rows):
+        """Fills row-scoped computed columns for a batch of new rows (dicts) before they are appended."""
+        if not self.specs or not rows:
+            return rows
+        batch = pd.DataFrame(rows)
+        try:
+            graph, order = dependency_graph(self.specs, batch.columns)
+        except (ValueError, SyntaxError):
+            return rows
+        for column in order:
+            if self.specs[column]["scope"] != "row" or not set(graph[column]) <= set(batch.columns):
+                continue
+            try:
+                batch[column] = self.evaluate(batch, column)
+            except Exception as e:
+                logger.warning(f"Could not compute {column} for new rows: {e}")
+        return batch.to_dict("records")
+
+    def reset(self):
+        """Forgets all row hashes so the next refresh recomputes every row."""
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def save_state(self):
+        """Persists the row hashes from the last refresh."""
+        if self.pending_state is None:
+            return
+        new_state, keys, hashes = self.pending_state
+        self.pending_state = None
+
+        os.makedirs(self.computed_dir, exist_ok=True)
+        for column, input_hashes in hashes.items():
+            path = self._hash_path(column)
+            tmp_path = f"{path}.part.npz"
+            np.savez(tmp_path, keys=keys, hashes=input_hashes)
+            os.replace(tmp_path, path)
+        for column in set(self._load_state()) - set(new_state):
+            if os.path.exists(self._hash_path(column)):
+                os.remove(self._hash_path(column))
+
+        tmp_path = f"{self.state_path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(new_state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,115 @@
+# scripts/dataset_lock.py
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_FILE = ".metadata.lock"
+GENERATION_FILE = "metadata.generation"
+
+
+class ConcurrentModificationError(RuntimeError):
+    """Raised when metadata changed on disk since it was loaded."""
+
+
+class DatasetLock:
+    """Advisory cross-process lock on a dataset folder.
+
+    Uses fcntl.flock on <dataset>/.metadata.lock (msvcrt on Windows).
+    Exclusive holders are writers; shared holders are readers. The lock is
+    re-entrant within a thread, so code already holding it can call helpers
+    that take it again.
+    """
+
+    _held = threading.local()
+
+    def __init__(self, dataset_path, shared=False, timeout=30.0):
+        self.dataset_path = os.path.abspath(dataset_path)
+        self.lock_path = os.path.join(self.dataset_path, LOCK_FILE)
+        self.shared = shared
+        self.timeout = timeout
+        self.fd = None
+
+    def _held_locks(self):
+        if not hasattr(self._held, "locks"):
+            self._held.locks = {}
+        return self._held.locks
+
+    def __enter__(self):
+        held = self._held_locks()
+        if self.lock_path in held:
+            held[self.lock_path][1] += 1
+            return self
+
+        os.makedirs(self.dataset_path, exist_ok=True)
+        self.fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                self._acquire()
+                break
+            except (BlockingIOError, OSError):
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(self.fd)
+                    self.fd = None
+                    raise TimeoutError(f"Timed out waiting for dataset lock: {self.lock_path}")
+                time.sleep(0.05)
+
+        held[self.lock_path] = [self.fd, 1]
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        held = self._held_locks()
+        entry = held[self.lock_path]
+        entry[1] -= 1
+        if entry[1] > 0:
+            return False
+
+        del held[self.lock_path]
+        fd = entry[0]
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+        return False
+
+    def _acquire(self):
+        if fcntl:
+            mode = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+            fcntl.flock(self.fd, mode | fcntl.LOCK_NB)
+        else:
+            # msvcrt has no shared locks; readers take the exclusive lock briefly
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_NBLCK, 1)
+
+
+def read_generation(dataset_path):
+    """Returns the metadata generation counter (0 if never written)."""
+    try:
+        with open(os.path.join(dataset_path, GENERATION_FILE), "r") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_generation(dataset_path):
+    """Increments the generation counter atomically; call while holding the exclusive lock."""
+    generation = read_generation(dataset_path) + 1
+    path = os.path.join(dataset_path, GENERATION_FILE)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "w") as f:
+        f.write(str(generation))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return generation
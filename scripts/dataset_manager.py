@@ -8,16 +8,45 @@ import uuid
 import datetime
 from pydub import AudioSegment
 import numpy as np
+from scripts.commit_queue import CommitQueue, atomic_write_csv
+from scripts.dataset_lock import DatasetLock, ConcurrentModificationError, read_generation, bump_generation
+from scripts.version_store import VersionStore, pick_key_column
+from scripts import dataset_manifest
+from scripts.integrity import IntegrityScanner, AUDIO_COLUMNS
+from scripts.compaction import DatasetCompactor
+from scripts.fingerprint import FingerprintIndex
+from scripts.embeddings import EmbeddingStore
+from scripts.feature_store import FeatureStore
+from scripts.batch_loader import BatchIterator
+from scripts import dataset_schema
+from scripts.dataset_stats import DatasetStats
+from scripts.computed_columns import ComputedColumns, parse_computed, dependency_graph
+from scripts.app_settings import get_settings
 from scripts.logger import logger
 
 class DatasetManager:
     """Manages dataset metadata, audio files, and versioning."""
 
-    def __init__(self, dataset_path, create_new=False, columns=None):
+    def __init__(self, dataset_path, create_new=False, columns=None, versioning_enabled=False):
         self.dataset_path = dataset_path
         self.audio_dir = os.path.join(dataset_path, "audio")
         self.metadata_path = os.path.join(dataset_path, "metadata.csv")
         self.template_path = os.path.join(dataset_path, "dataset.template")
+        self.jobs_dir = os.path.join(dataset_path, "jobs")
+        self.manifests_dir = os.path.join(dataset_path, "manifests")
+        self.versioning_enabled = versioning_enabled
+        self.loaded_generation = None
+        self._embeddings = None
+
+        self.version_store = VersionStore(dataset_path)
+        self.template = self.load_template()
+        self.computed = ComputedColumns(dataset_path, self.template)
+
+        # All metadata writes for this dataset go through one writer
+        self.commit_queue = CommitQueue.for_dataset(self.metadata_path)
+        # The queue is shared per dataset; don't let a plain reader replace a versioning manager's hook
+        if versioning_enabled or self.commit_queue.after_write is None:
+            self.commit_queue.after_write = self._after_append
 
         if create_new:
             os.makedirs(self.dataset_path, exist_ok=True)
@@ -32,42 +61,233 @@ class DatasetManager:
             df.to_csv(self.metadata_path, index=False)
             logger.info("Metadata file initialized successfully.")
 
-    def create_template(self, columns):
-        """Creates a dataset template file with the given columns."""
-        template_data = {
+    def create_template(self, columns, base_template=None):
+        """Creates a dataset template file with the given columns.
+
+        base_template carries over optional sections (such as "computed")
+        from the template the dataset was created from.
+        """
+        template_data = dict(base_template or {})
+        template_data.update({
             "name": os.path.basename(self.dataset_path),
             "created_at": datetime.datetime.now().isoformat(),
-            "columns": columns
-        }
-        with open(self.template_path, "w") as f:
-            json.dump(template_data, f, indent=2)
+            # Keep typed column declarations from the base template
+            "columns": template_data.get("columns") or columns
+        })
+        self.save_template(template_data)
 
         # Initialize metadata file
-        df = pd.DataFrame(columns=columns)
+        df = pd.DataFrame(columns=dataset_schema.column_names(template_data))
         df.to_csv(self.metadata_path, index=False)
 
+    def load_template(self):
+        """Loads the dataset template, or an empty dict if the dataset has none."""
+        try:
+            with open(self.template_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_template(self, template):
+        tmp_path = f"{self.template_path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(template, f, indent=2)
+        os.replace(tmp_path, self.template_path)
+        self.template = template
+        self.computed = ComputedColumns(self.dataset_path, template)
+
+    def set_computed_column(self, column, expression, scope="row"):
+        """Declares (or with expression=None removes) a computed column and brings it up to date."""
+        template = dict(self.template)
+        computed = dict(template.get("computed") or {})
+        if expression is None:
+            computed.pop(column, None)
+        else:
+            computed[column] = {"expression": expression, "scope": scope}
+            # Reject cycles before anything is written
+            dependency_graph(parse_computed({"computed": computed}), self.load_metadata().columns)
+        template["computed"] = computed
+        self.save_template(template)
+        return self.refresh_computed_columns()
+
+    def refresh_computed_columns(self, force=False):
+        """Recomputes computed columns whose inputs changed (all rows with force=True)."""
+        if not self.computed.specs:
+            return False
+        if force:
+            self.computed.reset()
+        # save_metadata refreshes computed columns on every write
+        return self.modify_metadata(lambda df: df)
+
     def load_metadata(self):
         """Loads dataset metadata from CSV, returning a DataFrame."""
-        if os.path.exists(self.metadata_path):
+        return self.load_metadata_with_generation()[0]
+
+    def get_metadata(self):
+        """Returns the current metadata DataFrame (empty if there is none)."""
+        return self.load_metadata()
+
+    def load_metadata_with_generation(self):
+        """Loads metadata together with the generation it was read at, under a shared lock."""
+        with DatasetLock(self.dataset_path, shared=True):
+            generation = read_generation(self.dataset_path)
+            df = pd.DataFrame()
+            if os.path.exists(self.metadata_path):
+                try:
+                    df = dataset_schema.read_csv(self.metadata_path, self.template)
+                except Exception as e:
+                    print(f"Error loading metadata: {e}")
+        self.loaded_generation = generation
+        return df, generation
+
+    def save_metadata(self, df, expected_generation=None):
+        """Saves the DataFrame metadata to CSV with optional versioning.
+
+        When expected_generation is given the save is a compare-and-swap: it
+        raises ConcurrentModificationError if another writer (in this or any
+        other process) saved since that generation was loaded.
+        """
+        with self.commit_queue.write_lock, DatasetLock(self.dataset_path):
+            current = read_generation(self.dataset_path)
+            if expected_generation is not None and current != expected_generation:
+                raise ConcurrentModificationError(
+                    f"Metadata changed on disk (generation {current}, expected {expected_generation})"
+                )
+
+            df = self.computed.refresh(df)
+            if self.versioning_enabled:
+                self._record_version(df)
+            atomic_write_csv(df, self.metadata_path)
+            self.computed.save_state()
+            self.loaded_generation = bump_generation(self.dataset_path)
+            # A full rewrite is already O(rows), so aggregates are rebuilt in the same pass
+            DatasetStats.from_dataframe(df, self.loaded_generation).save(self.dataset_path)
+            return self.loaded_generation
+
+    def _record_version(self, df):
+        """Records df in the version store before it replaces metadata.csv.
+
+        A history failure is logged rather than raised, so it never leaves a
+        written CSV without its generation bump and stats.
+        """
+        try:
+            if os.path.exists(self.metadata_path) and not self.version_store.head():
+                # Metadata written before versioning started is kept as version 1
+                self.version_store.record_baseline(pd.read_csv(self.metadata_path))
+            self.version_store.record(df)
+        except Exception as e:
+            logger.error(f"Could not record metadata version: {e}")
+
+    def modify_metadata(self, modify, retries=5):
+        """Applies modify(df) -> df as an optimistic read-modify-write, retrying on conflicts."""
+        for attempt in range(retries):
+            df, generation = self.load_metadata_with_generation()
+            updated = modify(df)
+            if updated is None:
+                return False
             try:
-                return pd.read_csv(self.metadata_path)
-            except Exception as e:
-                print(f"Error loading metadata: {e}")
-        return pd.DataFrame()
-
-    def save_metadata(self, df):
-        """Saves the DataFrame metadata to CSV with optional versioning."""
+                self.save_metadata(updated, expected_generation=generation)
+                return True
+            except ConcurrentModificationError as e:
+                logger.warning(f"Retrying metadata update ({attempt + 1}/{retries}): {e}")
+        raise ConcurrentModificationError(f"Metadata update failed after {retries} conflicting attempts")
+
+    def _after_append(self, rows):
+        """Called by the commit queue under the lock after a group commit, before the generation bump."""
         if self.versioning_enabled:
-            self._backup_previous_metadata()
-
-        df.to_csv(self.metadata_path, index=False)
-
-    def _backup_previous_metadata(self):
-        """Creates a backup of the current metadata before overwriting."""
-        if os.path.exists(self.metadata_path):
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = os.path.join(self.dataset_path, f"metadata_backup_{timestamp}.csv")
-            shutil.copy2(self.metadata_path, backup_path)
+            try:
+                self._record_appended_version(rows)
+            except Exception as e:
+                # The rows are already on disk; failing here would report the commit as lost
+                logger.error(f"Could not record appended metadata version: {e}")
+        self._update_stats(rows)
+
+    def _record_appended_version(self, rows):
+        """Records a group commit in the version store."""
+        if not self.version_store.head():
+            # The rows are already appended on disk, so the ones before them are the pre-existing state
+            df = pd.read_csv(self.metadata_path)
+            self.version_store.record_baseline(df.iloc[:len(df) - len(rows)])
+        if self.version_store.record_append(rows) is None:
+            self.version_store.record(pd.read_csv(self.metadata_path))
+
+    def _update_stats(self, rows):
+        """Merges appended rows into the stored aggregates in O(batch)."""
+        generation = read_generation(self.dataset_path)
+        stats = DatasetStats.load(self.dataset_path)
+        if stats is None or stats.generation != generation:
+            return  # Already stale; get_stats() rebuilds it on demand
+        stats.add_rows(pd.DataFrame(rows))
+        stats.generation = generation + 1
+        stats.save(self.dataset_path)
+
+    def get_stats(self):
+        """Returns running aggregates for the metadata, rebuilding them only if they are stale.
+
+        Rendering overview panels from these is O(1) in the number of rows.
+        """
+        stats = DatasetStats.load(self.dataset_path)
+        if stats is not None and stats.generation == read_generation(self.dataset_path):
+            return stats
+        df, generation = self.load_metadata_with_generation()
+        stats = DatasetStats.from_dataframe(df, generation)
+        with DatasetLock(self.dataset_path):
+            if read_generation(self.dataset_path) == generation:
+                stats.save(self.dataset_path)
+        return stats
+
+    def list_versions(self):
+        """Returns the recorded metadata versions, oldest first."""
+        return self.version_store.list_versions()
+
+    def diff_versions(self, old_version, new_version):
+        """Returns added, removed and modified rows between two metadata versions."""
+        return self.version_store.diff(old_version, new_version)
+
+    def restore_version(self, version):
+        """Restores metadata to a previous version; the restore itself becomes a new version."""
+        df = self.version_store.get_version(version)
+        self.save_metadata(df)
+        logger.info(f"Restored metadata to version {version}")
+        return df
+
+    def update_manifest(self):
+        """Rebuilds the hash manifest, rehashing only audio files whose size or mtime changed."""
+        previous = dataset_manifest.load_manifest(self.dataset_path)
+        manifest = dataset_manifest.build_manifest(self.dataset_path, self.load_metadata(), previous)
+        dataset_manifest.save_manifest(self.dataset_path, manifest)
+        return manifest
+
+    def compare_with(self, other_path):
+        """Diffs this dataset against another copy (e.g. an export), listing changed files and rows."""
+        # Exports carry no template, so the copy is typed with this dataset's one
+        other = dataset_manifest.build_manifest(other_path, previous=dataset_manifest.load_manifest(other_path),
+                                                template=self.template)
+        return dataset_manifest.diff_manifests(other, self.update_manifest())
+
+    def save_manifest_snapshot(self, name=None):
+        """Stores the current manifest under a name for later comparison."""
+        name = name or datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        dataset_manifest.save_manifest(self.manifests_dir, self.update_manifest())
+        os.replace(os.path.join(self.manifests_dir, dataset_manifest.MANIFEST_FILE),
+                   os.path.join(self.manifests_dir, f"{name}.json"))
+        return name
+
+    def list_manifest_snapshots(self):
+        """Returns the names of stored manifest snapshots."""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        return sorted(f[:-len(".json")] for f in os.listdir(self.manifests_dir) if f.endswith(".json"))
+
+    def diff_manifest_snapshots(self, old_name, new_name=None):
+        """Diffs two stored snapshots (or a snapshot against the current state) in O(changed items)."""
+        def load(name):
+            with open(os.path.join(self.manifests_dir, f"{name}.json"), "r") as f:
+                return json.load(f)
+
+        new = load(new_name) if new_name else self.update_manifest()
+        return dataset_manifest.diff_manifests(load(old_name), new)
 
     def add_audio_files(self, file_paths):
         """Batch imports multiple audio files into the dataset."""
@@ -102,12 +322,91 @@ class DatasetManager:
                 print(f"Error adding file {file_path}: {e}")
 
         if new_rows:
-            new_df = pd.DataFrame(new_rows)
-            metadata = pd.concat([metadata, new_df], ignore_index=True)
-            self.save_metadata(metadata)
+            self.append_entries(new_rows)
 
         return len(new_rows)
 
+    def register_audio_files(self, filenames):
+        """Adds metadata rows for files already in the audio folder (e.g. orphans found by a scan).
+
+        Rows are built like import rows: a song_title from the file name and
+        the name in the dataset's audio column. Returns (registered count,
+        {file name: reason}) for the rows the template rejected.
+        """
+        columns = list(self.load_metadata().columns)
+        audio_paths = [name for name, spec in dataset_schema.column_specs(self.template).items()
+                       if spec["type"] == "audio-path"]
+        audio_column = next(iter(audio_paths + [c for c in AUDIO_COLUMNS if c in columns]), "audio_file")
+        rows = []
+        for filename in filenames:
+            row = {col: "" for col in columns}
+            row.update({"song_title": os.path.splitext(filename)[0], audio_column: filename})
+            row.update(self.extract_audio_metadata(os.path.join(self.audio_dir, filename)))
+            rows.append(row)
+
+        valid, errors = self.validate_entries(rows)
+        rejected = {}
+        for error in errors:
+            rejected.setdefault(filenames[error["row"]], []).append(f"{error['column']}: {error['error']}")
+        rejected = {name: "; ".join(messages) for name, messages in rejected.items()}
+        for name, reason in rejected.items():
+            logger.warning(f"Could not register {name}: {reason}")
+        if valid and not self.append_entries(valid):
+            return 0, rejected
+        return len(valid), rejected
+
+    def check_integrity(self, incremental=True, verify_hashes=False, progress_callback=None, cancel_check=None):
+        """Scans referenced and on-disk audio in parallel and returns an integrity report."""
+        scanner = IntegrityScanner(self, max_workers=get_settings().value("max_threads", 4, type=int))
+        return scanner.scan(incremental, verify_hashes, progress_callback, cancel_check)
+
+    def apply_integrity_fixes(self, issues):
+        """Applies the suggested fix for each issue in an integrity report."""
+        return IntegrityScanner(self).apply_fixes(issues)
+
+    def find_duplicates(self, threshold=None, progress_callback=None, cancel_check=None):
+        """Fingerprints any clips not yet indexed and returns a near-duplicate report."""
+        index = FingerprintIndex(self, max_workers=get_settings().value("max_threads", 4, type=int))
+        index.update(progress_callback, cancel_check)
+        return index.duplicate_report() if threshold is None else index.duplicate_report(threshold)
+
+    def embedding_store(self):
+        """Returns the dataset's embedding store, kept so repeated searches reuse its cached statistics and index."""
+        if self._embeddings is None:
+            self._embeddings = EmbeddingStore(self, max_workers=get_settings().value("max_threads", 4, type=int))
+        return self._embeddings
+
+    def find_similar(self, row, k=10, progress_callback=None, cancel_check=None):
+        """Returns [(row, distance)] for the k clips most similar to the clip at row (a metadata.csv position)."""
+        store = self.embedding_store()
+        store.sync(progress_callback, cancel_check)
+        if cancel_check and cancel_check():
+            return []
+        return store.similar_rows(row, k)
+
+    def feature_store(self):
+        """Returns the frame-level feature store; training code reads clips from it as memmap slices."""
+        return FeatureStore(self, max_workers=get_settings().value("max_threads", 4, type=int))
+
+    def update_features(self, progress_callback=None, cancel_check=None):
+        """Extracts frame features for clips that are new or whose audio changed."""
+        return self.feature_store().update(progress_callback, cancel_check)
+
+    def iter_batches(self, batch_size=32, sample_rate=16000, clip_seconds=5.0, **options):
+        """Returns a BatchIterator yielding fixed-length decoded audio with metadata, for training loops.
+
+        options: shuffle, seed, rank, world_size, num_workers, prefetch,
+        cache_bytes, crop ("start", "center", "random"), drop_last, columns.
+        """
+        return BatchIterator(self, batch_size, sample_rate, clip_seconds, **options)
+
+    def compact(self, dry_run=True, keep_backups=3, max_backup_age_days=30, confirmed=None):
+        """Removes orphaned audio, stale backups and staging folders; dry_run only reports.
+
+        Pass a dry run's report["items"] as confirmed to delete only what it listed.
+        """
+        return DatasetCompactor(self, keep_backups, max_backup_age_days).run(dry_run, confirmed)
+
     def extract_audio_metadata(self, audio_path):
         """Extracts metadata from an audio file using pydub."""
         try:
@@ -143,28 +442,145 @@ class DatasetManager:
                 "file_format": os.path.splitext(audio_path)[1].replace(".", "")
             }
 
-    def update_metadata_value(self, row_index, column_name, new_value):
-        """Updates a specific metadata value in the dataset."""
-        metadata = self.load_metadata()
-        if metadata is None or row_index >= len(metadata):
-            return False
+    def update_metadata_value(self, row_index, column_name, new_value, row_key=None):
+        """Updates a specific metadata value in the dataset.
+
+        The row is pinned by row_key, the (key column, value) the caller saw,
+        or else on the first read by its key column value (or, with no key
+        column, by its contents). A retry after a concurrent write edits that
+        same row, or gives up if it was deleted or changed, and never lands
+        on whatever row moved into row_index. Returns whether it was saved.
+        """
+        new_value = dataset_schema.coerce_value(new_value, self.template, column_name)
+        identity = {}
+
+        def row_values(metadata, label):
+            row = metadata.loc[label]
+            return row.astype(object).where(row.notna(), None).tolist()
+
+        def apply(metadata):
+            if not identity:
+                identity["key"] = pick_key_column(metadata)
+                if row_key and row_key[0] == identity["key"]:
+                    identity["value"] = row_key[1]
+                    return apply(metadata)
+                if row_index not in metadata.index:
+                    return None
+                if identity["key"]:
+                    identity["value"] = metadata.at[row_index, identity["key"]]
+                else:
+                    identity["row"] = row_values(metadata, row_index)
+                label = row_index
+            elif identity["key"]:
+                if identity["key"] not in metadata.columns:
+                    return None
+                labels = metadata.index[metadata[identity["key"]] == identity["value"]]
+                if len(labels) != 1:
+                    logger.warning(f"Row {row_index} was deleted or duplicated by another writer; edit dropped")
+                    return None
+                label = labels[0]
+            else:
+                if row_index not in metadata.index or row_values(metadata, row_index) != identity["row"]:
+                    logger.warning(f"Row {row_index} changed under a concurrent write; edit dropped")
+                    return None
+                label = row_index
+            dataset_schema.widen_categories(metadata, column_name, new_value)
+            metadata.at[label, column_name] = new_value
+            return metadata
 
-        metadata.at[row_index, column_name] = new_value
-        self.save_metadata(metadata)
-        return True
+        return self.modify_metadata(apply)
+
+    def _selection_mask(self, df, rows=None, keys=None, key_column=None):
+        """Boolean mask for a row selection given by index labels or by key column values (all rows if neither)."""
+        if keys is not None:
+            key_column = key_column or pick_key_column(df)
+            if key_column is None:
+                raise ValueError("Metadata has no unique key column; select rows by index instead")
+            return df[key_column].astype(str).isin([str(key) for key in keys])
+        if rows is not None:
+            return df.index.isin(list(rows))
+        return pd.Series(True, index=df.index)
+
+    def _bulk_update(self, apply, rows=None, keys=None, key_column=None):
+        """Runs apply(df, mask) as one read-modify-write and returns the number of selected rows."""
+        affected = 0
+
+        def modify(df):
+            nonlocal affected
+            mask = self._selection_mask(df, rows, keys, key_column)
+            affected = int(mask.sum())
+            if not affected:
+                return None
+            return apply(df, mask)
+
+        self.modify_metadata(modify)
+        logger.info(f"Bulk update touched {affected} rows")
+        return affected
+
+    def bulk_set(self, column, value, rows=None, keys=None, key_column=None):
+        """Sets column to value for every selected row."""
+        value = dataset_schema.coerce_value(value, self.template, column)
+        def apply(df, mask):
+            if column not in df.columns:
+                df[column] = pd.NA
+            dataset_schema.widen_categories(df, column, value)
+            df.loc[mask, column] = value
+            return df
+
+        return self._bulk_update(apply, rows, keys, key_column)
+
+    def bulk_replace(self, column, pattern, replacement, rows=None, keys=None, key_column=None, regex=True):
+        """Replaces pattern with replacement in a text column for the selected rows."""
+        def apply(df, mask):
+            values = df.loc[mask, column]
+            replaced = values.astype(str).str.replace(pattern, replacement, regex=regex)
+            df[column] = df[column].astype(object)
+            df.loc[mask, column] = replaced.where(values.notna(), values)
+            return df
+
+        return self._bulk_update(apply, rows, keys, key_column)
+
+    def fill_down(self, column, rows=None, keys=None, key_column=None):
+        """Fills empty cells in column with the last non-empty value above them, within the selection."""
+        def apply(df, mask):
+            values = df.loc[mask, column].replace("", pd.NA)
+            df.loc[mask, column] = values.ffill()
+            return df
+
+        return self._bulk_update(apply, rows, keys, key_column)
+
+    def compute_column(self, column, expression, rows=None, keys=None, key_column=None):
+        """Sets column from a pandas expression over other columns (e.g. "duration * sample_rate")."""
+        def apply(df, mask):
+            result = df.eval(expression)
+            if column not in df.columns:
+                df[column] = pd.NA
+            values = result[mask] if isinstance(result, pd.Series) else result
+            dataset_schema.widen_categories(df, column, values)
+            df.loc[mask, column] = values
+            return df
+
+        return self._bulk_update(apply, rows, keys, key_column)
+
+    def delete_rows(self, rows=None, keys=None, key_column=None):
+        """Deletes the selected rows in one write; their audio files are left for compaction."""
+        if rows is None and keys is None:
+            raise ValueError("delete_rows needs a row or key selection")
+        return self._bulk_update(lambda df, mask: df[~mask].reset_index(drop=True), rows, keys, key_column)
 
     def delete_audio_file(self, filename):
-        """Deletes an audio file and removes its metadata entry."""
+        """Removes an audio file's metadata entry, then deletes the file once that write succeeded."""
+        def apply(metadata):
+            if "filename" not in metadata.columns:
+                return None
+            return metadata[metadata["filename"] != filename]
+
+        if not self.modify_metadata(apply):
+            return False
         file_path = os.path.join(self.audio_dir, filename)
         if os.path.exists(file_path):
             os.remove(file_path)
-
-        metadata = self.load_metadata()
-        if metadata is not None:
-            updated_metadata = metadata[metadata["filename"] != filename]
-            self.save_metadata(updated_metadata)
-            return True
-        return False
+        return True
 
     def export_dataset(self, destination, format="csv", include_audio=True):
         """Exports the dataset to the specified format."""
@@ -197,10 +613,41 @@ class DatasetManager:
 
     def log_entry(self, metadata):
         """Logs an entry into the dataset metadata."""
+        if self.append_entries([metadata]):
+            logger.info(f"New entry added to dataset: {metadata.get('song_title', metadata.get('filename', ''))}")
+
+    def append_entries(self, entries, wait=True):
+        """Appends a batch of metadata rows through the dataset's group-commit writer.
+
+        Safe to call from any thread; with wait=True it returns once the rows
+        are durably written.
+        """
+        if not entries:
+            return True
+        entries, errors = self.validate_entries(entries)
+        if errors:
+            logger.warning(f"Rejected {len({e['row'] for e in errors})} rows that do not match the template: "
+                           f"{dataset_schema.SchemaValidationError(errors)}")
+            if not entries:
+                return False
+        future = self.commit_queue.submit(self.computed.compute_rows(entries))
+        if not wait:
+            return True
         try:
-            df = pd.read_csv(self.metadata_csv)
-            df = pd.concat([df, pd.DataFrame([metadata])], ignore_index=True)
-            df.to_csv(self.metadata_csv, index=False)
-            logger.info(f"New entry added to dataset: {metadata['song_title']}")
+            future.result()
+            return not errors
         except Exception as e:
-            logger.error(f"Failed to log entry: {e}")
\ No newline at end of file
+            logger.error(f"Failed to log entries: {e}")
+            return False
+
+    def validate_entries(self, entries):
+        """Validates a batch of new rows against the template in one vectorized pass.
+
+        Returns (valid_entries, errors) where errors reference rows by their
+        position in entries.
+        """
+        if not dataset_schema.column_specs(self.template):
+            return list(entries), []
+        errors = dataset_schema.validate(pd.DataFrame(entries), self.template, self.audio_dir)
+        bad_rows = {error["row"] for error in errors}
+        return [entry for i, entry in enumerate(entries) if i not in bad_rows], errors
\ No newline at end of file
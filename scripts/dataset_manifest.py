@@ -0,0 +1,163 @@
+# scripts/dataset_manifest.py
+
+import hashlib
+import json
+import os
+import pandas as pd
+from scripts import dataset_schema
+from scripts.version_store import pick_key_column
+from scripts.logger import logger
+
+MANIFEST_FILE = "manifest.json"
+BUCKETS = 256            # Fan-out of the hash tree under each root
+POSITIONAL_CHUNK = 1000  # Rows per chunk when metadata has no unique key column
+
+
+def _digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _bucket(name):
+    return f"{int(hashlib.md5(str(name).encode()).hexdigest()[:4], 16) % BUCKETS:03d}"
+
+
+def _file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _tree(buckets, leaf_field):
+    """Fills in bucket hashes and returns the root hash for {bucket: {leaf_field: {name: hash}}}."""
+    for bucket in buckets.values():
+        leaves = bucket[leaf_field]
+        bucket["hash"] = _digest(*(f"{name}={_leaf_hash(leaves[name])}" for name in sorted(leaves)))
+    return _digest(*(f"{b}={buckets[b]['hash']}" for b in sorted(buckets)))
+
+
+def _leaf_hash(leaf):
+    return leaf[-1] if isinstance(leaf, list) else leaf
+
+
+def build_audio_tree(audio_dir, previous=None):
+    """Hashes every audio object, reusing previous hashes for files whose size and mtime are unchanged."""
+    previous_files = {}
+    for bucket in (previous or {}).get("buckets", {}).values():
+        previous_files.update(bucket["files"])
+
+    buckets = {}
+    rehashed = 0
+    if os.path.isdir(audio_dir):
+        with os.scandir(audio_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                known = previous_files.get(entry.name)
+                if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                    leaf = known
+                else:
+                    leaf = [stat.st_size, stat.st_mtime_ns, _file_sha256(entry.path)]
+                    rehashed += 1
+                buckets.setdefault(_bucket(entry.name), {"files": {}})["files"][entry.name] = leaf
+
+    logger.debug(f"Audio manifest: {rehashed} files rehashed")
+    return {"root": _tree(buckets, "files"), "buckets": buckets}
+
+
+def build_metadata_tree(df):
+    """Hashes metadata rows (vectorized) into key- or position-bucketed chunks."""
+    key = pick_key_column(df)
+    columns = [str(c) for c in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df.astype(str), index=False).map("{:016x}".format) if len(df) else pd.Series(dtype=str)
+
+    if key is not None:
+        names = df[key].astype(str).tolist()
+        bucket_ids = [_bucket(name) for name in names]
+    else:
+        names = [str(i) for i in range(len(df))]
+        bucket_ids = [f"p{i // POSITIONAL_CHUNK:06d}" for i in range(len(df))]
+
+    buckets = {}
+    for bucket_id, name, row_hash in zip(bucket_ids, names, row_hashes):
+        buckets.setdefault(bucket_id, {"rows": {}})["rows"][name] = row_hash
+
+    root = _digest(_digest(*columns), _tree(buckets, "rows"))
+    return {"root": root, "key": key, "columns": columns, "buckets": buckets}
+
+
+def build_manifest(dataset_path, df=None, previous=None, template=None):
+    """Builds the hierarchical hash manifest for a dataset folder (or a metadata DataFrame alone).
+
+    Metadata read from the folder is typed by template, so rows hash the
+    same as the typed frame DatasetManager.load_metadata returns for them.
+    """
+    if df is None:
+        metadata_path = os.path.join(dataset_path, "metadata.csv")
+        df = dataset_schema.read_csv(metadata_path, template) if os.path.exists(metadata_path) else pd.DataFrame()
+
+    audio = build_audio_tree(os.path.join(dataset_path, "audio"), (previous or {}).get("audio"))
+    metadata = build_metadata_tree(df)
+    return {"root": _digest(audio["root"], metadata["root"]), "audio": audio, "metadata": metadata}
+
+
+def load_manifest(dataset_path):
+    """Loads the stored manifest, or None if there is none yet."""
+    try:
+        with open(os.path.join(dataset_path, MANIFEST_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(dataset_path, manifest):
+    path = os.path.join(dataset_path, MANIFEST_FILE)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def _diff_tree(old, new, leaf_field):
+    """Walks only the buckets whose hashes differ and returns added/removed/modified leaf names."""
+    added, removed, modified = [], [], []
+    if old is None or new is None or old["root"] != new["root"]:
+        old_buckets = (old or {}).get("buckets", {})
+        new_buckets = (new or {}).get("buckets", {})
+        for bucket_id in set(old_buckets) | set(new_buckets):
+            old_bucket = old_buckets.get(bucket_id)
+            new_bucket = new_buckets.get(bucket_id)
+            if old_bucket and new_bucket and old_bucket["hash"] == new_bucket["hash"]:
+                continue
+            old_leaves = old_bucket[leaf_field] if old_bucket else {}
+            new_leaves = new_bucket[leaf_field] if new_bucket else {}
+            added.extend(name for name in new_leaves if name not in old_leaves)
+            removed.extend(name for name in old_leaves if name not in new_leaves)
+            modified.extend(
+                name for name in new_leaves
+                if name in old_leaves and _leaf_hash(new_leaves[name]) != _leaf_hash(old_leaves[name])
+            )
+    return {"added": sorted(added), "removed": sorted(removed), "modified": sorted(modified)}
+
+
+def diff_manifests(old, new):
+    """Compares two manifests in time proportional to what changed.
+
+    Returns added/removed/modified audio file names and metadata row keys
+    (row positions when the metadata has no unique key column).
+    """
+    if old and new and old["root"] == new["root"]:
+        empty = {"added": [], "removed": [], "modified": []}
+        return {"identical": True, "files": dict(empty), "rows": dict(empty), "columns_changed": False}
+
+    old_meta, new_meta = (old or {}).get("metadata"), (new or {}).get("metadata")
+    return {
+        "identical": False,
+        "files": _diff_tree((old or {}).get("audio"), (new or {}).get("audio"), "files"),
+        "rows": _diff_tree(old_meta, new_meta, "rows"),
+        "row_key": (new_meta or {}).get("key"),
+        "columns_changed": (old_meta or {}).get("columns") != (new_meta or {}).get("columns"),
+    }
@@ -0,0 +1,157 @@
+# scripts/dataset_schema.py
+
+import os
+import numpy as np
+import pandas as pd
+from scripts.logger import logger
+
+# Template column type -> pandas dtype used in memory
+COLUMN_TYPES = {
+    "categorical": "category",
+    "int16": "Int16",
+    "int32": "Int32",
+    "float32": "float32",
+    "string": "string",
+    "datetime": "datetime64[ns]",
+    "audio-path": "string",
+}
+
+INT_RANGES = {
+    "int16": (np.iinfo(np.int16).min, np.iinfo(np.int16).max),
+    "int32": (np.iinfo(np.int32).min, np.iinfo(np.int32).max),
+}
+
+
+class SchemaValidationError(ValueError):
+    """Raised when rows do not match the dataset template's column types."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        preview = "; ".join(f"row {e['row']} {e['column']}={e['value']!r}: {e['error']}" for e in errors[:5])
+        super().__init__(f"{len(errors)} invalid values: {preview}")
+
+
+def column_names(template):
+    """Returns the column names of a template whose columns are names or {"name", "type"} dicts."""
+    return [column["name"] if isinstance(column, dict) else column for column in (template or {}).get("columns", [])]
+
+
+def column_specs(template):
+    """Returns {name: spec} for typed template columns; untyped columns are left out."""
+    specs = {}
+    for column in (template or {}).get("columns", []):
+        if isinstance(column, dict) and column.get("type"):
+            if column["type"] not in COLUMN_TYPES:
+                raise ValueError(f"Unknown type {column['type']!r} for column {column['name']!r}")
+            specs[column["name"]] = column
+    return specs
+
+
+def _convert(values, spec):
+    """Vectorized conversion of one column; returns (converted, invalid_mask)."""
+    column_type = spec["type"]
+    present = values.notna() & (values.astype(str).str.strip() != "")
+
+    if column_type in INT_RANGES:
+        numbers = pd.to_numeric(values.where(present), errors="coerce")
+        low, high = INT_RANGES[column_type]
+        invalid = present & (numbers.isna() | (numbers != numbers.round()) | (numbers < low) | (numbers > high))
+        return numbers.where(~invalid).astype(COLUMN_TYPES[column_type]), invalid
+    if column_type == "float32":
+        numbers = pd.to_numeric(values.where(present), errors="coerce")
+        return numbers.astype("float32"), present & numbers.isna()
+    if column_type == "datetime":
+        dates = pd.to_datetime(values.where(present), errors="coerce")
+        return dates, present & dates.isna()
+    if column_type == "categorical":
+        categories = spec.get("categories")
+        strings = values.where(present).astype("string")
+        invalid = present & ~strings.isin(categories) if categories else pd.Series(False, index=values.index)
+        dtype = pd.CategoricalDtype(categories) if categories else "category"
+        return strings.where(~invalid).astype(dtype), invalid
+    return values.where(present).astype("string"), pd.Series(False, index=values.index)
+
+
+def apply_types(df, template):
+    """Casts df's columns to the compact dtypes declared in the template.
+
+    A column with values that do not parse is left as read, so the next
+    save writes those values back instead of erasing them.
+    """
+    for name, spec in column_specs(template).items():
+        if name in df.columns:
+            converted, invalid = _convert(df[name], spec)
+            if invalid.any():
+                logger.warning(f"Column {name}: {int(invalid.sum())} values do not match type {spec['type']}; "
+                               "keeping the column untyped until they are fixed")
+                continue
+            df[name] = converted
+    return df
+
+
+def read_csv(path, template):
+    """Reads metadata straight into the template's compact dtypes."""
+    specs = column_specs(template)
+    dtypes = {name: COLUMN_TYPES[spec["type"]] for name, spec in specs.items()
+              if spec["type"] in ("categorical", "string", "audio-path", "float32")}
+    try:
+        df = pd.read_csv(path, dtype=dtypes)
+    except (ValueError, TypeError):
+        df = pd.read_csv(path)
+    return apply_types(df, template)
+
+
+def validate(df, template, audio_dir=None):
+    """Checks a whole batch of rows at once.
+
+    Returns a list of {"row", "column", "value", "error"} dicts. Required
+    columns must be non-empty and audio-path columns must name files present
+    in audio_dir (when given).
+    """
+    errors = []
+    audio_files = set(os.listdir(audio_dir)) if audio_dir and os.path.isdir(audio_dir) else None
+
+    for name, spec in column_specs(template).items():
+        values = df[name] if name in df.columns else pd.Series(pd.NA, index=df.index, dtype=object)
+        present = values.notna() & (values.astype(str).str.strip() != "")
+        _, invalid = _convert(values, spec)
+        checks = [(invalid, f"not a valid {spec['type']}")]
+        if spec.get("required"):
+            checks.append((~present, "required value is missing"))
+        if spec["type"] == "audio-path" and audio_files is not None:
+            names = values.where(present).astype(str).map(os.path.basename)
+            checks.append((present & ~names.isin(audio_files), "audio file not found"))
+
+        for mask, message in checks:
+            for row in df.index[mask.to_numpy(dtype=bool)]:
+                errors.append({"row": row, "column": name, "value": values.at[row], "error": message})
+    return errors
+
+
+def widen_categories(df, column, values):
+    """Lets a categorical column take values it has not seen yet, before they are assigned.
+
+    New non-null values are added as categories; if they cannot be (e.g. a
+    number into string categories), the column falls back to object.
+    """
+    if column not in df.columns or not isinstance(df[column].dtype, pd.CategoricalDtype):
+        return df
+    values = pd.Series(values if pd.api.types.is_list_like(values) else [values], dtype=object).dropna()
+    new = values[~values.isin(df[column].cat.categories)].unique()
+    if len(new):
+        try:
+            df[column] = df[column].cat.add_categories(new)
+        except (TypeError, ValueError):
+            df[column] = df[column].astype(object)
+    return df
+
+
+def coerce_value(value, template, column):
+    """Converts one edited value to its column's type, raising SchemaValidationError if it does not fit."""
+    spec = column_specs(template).get(column)
+    if spec is None:
+        return value
+    converted, invalid = _convert(pd.Series([value], dtype=object), spec)
+    if invalid.iloc[0]:
+        raise SchemaValidationError([{"row": None, "column": column, "value": value, "error": f"not a valid {spec['type']}"}])
+    return converted.iloc[0]
@@ -0,0 +1,392 @@
+# scripts/dataset_server.py
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
+from urllib.parse import urlparse, parse_qs, quote
+import numpy as np
+from scripts.batch_loader import decode_clip
+from scripts.dataset_lock import read_generation
+from scripts.dataset_manager import DatasetManager
+from scripts.integrity import row_files
+from scripts.logger import logger
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_SAMPLE_RATE = 16000
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+# Filter operators -> vectorized comparison of a column against a JSON value
+FILTER_OPS = {
+    "==": lambda column, value: column == value,
+    "!=": lambda column, value: column != value,
+    "<": lambda column, value: column < value,
+    "<=": lambda column, value: column <= value,
+    ">": lambda column, value: column > value,
+    ">=": lambda column, value: column >= value,
+    "in": lambda column, value: column.isin(value),
+    "contains": lambda column, value: column.astype("string").str.contains(str(value), regex=False, na=False),
+}
+
+
+def attach_shared(name):
+    """Attaches to a server-owned shared memory block without taking ownership of it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    block = shared_memory.SharedMemory(name=name)
+    # Before 3.13 the resource tracker would unlink the block when this process exits
+    from multiprocessing import resource_tracker
+    resource_tracker.unregister(block._name, "shared_memory")
+    return block
+
+
+def apply_filter(df, conditions):
+    """Keeps the rows matching every [column, op, value] condition; values are never evaluated as code."""
+    if not isinstance(conditions, list):
+        raise ValueError("filter must be a list of [column, op, value] conditions")
+    mask = np.ones(len(df), dtype=bool)
+    for condition in conditions:
+        if not isinstance(condition, list) or len(condition) != 3:
+            raise ValueError(f"bad filter condition: {condition!r}")
+        column, op, value = condition
+        if column not in df.columns:
+            raise ValueError(f"unknown column: {column}")
+        if op not in FILTER_OPS:
+            raise ValueError(f"unknown operator {op!r}; use one of {sorted(FILTER_OPS)}")
+        if op == "in" and not isinstance(value, list):
+            raise ValueError(f"'in' needs a list of values for {column}")
+        try:
+            matched = FILTER_OPS[op](df[column], value)
+        except TypeError as e:
+            raise ValueError(f"cannot compare {column} {op} {value!r}: {e}")
+        mask &= np.asarray(matched.fillna(False), dtype=bool)
+    return df[mask]
+
+
+class SharedClipCache:
+    """Decoded clips held in named shared memory blocks, evicted LRU under a byte budget.
+
+    Each clip is decoded once, however many clients ask for it at the same
+    time; clients map the block by name and read the samples in place.
+    Evicted blocks are unlinked, and clients that still have one mapped
+    keep their view until they close it.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.blocks = OrderedDict()  # key -> (SharedMemory, samples)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.decoding = {}           # key -> Event set when the first decode finishes
+
+    def get(self, key, decode):
+        """Returns (block name, sample count) for key, calling decode() only on the first request."""
+        while True:
+            with self.lock:
+                if key in self.blocks:
+                    self.blocks.move_to_end(key)
+                    block, samples = self.blocks[key]
+                    return block.name, samples
+                event = self.decoding.get(key)
+                if event is None:
+                    event = self.decoding[key] = threading.Event()
+                    break
+            event.wait()  # Another request is decoding this clip; use its result
+
+        try:
+            samples = decode()
+            block = shared_memory.SharedMemory(create=True, size=max(1, samples.nbytes))
+            np.ndarray(samples.shape, dtype=np.float32, buffer=block.buf)[:] = samples
+            with self.lock:
+                self.blocks[key] = (block, len(samples))
+                self.total_bytes += block.size
+                self._evict_locked(keep=key)
+            return block.name, len(samples)
+        finally:
+            with self.lock:
+                self.decoding.pop(key).set()
+
+    def _evict_locked(self, keep):
+        while self.total_bytes > self.max_bytes and len(self.blocks) > 1:
+            key = next(iter(self.blocks))
+            if key == keep:
+                self.blocks.move_to_end(key)
+                continue
+            block, _ = self.blocks.pop(key)
+            self.total_bytes -= block.size
+            block.close()
+            block.unlink()
+
+    def close(self):
+        with self.lock:
+            for block, _ in self.blocks.values():
+                block.close()
+                block.unlink()
+            self.blocks.clear()
+            self.total_bytes = 0
+
+
+class DatasetService:
+    """Metadata queries and decoded clip fetches for one dataset, shared by every client."""
+
+    def __init__(self, dataset_path, cache_bytes=DEFAULT_CACHE_BYTES):
+        self.dataset_manager = DatasetManager(dataset_path)
+        self.clips = SharedClipCache(cache_bytes)
+        self.lock = threading.Lock()
+        self.generation = None
+        self.df = None
+        self.names = []
+
+    def metadata(self):
+        """Returns (etag, df, row file names), reloading only when the metadata generation moved."""
+        generation = read_generation(self.dataset_manager.dataset_path)
+        with self.lock:
+            if generation != self.generation:
+                self.df, self.generation = self.dataset_manager.load_metadata_with_generation()
+                self.names = row_files(self.df)
+            return f'"{self.generation}"', self.df, self.names
+
+    def clip(self, row, sample_rate):
+        _, _, names = self.metadata()
+        if not 0 <= row < len(names) or not names[row]:
+            raise KeyError(f"row {row} has no audio")
+        path = os.path.join(self.dataset_manager.audio_dir, names[row])
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns, sample_rate)
+        try:
+            name, samples = self.clips.get(key, lambda: decode_clip(path, sample_rate))
+        except Exception as e:
+            # librosa falls back to audioread, whose errors are not RuntimeErrors and may have no message
+            raise RuntimeError(f"{names[row]}: {type(e).__name__} {e}".strip()) from e
+        return {"shm": name, "samples": samples, "sample_rate": sample_rate, "dtype": "float32", "file": names[row]}
+
+
+class DatasetRequestHandler(BaseHTTPRequestHandler):
+    """GET /metadata[?columns=a,b&rows=0,1&filter=JSON], GET /clip/<row>[?sample_rate=N&inline=1].
+
+    filter is a JSON list of [column, op, value] conditions, e.g.
+    [["duration", ">", 30], ["genre", "in", ["rock", "pop"]]].
+    """
+
+    service = None
+    allowed_hosts = LOCAL_HOSTS
+
+    def log_message(self, format, *args):
+        logger.debug(f"Dataset server: {format % args}")
+
+    def address_string(self):
+        return str(self.client_address or "unix")
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _host_allowed(self):
+        host = self.headers.get("Host", "").lower()
+        if host.startswith("["):
+            host = host[1:host.find("]")]  # [::1]:8765
+        elif host.count(":") == 1:
+            host = host.split(":")[0]
+        if host not in self.allowed_hosts:
+            return False  # A DNS-rebound name pointing at this machine
+        # Browsers mark requests made by other sites' pages; local clients do not send the header
+        return self.headers.get("Sec-Fetch-Site", "none") in ("none", "same-origin")
+
+    def do_GET(self):
+        if not self._host_allowed():
+            self._send(403, json.dumps({"error": "forbidden"}).encode())
+            return
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/metadata":
+                self._metadata(params)
+            elif url.path.startswith("/clip/"):
+                self._clip(int(url.path.rsplit("/", 1)[1]), params)
+            else:
+                self._send(404, json.dumps({"error": "not found"}).encode())
+        except FileNotFoundError as e:
+            self._send(404, json.dumps({"error": str(e)}).encode())
+        except (KeyError, ValueError) as e:
+            self._send(400, json.dumps({"error": str(e)}).encode())
+        except RuntimeError as e:
+            # Raised by DatasetService.clip for any decoder failure
+            logger.warning(f"Dataset server could not decode {url.path}: {e}")
+            self._send(422, json.dumps({"error": f"could not decode audio: {e}"}).encode())
+        except Exception as e:
+            logger.error(f"Dataset server failed on {url.path}: {e}")
+            self._send(500, json.dumps({"error": str(e)}).encode())
+
+    def _metadata(self, params):
+        etag, df, _ = self.service.metadata()
+        # The ETag covers the whole dataset version; parameters are part of the URL the client caches under
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+        if "filter" in params:
+            df = apply_filter(df, json.loads(params["filter"]))
+        if "rows" in params:
+            df = df.iloc[[int(row) for row in params["rows"].split(",") if row]]
+        if "columns" in params:
+            df = df[params["columns"].split(",")]
+        body = json.dumps({"rows": df.index.tolist(), "records": json.loads(df.to_json(orient="records"))}).encode()
+        self._send(200, body, headers={"ETag": etag})
+
+    def _clip(self, row, params):
+        sample_rate = int(params.get("sample_rate", DEFAULT_SAMPLE_RATE))
+        info = self.service.clip(row, sample_rate)
+        if params.get("inline") == "1":
+            # For clients on another host or without access to /dev/shm
+            block = attach_shared(info["shm"])
+            try:
+                body = bytes(block.buf[:info["samples"] * 4])
+            finally:
+                block.close()
+            self._send(200, body, "application/octet-stream", {"X-Sample-Rate": str(sample_rate)})
+            return
+        self._send(200, json.dumps(info).encode())
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)  # Stale socket from a previous run
+        super().server_bind()
+
+
+def make_server(dataset_path, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None, cache_bytes=DEFAULT_CACHE_BYTES):
+    """Builds (but does not start) a server for a dataset; pass socket_path to listen on a Unix socket."""
+    handler = type("Handler", (DatasetRequestHandler,), {
+        "service": DatasetService(dataset_path, cache_bytes),
+        "allowed_hosts": LOCAL_HOSTS | {host.lower()},
+    })
+    if socket_path:
+        return UnixHTTPServer(socket_path, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path):
+        super().__init__("localhost")
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class DatasetClient:
+    """Client for a running dataset server.
+
+    metadata() revalidates with If-None-Match, so an unchanged dataset
+    costs one empty 304 response. clip() maps the server's shared memory
+    block and returns the samples without copying them.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.etags = {}   # url -> (etag, payload)
+        self.blocks = {}  # shm name -> SharedMemory kept open while its arrays are in use
+
+    def _request(self, url, headers=None):
+        connection = _UnixConnection(self.socket_path) if self.socket_path else \
+            http.client.HTTPConnection(self.host, self.port)
+        try:
+            connection.request("GET", url, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            connection.close()
+
+    def metadata(self, columns=None, rows=None, where=None):
+        """Returns {"rows": [...], "records": [...]} for the selected metadata.
+
+        where is a list of (column, op, value) conditions, e.g. [("duration", ">", 30)].
+        """
+        params = []
+        if columns:
+            params.append("columns=" + quote(",".join(columns)))
+        if rows is not None:
+            params.append("rows=" + ",".join(str(int(row)) for row in rows))
+        if where:
+            params.append("filter=" + quote(json.dumps([list(condition) for condition in where])))
+        url = "/metadata" + ("?" + "&".join(params) if params else "")
+
+        cached = self.etags.get(url)
+        status, headers, body = self._request(url, {"If-None-Match": cached[0]} if cached else None)
+        if status == 304:
+            return cached[1]
+        if status != 200:
+            raise RuntimeError(json.loads(body).get("error", f"HTTP {status}"))
+        payload = json.loads(body)
+        self.etags[url] = (headers.get("ETag"), payload)
+        return payload
+
+    def clip(self, row, sample_rate=DEFAULT_SAMPLE_RATE):
+        """Returns the decoded mono float32 samples of a row's audio as a read-only shared-memory view."""
+        for attempt in range(2):
+            status, _, body = self._request(f"/clip/{int(row)}?sample_rate={int(sample_rate)}")
+            info = json.loads(body)
+            if status != 200:
+                raise RuntimeError(info.get("error", f"HTTP {status}"))
+            if info["shm"] in self.blocks:
+                break
+            try:
+                self.blocks[info["shm"]] = attach_shared(info["shm"])
+                break
+            except FileNotFoundError:
+                if attempt:
+                    raise  # Evicted between the reply and the attach; the retry decodes it again
+        samples = np.ndarray((info["samples"],), dtype=np.float32, buffer=self.blocks[info["shm"]].buf)
+        samples.flags.writeable = False
+        return samples
+
+    def close(self):
+        for block in self.blocks.values():
+            try:
+                block.close()
+            except BufferError:
+                pass  # An array still references the mapping; it is released with that array
+        self.blocks.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an Audionomy dataset to local processes.")
+    parser.add_argument("dataset", help="Path to the dataset folder")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024),
+                        help="Shared decoded-audio cache budget in MB")
+    args = parser.parse_args()
+
+    server = make_server(args.dataset, args.host, args.port, args.socket, args.cache_mb * 1024 * 1024)
+    logger.info(f"Serving {args.dataset} on {args.socket or f'http://{args.host}:{args.port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.RequestHandlerClass.service.clips.close()
+
+
+if __name__ == "__main__":
+    main()
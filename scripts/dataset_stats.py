@@ -0,0 +1,221 @@
+# scripts/dataset_stats.py
+
+import json
+import math
+import os
+import numpy as np
+import pandas as pd
+from scripts.logger import logger
+
+STATS_FILE = "stats.json"
+MAX_CATEGORIES = 200   # Distinct values tracked per categorical column
+MAX_CATEGORY_LENGTH = 100  # Longer values (lyrics, prompts) are free text, not categories
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style log buckets).
+
+    Values fall into buckets whose bounds grow geometrically, so any
+    quantile is returned within relative_accuracy of the true value.
+    Sketches merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero = 0
+        self.count = 0
+
+    def _bucket_counts(self, values):
+        indexes = np.ceil(np.log(values) / self.log_gamma).astype(np.int64)
+        keys, counts = np.unique(indexes, return_counts=True)
+        return zip(keys.tolist(), counts.tolist())
+
+    def add(self, values):
+        """Adds an array of values."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        for store, part in ((self.positive, values[values > 0]), (self.negative, -values[values < 0])):
+            for key, count in self._bucket_counts(part):
+                store[key] = store.get(key, 0) + count
+        self.zero += int((values == 0).sum())
+        self.count += len(values)
+
+    def merge(self, other):
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """Returns the approximate q-quantile (0 <= q <= 1), or None if the sketch is empty."""
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+            "zero": self.zero,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["relative_accuracy"])
+        sketch.positive = {int(k): v for k, v in data["positive"].items()}
+        sketch.negative = {int(k): v for k, v in data["negative"].items()}
+        sketch.zero = data["zero"]
+        sketch.count = data["count"]
+        return sketch
+
+
+def _is_numeric(series):
+    """True for numeric dtypes and for object columns (e.g. appended dicts) whose non-empty values all parse as numbers."""
+    if pd.api.types.is_bool_dtype(series):
+        return False
+    if pd.api.types.is_numeric_dtype(series):
+        return True
+    if pd.api.types.is_object_dtype(series):
+        present = series.dropna()
+        present = present[present.astype(str).str.strip() != ""]
+        return len(present) > 0 and pd.to_numeric(present, errors="coerce").notna().all()
+    return False
+
+
+class DatasetStats:
+    """Running aggregates over a dataset's metadata.
+
+    Numeric columns keep count, sum, min, max and a QuantileSketch; other
+    columns keep value counts (up to MAX_CATEGORIES distinct values). The
+    aggregates are stored in <dataset>/stats.json tagged with the metadata
+    generation they describe, so readers never render stale numbers.
+
+    Only appends update the aggregates incrementally. Edits and deletes
+    rewrite the whole CSV, and min/max cannot be taken back out of a running
+    aggregate, so save_metadata rebuilds the stats in that same pass.
+    """
+
+    def __init__(self, rows=0, numeric=None, categorical=None, generation=None, columns=None):
+        self.rows = rows
+        self.columns = columns or []
+        self.numeric = numeric or {}
+        self.categorical = categorical or {}
+        self.generation = generation
+
+    @classmethod
+    def from_dataframe(cls, df, generation=None):
+        stats = cls(generation=generation)
+        stats.add_rows(df)
+        return stats
+
+    def add_rows(self, df):
+        """Merges a batch of new rows (one vectorized pass per column)."""
+        self.rows += len(df)
+        self.columns.extend(str(c) for c in df.columns if str(c) not in self.columns)
+        for column in df.columns:
+            values = df[column]
+            if column not in self.numeric and column not in self.categorical \
+                    and not (values.notna() & (values.astype(str).str.strip() != "")).any():
+                continue  # Nothing to learn the column's kind from yet
+            if column in self.categorical or not (_is_numeric(values) or column in self.numeric):
+                self._add_categorical(column, values)
+                continue
+
+            numbers = pd.to_numeric(values, errors="coerce").dropna().to_numpy(dtype=np.float64)
+            entry = self.numeric.setdefault(column, {
+                "count": 0, "sum": 0.0, "min": None, "max": None, "sketch": QuantileSketch(),
+            })
+            if len(numbers):
+                entry["count"] += len(numbers)
+                entry["sum"] += float(numbers.sum())
+                low, high = float(numbers.min()), float(numbers.max())
+                entry["min"] = low if entry["min"] is None else min(entry["min"], low)
+                entry["max"] = high if entry["max"] is None else max(entry["max"], high)
+                entry["sketch"].add(numbers)
+
+    def _add_categorical(self, column, values):
+        entry = self.categorical.setdefault(column, {"counts": {}, "missing": 0, "truncated": False})
+        strings = values.dropna().astype(str)
+        strings = strings[strings.str.strip() != ""]
+        entry["missing"] += len(values) - len(strings)
+        for value, count in strings.value_counts().items():
+            if len(value) > MAX_CATEGORY_LENGTH:
+                entry["truncated"] = True
+            elif value in entry["counts"] or len(entry["counts"]) < MAX_CATEGORIES:
+                entry["counts"][value] = entry["counts"].get(value, 0) + int(count)
+            else:
+                entry["truncated"] = True
+
+    def column(self, column):
+        """Returns count, sum, min, max and mean for a numeric column (None if untracked)."""
+        entry = self.numeric.get(column)
+        if entry is None:
+            return None
+        mean = entry["sum"] / entry["count"] if entry["count"] else None
+        return {"count": entry["count"], "sum": entry["sum"], "min": entry["min"], "max": entry["max"], "mean": mean}
+
+    def quantile(self, column, q):
+        entry = self.numeric.get(column)
+        return entry["sketch"].quantile(q) if entry else None
+
+    def value_counts(self, column):
+        """Returns {value: count} for a categorical column, most common first."""
+        entry = self.categorical.get(column)
+        if entry is None:
+            return {}
+        return dict(sorted(entry["counts"].items(), key=lambda item: item[1], reverse=True))
+
+    def to_dict(self):
+        return {
+            "generation": self.generation,
+            "rows": self.rows,
+            "columns": self.columns,
+            "numeric": {c: dict(e, sketch=e["sketch"].to_dict()) for c, e in self.numeric.items()},
+            "categorical": self.categorical,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        numeric = {c: dict(e, sketch=QuantileSketch.from_dict(e["sketch"])) for c, e in data["numeric"].items()}
+        return cls(data["rows"], numeric, data["categorical"], data.get("generation"), data.get("columns"))
+
+    @classmethod
+    def load(cls, dataset_path):
+        """Loads stored aggregates, or None if there are none."""
+        try:
+            with open(os.path.join(dataset_path, STATS_FILE), "r") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring unreadable stats for {dataset_path}: {e}")
+            return None
+
+    def save(self, dataset_path):
+        path = os.path.join(dataset_path, STATS_FILE)
+        tmp_path = f"{path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
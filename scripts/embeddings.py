@@ -0,0 +1,338 @@
+# scripts/embeddings.py
+
+import base64
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import librosa
+from scripts.dataset_lock import read_generation
+from scripts.integrity import row_files
+from scripts.logger import logger
+
+EMBEDDING_DIR = "embeddings"
+SAMPLE_RATE = 22050
+MAX_SECONDS = 600
+N_MFCC = 20
+EMBEDDING_DIM = 2 * N_MFCC + 2 * 12  # MFCC and chroma means and standard deviations
+BRUTE_FORCE_LIMIT = 50000             # Above this many clips searches go through the IVF-PQ index
+IVF_PROBES = 8
+PQ_SUBSPACES = 8
+PQ_CENTROIDS = 256
+TRAIN_SAMPLE = 20000
+RERANK_FACTOR = 10                    # Approximate candidates re-scored exactly per requested neighbour
+
+
+def clip_embedding(samples, sr):
+    """Summarizes a clip as EMBEDDING_DIM float32 values: MFCC and chroma statistics."""
+    samples = np.asarray(samples, dtype=np.float32)
+    if sr != SAMPLE_RATE:
+        samples = librosa.resample(samples, orig_sr=sr, target_sr=SAMPLE_RATE)
+    samples = samples[:MAX_SECONDS * SAMPLE_RATE]
+    if len(samples) < 2048:
+        samples = np.pad(samples, (0, 2048 - len(samples)))
+    mfcc = librosa.feature.mfcc(y=samples, sr=SAMPLE_RATE, n_mfcc=N_MFCC)
+    chroma = librosa.feature.chroma_stft(y=samples, sr=SAMPLE_RATE)
+    return np.concatenate([mfcc.mean(axis=1), mfcc.std(axis=1), chroma.mean(axis=1), chroma.std(axis=1)]).astype(np.float32)
+
+
+def embed_file(path):
+    samples, sr = librosa.load(path, sr=SAMPLE_RATE, mono=True, duration=MAX_SECONDS)
+    return clip_embedding(samples, sr)
+
+
+def assign(x, centroids, chunk=8192):
+    """Returns the index of the nearest centroid for each row of x, in chunks to bound memory."""
+    labels = np.empty(len(x), dtype=np.int64)
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    for start in range(0, len(x), chunk):
+        block = np.asarray(x[start:start + chunk], dtype=np.float32)
+        labels[start:start + chunk] = (centroid_norms[None, :] - 2 * block @ centroids.T).argmin(axis=1)
+    return labels
+
+
+def kmeans(x, k, iterations=10, seed=0):
+    """Plain Lloyd's k-means; centroids start from a random sample of rows."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        labels = assign(x, centroids)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, x)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+class IVFPQIndex:
+    """Inverted-file index with product-quantized codes for approximate k-NN.
+
+    Vectors are grouped under sqrt(n) coarse centroids; each is stored as
+    PQ_SUBSPACES one-byte codes. A search scans only the IVF_PROBES nearest
+    lists, scoring codes with per-subspace distance tables.
+    """
+
+    def __init__(self, coarse, codebooks, order, offsets, codes):
+        self.coarse = coarse
+        self.codebooks = codebooks
+        self.order = order
+        self.offsets = offsets
+        self.codes = codes
+
+    @classmethod
+    def train(cls, vectors, seed=0):
+        rng = np.random.default_rng(seed)
+        sample = vectors[np.sort(rng.choice(len(vectors), min(len(vectors), TRAIN_SAMPLE), replace=False))]
+        n_lists = max(1, int(np.sqrt(len(vectors))))
+        coarse = kmeans(sample, n_lists, seed=seed)
+        labels = assign(vectors, coarse)
+
+        width = EMBEDDING_DIM // PQ_SUBSPACES
+        codebooks = np.stack([
+            kmeans(sample[:, m * width:(m + 1) * width], PQ_CENTROIDS, seed=seed) for m in range(PQ_SUBSPACES)
+        ])
+        codes = np.stack([
+            assign(vectors[:, m * width:(m + 1) * width], codebooks[m]) for m in range(PQ_SUBSPACES)
+        ], axis=1).astype(np.uint8)
+
+        order = np.argsort(labels, kind="stable")
+        offsets = np.searchsorted(labels[order], np.arange(n_lists + 1))
+        return cls(coarse, codebooks, order, offsets, codes)
+
+    def search(self, query, k, probes=IVF_PROBES):
+        """Returns the ids of about k approximate nearest neighbours."""
+        lists = np.argsort(((self.coarse - query) ** 2).sum(axis=1))[:probes]
+        ids = np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+        width = EMBEDDING_DIM // PQ_SUBSPACES
+        tables = np.stack([
+            ((self.codebooks[m] - query[m * width:(m + 1) * width]) ** 2).sum(axis=1) for m in range(PQ_SUBSPACES)
+        ])
+        distances = tables[np.arange(PQ_SUBSPACES)[None, :], self.codes[ids]].sum(axis=1)
+        return ids[np.argsort(distances)[:k]]
+
+    def save(self, path, **extra):
+        tmp_path = f"{path}.part.npz"
+        np.savez(tmp_path, coarse=self.coarse, codebooks=self.codebooks, order=self.order,
+                 offsets=self.offsets, codes=self.codes, **extra)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["coarse"], data["codebooks"], data["order"], data["offsets"], data["codes"]), data
+
+
+class EmbeddingStore:
+    """Per-clip embeddings in a memory-mapped matrix aligned to metadata rows.
+
+    <dataset>/embeddings/vectors.npy holds one EMBEDDING_DIM row per
+    metadata row (NaN where a row has no audio), and files.json records the
+    metadata generation and the audio file and (size, mtime) behind each
+    row, plus the per-dimension mean and std used to standardize queries.
+    Embeddings computed during import wait in pending.jsonl until the next
+    sync re-aligns the matrix with the metadata.
+
+    Keep one store per dataset for repeated searches: it caches those
+    statistics and the IVF-PQ index for the current generation, so a
+    query never rescans the whole matrix.
+    """
+
+    def __init__(self, dataset_manager, max_workers=None):
+        self.dataset_manager = dataset_manager
+        self.store_dir = os.path.join(dataset_manager.dataset_path, EMBEDDING_DIR)
+        self.vectors_path = os.path.join(self.store_dir, "vectors.npy")
+        self.files_path = os.path.join(self.store_dir, "files.json")
+        self.pending_path = os.path.join(self.store_dir, "pending.jsonl")
+        self.index_path = os.path.join(self.store_dir, "ivfpq.npz")
+        self.max_workers = max_workers
+        self.summary = None  # {"generation", "count", "mean", "std"} from files.json
+        self.index = None    # (generation, IVFPQIndex, row ids, mean, std)
+
+    def _stat(self, name):
+        try:
+            stat = os.stat(os.path.join(self.dataset_manager.audio_dir, name))
+            return [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            return None
+
+    def add_pending(self, items):
+        """Appends (file name, embedding) pairs computed during import."""
+        lines = []
+        for name, vector in items:
+            stat = self._stat(name)
+            if stat is not None:
+                encoded = base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+                lines.append(json.dumps({"file": name, "stat": stat, "vector": encoded}))
+        if lines:
+            os.makedirs(self.store_dir, exist_ok=True)
+            with open(self.pending_path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+
+    def _load_files(self):
+        try:
+            with open(self.files_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def vectors(self):
+        """Returns the row-aligned embedding matrix as a read-only memory map."""
+        return np.load(self.vectors_path, mmap_mode="r")
+
+    def _summarize(self, stored):
+        self.summary = {key: stored.get(key) for key in ("generation", "count", "mean", "std")}
+
+    def _current(self, generation):
+        """Whether the stored matrix already matches this metadata generation."""
+        if os.path.exists(self.pending_path) or not os.path.exists(self.vectors_path):
+            return False
+        if self.summary is None or self.summary["generation"] != generation:
+            stored = self._load_files()
+            if not stored or "mean" not in stored:
+                return False
+            self._summarize(stored)
+        return self.summary["generation"] == generation
+
+    def sync(self, progress_callback=None, cancel_check=None):
+        """Re-aligns the matrix with the current metadata, embedding only clips it has no vector for."""
+        # Cheap check first: a repeat search on an unchanged dataset reads no metadata at all
+        if self._current(read_generation(self.dataset_manager.dataset_path)):
+            return False
+        df, generation = self.dataset_manager.load_metadata_with_generation()
+        stored = self._load_files()
+        if self._current(generation):
+            return False
+
+        # Reusable vectors, keyed by file name with the stat they were computed from
+        known = {}
+        if stored and os.path.exists(self.vectors_path):
+            old = self.vectors()
+            for row, (name, stat) in enumerate(zip(stored["files"], stored["stats"])):
+                if name and stat:
+                    known[name] = (stat, old[row])
+        if os.path.exists(self.pending_path):
+            with open(self.pending_path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        known[record["file"]] = (record["stat"], np.frombuffer(base64.b64decode(record["vector"]), dtype=np.float32))
+                    except (ValueError, KeyError):
+                        continue  # Torn final line from a crash mid-append
+
+        names = row_files(df)
+        stats = [self._stat(name) if name else None for name in names]
+        missing = sorted({name for name, stat in zip(names, stats) if stat and (name not in known or known[name][0] != stat)})
+        if missing:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+                futures = {pool.submit(embed_file, os.path.join(self.dataset_manager.audio_dir, name)): name for name in missing}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    name = futures[future]
+                    try:
+                        known[name] = (self._stat(name), future.result())
+                    except Exception as e:
+                        logger.warning(f"Could not embed {name}: {e}")
+                    if progress_callback:
+                        progress_callback(int(done / len(futures) * 100))
+                    if cancel_check and cancel_check():
+                        for pending in futures:
+                            pending.cancel()
+                        return False
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp_path = f"{self.vectors_path}.part.npy"
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(len(names), EMBEDDING_DIM))
+        matrix[:] = np.nan
+        filled = []
+        for row, (name, stat) in enumerate(zip(names, stats)):
+            if stat and name in known and known[name][0] == stat:
+                matrix[row] = known[name][1]
+                filled.append(row)
+        # Standardization statistics are computed once here, in chunks, rather than on every query
+        total = np.zeros(EMBEDDING_DIM)
+        squares = np.zeros(EMBEDDING_DIM)
+        for start in range(0, len(names), 65536):
+            block = np.asarray(matrix[start:start + 65536], dtype=np.float64)
+            block = block[~np.isnan(block[:, 0])]
+            total += block.sum(axis=0)
+            squares += (block ** 2).sum(axis=0)
+        count = max(1, len(filled))
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean ** 2, 0)) + 1e-6
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, self.vectors_path)
+
+        files = {"generation": generation, "files": names, "stats": stats,
+                 "count": len(filled), "mean": mean.tolist(), "std": std.tolist()}
+        tmp_path = f"{self.files_path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(files, f)
+        os.replace(tmp_path, self.files_path)
+        for path in (self.pending_path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._summarize(files)
+        self.index = None
+        logger.info(f"Embeddings synced for {len(names)} rows ({len(missing)} computed)")
+        return True
+
+    def search(self, query, k=10, exclude=None):
+        """Returns [(row, distance)] for the k rows nearest to query.
+
+        Vectors are standardized per dimension (with statistics stored at
+        sync) so MFCC and chroma statistics weigh in equally. Up to
+        BRUTE_FORCE_LIMIT clips the search is one vectorized pass; above it
+        an IVF-PQ index (trained once per metadata generation) proposes
+        candidates that are then re-scored exactly, so a query reads only
+        the probed lists and the candidate rows.
+        """
+        if self.summary is None and not self._current(read_generation(self.dataset_manager.dataset_path)):
+            self.sync()
+        if not self.summary["count"]:
+            return []
+        matrix = self.vectors()
+
+        raw = np.asarray(query, dtype=np.float32)
+        if self.summary["count"] <= BRUTE_FORCE_LIMIT:
+            mean = np.asarray(self.summary["mean"], dtype=np.float32)
+            std = np.asarray(self.summary["std"], dtype=np.float32)
+            query = (raw - mean) / std
+            candidates = np.flatnonzero(~np.isnan(matrix[:, 0]))
+        else:
+            index, rows, mean, std = self._ivfpq(matrix)
+            query = (raw - mean) / std
+            candidates = np.sort(rows[index.search(query, (k + 1) * RERANK_FACTOR)])
+
+        distances = ((((matrix[candidates] - mean) / std) - query) ** 2).sum(axis=1)
+        order = np.argsort(distances)
+        results = [(int(candidates[i]), float(np.sqrt(distances[i]))) for i in order if candidates[i] != exclude]
+        return results[:k]
+
+    def _ivfpq(self, matrix):
+        """Returns (index, row ids, mean, std) for the current generation, loading or training it once."""
+        generation = self.summary["generation"]
+        if self.index is not None and self.index[0] == generation:
+            return self.index[1:]
+        if os.path.exists(self.index_path):
+            index, data = IVFPQIndex.load(self.index_path)
+            if int(data["generation"]) == generation:
+                self.index = (generation, index, data["rows"], data["mean"], data["std"])
+                return self.index[1:]
+        rows = np.flatnonzero(~np.isnan(matrix[:, 0]))
+        mean = np.asarray(self.summary["mean"], dtype=np.float32)
+        std = np.asarray(self.summary["std"], dtype=np.float32)
+        logger.info(f"Training IVF-PQ index over {len(rows)} embeddings")
+        index = IVFPQIndex.train((matrix[rows] - mean) / std)
+        index.save(self.index_path, generation=np.int64(generation), rows=rows, mean=mean, std=std)
+        self.index = (generation, index, rows, mean, std)
+        return self.index[1:]
+
+    def similar_rows(self, row, k=10):
+        """Returns the k rows whose clips are most similar to the clip in row."""
+        vector = self.vectors()[row]
+        if np.isnan(vector[0]):
+            return []
+        return self.search(vector, k, exclude=row)
@@ -10,6 +10,7 @@ import time
 from datasets import Dataset, DatasetDict
 from PySide6.QtCore import QThread, Signal
 from scripts.logger import logger
+from scripts.shard_export import export_shards
 
 MAX_RETRIES = 3  # Maximum number of retries for failed cloud uploads
 
@@ -17,7 +18,7 @@ MAX_RETRIES = 3  # Maximum number of retries for failed cloud uploads
 class ExportHandler:
     """Handles dataset export to local and cloud destinations with retry logic."""
 
-    def __init__(self, dataset_path, export_options):
+    def __init__(self, dataset_path, export_options, progress_callback=None, cancel_check=None):
         self.dataset_path = dataset_path
         self.metadata_path = os.path.join(dataset_path, "metadata.csv")
         self.audio_dir = os.path.join(dataset_path, "audio")
@@ -26,6 +27,8 @@ class ExportHandler:
         self.format = export_options.get("format")
         self.include_audio = export_options.get("include_audio", True)
         self.cloud_service = export_options.get("service")
+        self.progress_callback = progress_callback
+        self.cancel_check = cancel_check
 
     def execute_export(self):
         """Determines the appropriate export method."""
@@ -55,8 +58,11 @@ class ExportHandler:
             df.to_parquet(os.path.join(self.destination, "metadata.parquet"), index=False)
         elif self.format == "ZIP Archive":
             self._export_as_zip(df)
+        elif self.format == "WebDataset Shards":
+            return self._export_as_shards(df)  # Audio goes into the shards, not an audio/ folder
 
         # Copy audio files if needed
+        missing = []
         if self.include_audio and os.path.exists(self.audio_dir):
             audio_dest = os.path.join(self.destination, "audio")
             os.makedirs(audio_dest, exist_ok=True)
@@ -64,7 +70,13 @@ class ExportHandler:
                 src_path = os.path.join(self.audio_dir, filename)
                 if os.path.exists(src_path):
                     shutil.copy2(src_path, os.path.join(audio_dest, filename))
+                else:
+                    missing.append(filename)
 
+        if missing:
+            logger.warning(f"Export skipped {len(missing)} missing audio files: {', '.join(map(str, missing[:10]))}")
+            return True, (f"Dataset exported to {self.destination}, but {len(missing)} audio files were missing. "
+                          "Run Check Integrity on the dataset to repair it.")
         return True, f"Dataset exported successfully to {self.destination}"
 
     def _export_as_zip(self, df):
@@ -83,6 +95,23 @@ class ExportHandler:
                     if os.path.exists(file_path):
                         zipf.write(file_path, os.path.join("audio", filename))
 
+    def _export_as_shards(self, df):
+        """Exports samples (audio plus a JSON metadata row) as fixed-size tar shards."""
+        summary = export_shards(
+            df, self.audio_dir, self.destination,
+            shard_bytes=self.export_options.get("shard_mb", 1024) * 1024 * 1024,
+            progress_callback=self.progress_callback,
+            cancel_check=self.cancel_check,
+        )
+        message = f"Exported {summary['samples']} samples in {summary['shards']} shards to {self.destination}"
+        if summary["shards"] < summary["planned"]:
+            return False, f"Export cancelled after {summary['shards']} of {summary['planned']} shards."
+        if summary["missing"]:
+            logger.warning(f"Shard export skipped {len(summary['missing'])} missing audio files")
+            return True, (f"{message}, but {len(summary['missing'])} audio files were missing. "
+                          "Run Check Integrity on the dataset to repair it.")
+        return True, message
+
     def export_to_cloud(self):
         """Exports dataset to the selected cloud service with retry mechanism."""
         if self.cloud_service == "Hugging Face":
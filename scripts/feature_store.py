@@ -0,0 +1,245 @@
+# scripts/feature_store.py
+
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import librosa
+from scripts.dataset_lock import DatasetLock
+from scripts.integrity import referenced_files
+from scripts.logger import logger
+
+FEATURE_DIR = "features"
+INDEX_FILE = "index.json"
+SAMPLE_RATE = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+FEATURES = {"mfcc": 20, "mel": 64, "chroma": 12}  # kind -> values per frame
+CHUNK_FRAMES = 1 << 18  # Frames per chunk file (~1.7 hours of audio)
+WRITE_BATCH = 50        # Clips per index write during a bulk update
+
+
+def frame_features(samples, sr):
+    """Computes per-frame MFCC, log-mel and chroma features, each shaped (frames, dim) float32."""
+    samples = np.asarray(samples, dtype=np.float32)
+    if sr != SAMPLE_RATE:
+        samples = librosa.resample(samples, orig_sr=sr, target_sr=SAMPLE_RATE)
+    mel = librosa.power_to_db(librosa.feature.melspectrogram(
+        y=samples, sr=SAMPLE_RATE, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=FEATURES["mel"]))
+    features = {
+        "mel": mel,
+        "mfcc": librosa.feature.mfcc(S=mel, n_mfcc=FEATURES["mfcc"]),
+        "chroma": librosa.feature.chroma_stft(y=samples, sr=SAMPLE_RATE, n_fft=N_FFT, hop_length=HOP_LENGTH),
+    }
+    frames = min(values.shape[1] for values in features.values())
+    return {kind: np.ascontiguousarray(values[:, :frames].T, dtype=np.float32) for kind, values in features.items()}
+
+
+def extract_file(path):
+    samples, sr = librosa.load(path, sr=SAMPLE_RATE, mono=True)
+    return frame_features(samples, sr)
+
+
+class FeatureStore:
+    """Frame-level features for every clip, in chunked memory-mapped arrays.
+
+    Each feature kind has its own chunk files in <dataset>/features/<kind>/,
+    each a (capacity, dim) float32 .npy. A clip's frames are written
+    contiguously into one chunk, and index.json maps each clip to
+    (chunk, start, frames) plus the (size, mtime) of the audio it came
+    from, so a reader gets a clip as a zero-copy slice of a memory map.
+
+    Chunks are append-only and the index is replaced atomically after the
+    data is flushed, so readers never need the writer lock. Clips whose
+    audio changed or disappeared leave dead frames behind, which are
+    reclaimed by rewriting the live clips once they outnumber them.
+    """
+
+    def __init__(self, dataset_manager, max_workers=None):
+        self.dataset_manager = dataset_manager
+        self.store_dir = os.path.join(dataset_manager.dataset_path, FEATURE_DIR)
+        self.index_path = os.path.join(self.store_dir, INDEX_FILE)
+        self.max_workers = max_workers
+        self.maps = {}  # (kind, chunk name) -> read-only memmap
+        self.index = self.load_index()
+
+    def _empty_index(self):
+        return {
+            "sample_rate": SAMPLE_RATE, "hop_length": HOP_LENGTH, "features": FEATURES,
+            "next_chunk": 0, "chunks": [], "clips": {}, "dead_frames": 0,
+        }
+
+    def load_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return self._empty_index()
+        if index.get("features") != FEATURES or index.get("hop_length") != HOP_LENGTH:
+            logger.info("Feature parameters changed; the feature store will be rebuilt")
+            return self._empty_index()
+        return index
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _chunk_path(self, kind, name):
+        return os.path.join(self.store_dir, kind, f"{name}.npy")
+
+    def _stat(self, name):
+        try:
+            stat = os.stat(os.path.join(self.dataset_manager.audio_dir, name))
+            return [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            return None
+
+    # Reading
+
+    def clips(self):
+        """Returns the names of every clip with stored features."""
+        return list(self.index["clips"])
+
+    def get(self, name, kind="mfcc"):
+        """Returns a clip's (frames, dim) features as a read-only view into the chunk memmap, or None."""
+        entry = self.index["clips"].get(name)
+        if entry is None:
+            return None
+        chunk, start, frames = entry[:3]
+        key = (kind, chunk)
+        if key not in self.maps:
+            self.maps[key] = np.load(self._chunk_path(kind, chunk), mmap_mode="r")
+        return self.maps[key][start:start + frames]
+
+    def refresh(self):
+        """Picks up clips written by other processes since this store was opened."""
+        self.index = self.load_index()
+
+    # Writing
+
+    def _new_chunk(self, capacity):
+        name = f"chunk_{self.index['next_chunk']:05d}"
+        self.index["next_chunk"] += 1
+        for kind, dim in FEATURES.items():
+            os.makedirs(os.path.join(self.store_dir, kind), exist_ok=True)
+            np.lib.format.open_memmap(self._chunk_path(kind, name), mode="w+", dtype=np.float32, shape=(capacity, dim)).flush()
+        self.index["chunks"].append({"name": name, "capacity": capacity, "used": 0})
+        return self.index["chunks"][-1]
+
+    def _write(self, items, writable):
+        """Appends (name, stat, features) clips to the chunks; call with the writer lock held."""
+        for name, stat, features in items:
+            frames = len(features["mfcc"])
+            if name in self.index["clips"]:
+                self.index["dead_frames"] += self.index["clips"][name][2]
+            chunk = self.index["chunks"][-1] if self.index["chunks"] else None
+            if chunk is None or chunk["capacity"] - chunk["used"] < frames:
+                chunk = self._new_chunk(max(CHUNK_FRAMES, frames))
+            start = chunk["used"]
+            for kind in FEATURES:
+                key = (kind, chunk["name"])
+                if key not in writable:
+                    writable[key] = np.load(self._chunk_path(kind, chunk["name"]), mmap_mode="r+")
+                writable[key][start:start + frames] = features[kind]
+            chunk["used"] += frames
+            self.index["clips"][name] = [chunk["name"], start, frames, *stat]
+
+    def add(self, items):
+        """Stores features for (file name, features) pairs, e.g. an import batch."""
+        items = [(name, self._stat(name), features) for name, features in items]
+        items = [item for item in items if item[1] is not None]
+        if not items:
+            return 0
+        os.makedirs(self.store_dir, exist_ok=True)
+        with DatasetLock(self.store_dir, timeout=None):
+            self.index = self.load_index()  # Another writer may have appended meanwhile
+            writable = {}
+            self._write(items, writable)
+            for array in writable.values():
+                array.flush()
+            self._save_index()
+        return len(items)
+
+    def stale(self):
+        """Returns referenced clips whose features are missing or came from different audio."""
+        names = []
+        for name in referenced_files(self.dataset_manager.get_metadata()):
+            stat = self._stat(name)
+            entry = self.index["clips"].get(name)
+            if stat is not None and (entry is None or entry[3:] != stat):
+                names.append(name)
+        return names
+
+    def _drop_missing(self):
+        """Forgets clips that are no longer referenced or whose audio is gone."""
+        referenced = referenced_files(self.dataset_manager.get_metadata())
+        with DatasetLock(self.store_dir, timeout=None):
+            self.index = self.load_index()
+            gone = [name for name in self.index["clips"] if name not in referenced or self._stat(name) is None]
+            for name in gone:
+                self.index["dead_frames"] += self.index["clips"].pop(name)[2]
+            if gone:
+                self._save_index()
+        return len(gone)
+
+    def update(self, progress_callback=None, cancel_check=None):
+        """Extracts features for every stale clip across a process pool; returns how many were stored."""
+        if os.path.isdir(self.store_dir):
+            self._drop_missing()
+        names = self.stale()
+        stored, batch = 0, []
+        if names:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+                futures = {pool.submit(extract_file, os.path.join(self.dataset_manager.audio_dir, name)): name for name in names}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        batch.append((futures[future], future.result()))
+                    except Exception as e:
+                        logger.warning(f"Could not extract features for {futures[future]}: {e}")
+                    if len(batch) >= WRITE_BATCH:
+                        stored += self.add(batch)
+                        batch = []
+                    if progress_callback:
+                        progress_callback(int(done / len(futures) * 100))
+                    if cancel_check and cancel_check():
+                        for pending in futures:
+                            pending.cancel()
+                        break
+            stored += self.add(batch)
+
+        live = sum(entry[2] for entry in self.index["clips"].values())
+        if self.index["dead_frames"] > max(live, CHUNK_FRAMES):
+            self.rewrite()
+        return stored
+
+    def rewrite(self):
+        """Copies live clips into fresh chunks and deletes the old ones, reclaiming dead frames."""
+        with DatasetLock(self.store_dir, timeout=None):
+            old = self.load_index()
+            self.index = dict(self._empty_index(), next_chunk=old["next_chunk"])
+            self.maps = {}
+            readers = {}
+            writable = {}
+            for name, entry in old["clips"].items():
+                chunk, start, frames = entry[:3]
+                features = {}
+                for kind in FEATURES:
+                    if (kind, chunk) not in readers:
+                        readers[(kind, chunk)] = np.load(self._chunk_path(kind, chunk), mmap_mode="r")
+                    features[kind] = readers[(kind, chunk)][start:start + frames]
+                self._write([(name, entry[3:], features)], writable)
+            for array in writable.values():
+                array.flush()
+            self._save_index()
+
+            for chunk in old["chunks"]:
+                for kind in FEATURES:
+                    try:
+                        os.remove(self._chunk_path(kind, chunk["name"]))
+                    except OSError:
+                        pass
+        logger.info(f"Feature store rewritten: {old['dead_frames']} dead frames reclaimed")
@@ -0,0 +1,274 @@
+# scripts/fingerprint.py
+
+import base64
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import librosa
+from scripts.integrity import referenced_files
+from scripts.logger import logger
+
+FINGERPRINT_DIR = "fingerprints"
+INDEX_FILE = "minhash.jsonl"
+SAMPLE_RATE = 11025
+MAX_SECONDS = 600        # Longer clips are fingerprinted from their first ten minutes
+NUM_HASHES = 64          # MinHash permutations per clip
+BANDS = 16               # LSH bands of NUM_HASHES // BANDS rows; pairs above ~0.5 similarity collide
+DUPLICATE_THRESHOLD = 0.6
+MAX_BUCKET = 200         # Larger buckets (silence, test tones) are skipped in the dedup report
+
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240501)  # Fixed so signatures stay comparable across runs
+_HASH_A = _rng.integers(1, int(_PRIME), NUM_HASHES, dtype=np.uint64)
+_HASH_B = _rng.integers(0, int(_PRIME), NUM_HASHES, dtype=np.uint64)
+
+
+def chroma_tokens(samples, sr):
+    """Turns audio into a set of 24-bit chroma tokens.
+
+    Each frame's 12 chroma bins become a 12-bit code (bin i louder than bin
+    i+1), and consecutive codes are paired. Re-encodes, small gain changes
+    and trims keep most tokens, which is what makes the set comparison
+    robust where byte hashes are not.
+    """
+    if sr != SAMPLE_RATE:
+        samples = librosa.resample(samples, orig_sr=sr, target_sr=SAMPLE_RATE)
+    samples = samples[:MAX_SECONDS * SAMPLE_RATE]
+    if len(samples) < 4096:
+        return np.zeros(0, dtype=np.uint64)
+
+    chroma = librosa.feature.chroma_stft(y=samples, sr=SAMPLE_RATE, n_fft=4096, hop_length=2048)
+    bits = (chroma > np.roll(chroma, -1, axis=0)).astype(np.uint64)
+    codes = (bits << np.arange(12, dtype=np.uint64)[:, None]).sum(axis=0)
+    loud = chroma.max(axis=0) > 0
+    codes = codes[loud] if loud.any() else codes
+    if len(codes) < 2:
+        return np.unique(codes)
+    return np.unique((codes[:-1] << np.uint64(12)) | codes[1:])
+
+
+def minhash(tokens):
+    """Returns the NUM_HASHES-value MinHash signature of a token set (uint32), or None for an empty set.
+
+    Clips too short or too quiet to yield tokens would otherwise all share
+    one signature and match each other perfectly.
+    """
+    if len(tokens) == 0:
+        return None
+    hashed = (_HASH_A[:, None] * tokens[None, :] + _HASH_B[:, None]) % _PRIME
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def fingerprint_audio(samples, sr):
+    """Fingerprints already-decoded mono audio, e.g. the samples loaded during import."""
+    return minhash(chroma_tokens(np.asarray(samples, dtype=np.float32), sr))
+
+
+def fingerprint_file(path):
+    samples, sr = librosa.load(path, sr=SAMPLE_RATE, mono=True, duration=MAX_SECONDS)
+    return fingerprint_audio(samples, sr)
+
+
+def band_keys(signatures):
+    """Hashes each band of each signature to one uint64 key, shape (clips, BANDS)."""
+    rows = signatures.reshape(len(signatures), BANDS, NUM_HASHES // BANDS).astype(np.uint64)
+    keys = np.zeros(rows.shape[:2], dtype=np.uint64)
+    for r in range(rows.shape[2]):
+        keys = keys * np.uint64(1000003) ^ rows[:, :, r]
+    return keys
+
+
+class FingerprintIndex:
+    """MinHash fingerprints of a dataset's clips with a banded LSH index.
+
+    Signatures are appended to <dataset>/fingerprints/minhash.jsonl together
+    with the (size, mtime) of the audio they describe; the latest record for
+    a file wins. For lookups each band's keys are kept sorted, so a query
+    is a binary search per band and a whole-dataset report only compares
+    clips that share a bucket.
+    """
+
+    def __init__(self, dataset_manager, max_workers=None):
+        self.dataset_manager = dataset_manager
+        self.index_dir = os.path.join(dataset_manager.dataset_path, FINGERPRINT_DIR)
+        self.index_path = os.path.join(self.index_dir, INDEX_FILE)
+        self.max_workers = max_workers
+        self.records = {}   # file -> (stat signature, minhash)
+        self.names = []
+        self.signatures = np.zeros((0, NUM_HASHES), dtype=np.uint32)
+        self.sorted_keys = None
+        self.sorted_ids = None
+        self.load()
+
+    def load(self):
+        self.records = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        encoded = record["minhash"]
+                        signature = None if encoded is None else np.frombuffer(base64.b64decode(encoded), dtype=np.uint32)
+                    except (ValueError, KeyError):
+                        continue  # Torn final line from a crash mid-append
+                    self.records[record["file"]] = (record["stat"], signature)
+        self._rebuild()
+
+    def _rebuild(self):
+        # Clips recorded without a signature are known (not stale) but never match anything
+        self.names = [name for name, record in self.records.items() if record[1] is not None]
+        self.signatures = np.array([self.records[name][1] for name in self.names], dtype=np.uint32).reshape(-1, NUM_HASHES)
+        keys = band_keys(self.signatures)
+        self.sorted_ids = np.argsort(keys, axis=0, kind="stable")
+        self.sorted_keys = np.take_along_axis(keys, self.sorted_ids, axis=0)
+
+    def _stat(self, name):
+        stat = os.stat(os.path.join(self.dataset_manager.audio_dir, name))
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def add(self, items):
+        """Appends (file name, minhash) pairs, e.g. from an import batch, and updates the index.
+
+        A None minhash records the clip as having no fingerprint, so it is
+        not re-fingerprinted on every update and never reported as a duplicate.
+        """
+        records = []
+        for name, signature in items:
+            try:
+                stat = self._stat(name)
+            except OSError:
+                continue
+            self.records[name] = (stat, signature)
+            encoded = None if signature is None else base64.b64encode(np.asarray(signature, dtype=np.uint32).tobytes()).decode()
+            records.append(json.dumps({"file": name, "stat": stat, "minhash": encoded}))
+        if not records:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self.index_path, "a") as f:
+            f.write("\n".join(records) + "\n")
+        self._rebuild()
+
+    def stale(self):
+        """Returns referenced clips with no fingerprint or one taken from different audio."""
+        names = []
+        for name in referenced_files(self.dataset_manager.get_metadata()):
+            try:
+                stat = self._stat(name)
+            except OSError:
+                continue
+            if name not in self.records or self.records[name][0] != stat:
+                names.append(name)
+        return names
+
+    def update(self, progress_callback=None, cancel_check=None):
+        """Fingerprints every stale clip across a process pool; returns how many were added."""
+        names = self.stale()
+        if not names:
+            return 0
+
+        added, count = [], 0
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(fingerprint_file, os.path.join(self.dataset_manager.audio_dir, name)): name
+                for name in names
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    signature = future.result()
+                    added.append((futures[future], signature))
+                    count += signature is not None
+                except Exception as e:
+                    logger.warning(f"Could not fingerprint {futures[future]}: {e}")
+                if len(added) >= 500:
+                    self.add(added)  # Checkpoint so an interrupted run keeps its progress
+                    added = []
+                if progress_callback:
+                    progress_callback(int(done / len(futures) * 100))
+                if cancel_check and cancel_check():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        self.add(added)
+        return count
+
+    def query(self, signature, threshold=DUPLICATE_THRESHOLD, exclude=None):
+        """Returns [(file, similarity)] for indexed clips sharing an LSH bucket and above threshold."""
+        if not self.names or signature is None:
+            return []
+        keys = band_keys(np.asarray(signature, dtype=np.uint32)[None, :])[0]
+        candidates = set()
+        for band in range(BANDS):
+            column = self.sorted_keys[:, band]
+            start, end = np.searchsorted(column, keys[band], "left"), np.searchsorted(column, keys[band], "right")
+            candidates.update(self.sorted_ids[start:end, band].tolist())
+
+        ids = np.array(sorted(candidates), dtype=np.int64)
+        if not len(ids):
+            return []
+        similarity = (self.signatures[ids] == signature).mean(axis=1)
+        matches = [(self.names[i], float(s)) for i, s in zip(ids, similarity) if s >= threshold and self.names[i] != exclude]
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def similar_to(self, name, threshold=DUPLICATE_THRESHOLD):
+        if name not in self.records:
+            return []
+        return self.query(self.records[name][1], threshold, exclude=name)
+
+    def candidate_pairs(self):
+        """Returns (i, j) index pairs that collide in at least one band."""
+        pairs = []
+        for band in range(BANDS):
+            keys, ids = self.sorted_keys[:, band], self.sorted_ids[:, band]
+            if len(keys) < 2:
+                continue
+            starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+            sizes = np.diff(np.append(starts, len(keys)))
+            for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+                if size > MAX_BUCKET:
+                    continue
+                members = np.sort(ids[start:start + size])
+                i, j = np.triu_indices(size, k=1)
+                pairs.append(np.stack([members[i], members[j]], axis=1))
+        if not pairs:
+            return np.zeros((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(pairs), axis=0)
+
+    def duplicate_report(self, threshold=DUPLICATE_THRESHOLD):
+        """Groups referenced clips whose estimated similarity is at least threshold.
+
+        Returns {"clips", "candidates", "pairs": [(a, b, similarity)], "groups": [[files]]}.
+        """
+        referenced = set(referenced_files(self.dataset_manager.get_metadata()))
+        pairs = self.candidate_pairs()
+        similarity = (self.signatures[pairs[:, 0]] == self.signatures[pairs[:, 1]]).mean(axis=1)
+        keep = similarity >= threshold
+        matches = [
+            (self.names[i], self.names[j], float(s))
+            for (i, j), s in zip(pairs[keep], similarity[keep])
+            if self.names[i] in referenced and self.names[j] in referenced
+        ]
+
+        # Union-find over matching pairs gives the duplicate groups
+        parent = {}
+
+        def find(name):
+            while parent.setdefault(name, name) != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        for a, b, _ in matches:
+            parent[find(a)] = find(b)
+        groups = {}
+        for name in parent:
+            groups.setdefault(find(name), []).append(name)
+
+        return {
+            "clips": len(referenced),
+            "candidates": len(pairs),
+            "pairs": sorted(matches, key=lambda match: match[2], reverse=True),
+            "groups": sorted((sorted(group) for group in groups.values()), key=len, reverse=True),
+        }
@@ -0,0 +1,196 @@
+# scripts/ingest_job.py
+
+import datetime
+import json
+import os
+import shutil
+import uuid
+from scripts.logger import logger
+
+
+class IngestJob:
+    """Persistent, resumable batch import of audio files into a dataset.
+
+    Each job lives in <dataset>/jobs/<job_id>/ as a manifest of inputs plus
+    an append-only progress log. Rows are committed in batches: a "commit"
+    intent record is written before the metadata write and a "done" record
+    after it, so a crash between the two can be reconciled on resume
+    without duplicating rows.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+    PROGRESS_FILE = "progress.jsonl"
+
+    def __init__(self, dataset_manager, job_id):
+        self.dataset_manager = dataset_manager
+        self.job_id = job_id
+        self.job_dir = os.path.join(dataset_manager.jobs_dir, job_id)
+        self.manifest_path = os.path.join(self.job_dir, self.MANIFEST_FILE)
+        self.progress_path = os.path.join(self.job_dir, self.PROGRESS_FILE)
+
+        self.inputs = []
+        self.options = {}
+        self.output_dir = dataset_manager.audio_dir
+        self.created_at = None
+        self.done = {}          # input path -> audio_file
+        self.failed = {}        # input path -> error message
+        self.uncommitted = {}   # input path -> audio_file from an interrupted commit
+
+    @classmethod
+    def create(cls, dataset_manager, file_paths, options=None, output_dir=None):
+        """Writes a new job manifest and returns the job."""
+        job = cls(dataset_manager, datetime.datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:8])
+        job.inputs = list(dict.fromkeys(os.path.abspath(path) for path in file_paths))
+        job.options = options or {}
+        job.output_dir = output_dir or dataset_manager.audio_dir
+        job.created_at = datetime.datetime.now().isoformat()
+
+        os.makedirs(job.job_dir, exist_ok=True)
+        manifest = {
+            "job_id": job.job_id,
+            "created_at": job.created_at,
+            "output_dir": job.output_dir,
+            "options": job.options,
+            "inputs": job.inputs,
+        }
+        tmp_path = f"{job.manifest_path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, job.manifest_path)
+        logger.info(f"Created ingest job {job.job_id} with {len(job.inputs)} files")
+        return job
+
+    @classmethod
+    def load(cls, dataset_manager, job_id):
+        """Loads a job and replays its progress log."""
+        job = cls(dataset_manager, job_id)
+        with open(job.manifest_path, "r") as f:
+            manifest = json.load(f)
+        job.inputs = manifest["inputs"]
+        job.options = manifest.get("options", {})
+        job.output_dir = manifest.get("output_dir", dataset_manager.audio_dir)
+        job.created_at = manifest.get("created_at")
+        job._replay()
+        return job
+
+    @classmethod
+    def find_resumable(cls, dataset_manager):
+        """Returns every unfinished job stored in the dataset, oldest first."""
+        if not os.path.isdir(dataset_manager.jobs_dir):
+            return []
+
+        jobs = []
+        for job_id in sorted(os.listdir(dataset_manager.jobs_dir)):
+            try:
+                job = cls.load(dataset_manager, job_id)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable ingest job {job_id}: {e}")
+                continue
+            if not job.is_complete:
+                jobs.append(job)
+        return jobs
+
+    def _replay(self):
+        if not os.path.exists(self.progress_path):
+            return
+
+        with open(self.progress_path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from a crash mid-append
+                event = record.get("event")
+                if event == "commit":
+                    self.uncommitted.update(record["files"])
+                elif event == "done":
+                    for path in record["inputs"]:
+                        self.done[path] = self.uncommitted.pop(path, None)
+                elif event == "failed":
+                    self.failed[record["input"]] = record.get("error", "")
+
+        if self.uncommitted:
+            self._reconcile()
+
+    def _reconcile(self):
+        """Resolves a commit interrupted between its intent record and its done record."""
+        metadata = self.dataset_manager.load_metadata()
+        written = set(metadata["audio_file"].astype(str)) if "audio_file" in metadata.columns else set()
+        landed = [path for path, audio_file in self.uncommitted.items() if audio_file in written]
+        if landed:
+            self._append({"event": "done", "inputs": landed})
+            for path in landed:
+                self.done[path] = self.uncommitted.pop(path)
+        logger.info(f"Ingest job {self.job_id}: reconciled {len(landed)} rows from an interrupted commit")
+        self.uncommitted.clear()
+
+    def _append(self, record):
+        os.makedirs(self.job_dir, exist_ok=True)
+        with open(self.progress_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @property
+    def pending(self):
+        """Inputs that still need processing."""
+        return [path for path in self.inputs if path not in self.done and path not in self.failed]
+
+    @property
+    def is_complete(self):
+        return not self.pending
+
+    def commit(self, results):
+        """Commits a batch of (input_path, entry) results with one metadata write.
+
+        Rows that fail template validation are marked failed instead of being
+        written. Returns the number of rows committed.
+        """
+        if not results:
+            return 0
+
+        _, errors = self.dataset_manager.validate_entries([entry for _, entry in results])
+        if errors:
+            messages = {}
+            for error in errors:
+                messages.setdefault(error["row"], []).append(f"{error['column']}: {error['error']}")
+            for row, message in messages.items():
+                self.mark_failed(results[row][0], "; ".join(message))
+            results = [result for i, result in enumerate(results) if i not in messages]
+            if not results:
+                return 0
+
+        self._append({"event": "commit", "files": {path: entry.get("audio_file") for path, entry in results}})
+        if not self.dataset_manager.append_entries([entry for _, entry in results]):
+            return 0
+        self._append({"event": "done", "inputs": [path for path, _ in results]})
+        for path, entry in results:
+            self.done[path] = entry.get("audio_file")
+        return len(results)
+
+    def mark_failed(self, file_path, error):
+        """Records a file that could not be processed so resume skips it."""
+        self._append({"event": "failed", "input": file_path, "error": str(error)})
+        self.failed[file_path] = str(error)
+
+    def discard(self):
+        """Deletes the job's manifest and progress log."""
+        shutil.rmtree(self.job_dir, ignore_errors=True)
+
+
+def unfinished_since(dataset_manager):
+    """Returns when the oldest unfinished ingest job started (epoch seconds), or None if there is none.
+
+    Audio files that arrived after this may belong to a batch that is
+    copied but not yet committed, so they are not orphans yet.
+    """
+    started = [
+        datetime.datetime.fromisoformat(job.created_at).timestamp()
+        for job in IngestJob.find_resumable(dataset_manager) if job.created_at
+    ]
+    return min(started) if started else None
+
+
+def arrived_at(stat):
+    """When a file landed in the dataset; copy2 keeps the source mtime, so the later of mtime and ctime."""
+    return max(stat.st_mtime, stat.st_ctime)
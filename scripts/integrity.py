@@ -0,0 +1,237 @@
+# scripts/integrity.py
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+import soundfile as sf
+import mutagen
+from scripts import dataset_manifest
+from scripts.ingest_job import unfinished_since, arrived_at
+from scripts.logger import logger
+
+AUDIO_COLUMNS = ["filename", "audio_file", "audio_file_1", "audio_file_2"]
+CACHE_FILE = "integrity_cache.json"
+QUARANTINE_DIR = "quarantine"
+
+# Issue kind -> suggested one-click fix
+SUGGESTED_FIXES = {
+    "missing": "remove_rows",
+    "empty": "quarantine",
+    "unreadable": "quarantine",
+    "truncated": "quarantine",
+    "hash_mismatch": "quarantine",
+    "orphan": "register",
+}
+
+
+def referenced_files(df):
+    """Maps each audio file named in the metadata to the (row, column) pairs that reference it."""
+    references = {}
+    for column in [c for c in AUDIO_COLUMNS if c in df.columns]:
+        values = df[column]
+        for row, name in zip(values.index[values.notna()], values[values.notna()].astype(str)):
+            if name.strip():
+                references.setdefault(os.path.basename(name), []).append((int(row), column))
+    return references
+
+
+def row_files(df):
+    """Returns each metadata row's primary audio file name ("" when the row has none)."""
+    names = pd.Series("", index=df.index, dtype=object)
+    for column in reversed([c for c in AUDIO_COLUMNS if c in df.columns]):
+        values = df[column].astype("string").fillna("").str.strip()
+        present = values != ""
+        names[present] = values[present].map(os.path.basename)
+    return names.tolist()
+
+
+def check_file(path, known_leaf=None, verify_hash=False):
+    """Runs stat, header-decode, tail-decode and (optionally) hash checks on one file.
+
+    known_leaf is the file's manifest entry [size, mtime_ns, sha256]; the hash
+    is only compared when size and mtime still match it, which is exactly the
+    case where a content change means silent corruption.
+    Returns (kind, detail) for a problem, or (None, "") if the file is healthy.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "missing", "file does not exist"
+    if stat.st_size == 0:
+        return "empty", "file is zero bytes"
+
+    try:
+        info = sf.info(path)
+    except RuntimeError:
+        # Not a libsndfile format; fall back to a container header parse
+        try:
+            if mutagen.File(path) is None:
+                return "unreadable", "unrecognized audio format"
+        except Exception as e:
+            return "unreadable", str(e)
+    else:
+        # Decoding the final frames catches files cut short after the header was written
+        try:
+            with sf.SoundFile(path) as f:
+                if f.frames > 0:
+                    f.seek(max(0, f.frames - 1024))
+                    if len(f.read(1024)) == 0:
+                        return "truncated", f"declared {info.frames} frames but the tail is unreadable"
+        except RuntimeError as e:
+            return "truncated", str(e)
+
+    if verify_hash and known_leaf and known_leaf[:2] == [stat.st_size, stat.st_mtime_ns]:
+        with open(path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        if digest != known_leaf[2]:
+            return "hash_mismatch", "content differs from the manifest hash"
+    return None, ""
+
+
+class IntegrityScanner:
+    """Parallel dataset fsck: checks every referenced audio file and finds orphans."""
+
+    def __init__(self, dataset_manager, max_workers=4):
+        self.dataset_manager = dataset_manager
+        self.max_workers = max_workers
+        self.cache_path = os.path.join(dataset_manager.dataset_path, CACHE_FILE)
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        tmp_path = f"{self.cache_path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def scan(self, incremental=True, verify_hashes=False, progress_callback=None, cancel_check=None):
+        """Scans the dataset and returns a structured report.
+
+        In incremental mode files whose size and mtime match the last clean
+        scan are skipped. verify_hashes re-reads content and compares it with
+        the stored manifest to catch silent corruption; it implies a full scan.
+        """
+        incremental = incremental and not verify_hashes
+        audio_dir = self.dataset_manager.audio_dir
+        df = self.dataset_manager.load_metadata()
+        references = referenced_files(df)
+
+        manifest = dataset_manifest.load_manifest(self.dataset_manager.dataset_path) or {}
+        known_leaves = {
+            name: leaf
+            for bucket in manifest.get("audio", {}).get("buckets", {}).values()
+            for name, leaf in bucket["files"].items()
+        }
+
+        cache = self._load_cache() if incremental else {}
+        on_disk = set(os.listdir(audio_dir)) if os.path.isdir(audio_dir) else set()
+
+        to_check, skipped = [], 0
+        for name in references:
+            path = os.path.join(audio_dir, name)
+            cached = cache.get(name)
+            if cached and name in on_disk:
+                stat = os.stat(path)
+                if cached == [stat.st_size, stat.st_mtime_ns]:
+                    skipped += 1
+                    continue
+            to_check.append(name)
+
+        issues = []
+        new_cache = {name: value for name, value in cache.items() if name in references}
+        total = len(to_check)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(check_file, os.path.join(audio_dir, name), known_leaves.get(name), verify_hashes): name
+                for name in to_check
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                kind, detail = future.result()
+                if kind:
+                    new_cache.pop(name, None)
+                    issues.append(self._issue(kind, name, detail, references[name]))
+                else:
+                    stat = os.stat(os.path.join(audio_dir, name))
+                    new_cache[name] = [stat.st_size, stat.st_mtime_ns]
+                if progress_callback:
+                    progress_callback(int(done / total * 100))
+                if cancel_check and cancel_check():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+        # Files newer than the oldest unfinished import may be copied but not yet committed
+        started = unfinished_since(self.dataset_manager)
+        for name in sorted(on_disk - set(references)):
+            if name.endswith(".part"):
+                continue
+            if started is not None and arrived_at(os.stat(os.path.join(audio_dir, name))) >= started:
+                continue
+            issues.append(self._issue("orphan", name, "file has no metadata row", []))
+
+        self._save_cache(new_cache)
+        report = {
+            "dataset": self.dataset_manager.dataset_path,
+            "scanned_at": datetime.datetime.now().isoformat(),
+            "referenced": len(references),
+            "checked": total,
+            "skipped_unchanged": skipped,
+            "issues": sorted(issues, key=lambda issue: (issue["kind"], issue["file"])),
+        }
+        logger.info(f"Integrity scan of {report['dataset']}: {len(issues)} issues ({total} checked, {skipped} unchanged)")
+        return report
+
+    def _issue(self, kind, name, detail, refs):
+        return {
+            "kind": kind,
+            "file": name,
+            "detail": detail,
+            "rows": [row for row, _ in refs],
+            "columns": sorted({column for _, column in refs}),
+            "fix": SUGGESTED_FIXES[kind],
+        }
+
+    def apply_fixes(self, issues):
+        """Applies each issue's suggested fix and returns a count per fix."""
+        counts = {}
+        quarantine_dir = os.path.join(self.dataset_manager.dataset_path, QUARANTINE_DIR)
+        files_to_drop = set()
+        orphans = []
+
+        for issue in issues:
+            fix = issue["fix"]
+            if fix == "remove_rows":
+                files_to_drop.add(issue["file"])
+            elif fix == "quarantine":
+                os.makedirs(quarantine_dir, exist_ok=True)
+                src = os.path.join(self.dataset_manager.audio_dir, issue["file"])
+                if os.path.exists(src):
+                    shutil.move(src, os.path.join(quarantine_dir, issue["file"]))
+                files_to_drop.add(issue["file"])
+            elif fix == "register":
+                orphans.append(issue["file"])
+            counts[fix] = counts.get(fix, 0) + 1
+
+        if files_to_drop:
+            # Rows may have moved since the scan, so match them by the files they reference now
+            def drop(df):
+                references = referenced_files(df)
+                rows = {row for name in files_to_drop for row, _ in references.get(name, [])}
+                return df.drop(index=list(rows)).reset_index(drop=True) if rows else None
+
+            self.dataset_manager.modify_metadata(drop)
+        if orphans:
+            counts["register"], rejected = self.dataset_manager.register_audio_files(orphans)
+            if rejected:
+                counts["register rejected"] = len(rejected)
+        return counts
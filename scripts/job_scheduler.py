@@ -0,0 +1,216 @@
+# scripts/job_scheduler.py
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from PySide6.QtCore import QObject, QThreadPool, Signal
+from scripts.app_settings import get_settings
+from scripts.logger import logger
+
+PRIORITY_INTERACTIVE = 0  # Short probes the user is waiting on
+PRIORITY_BATCH = 10       # Imports, exports and other background batches
+
+THROUGHPUT_WINDOW = 60.0  # Seconds of completions used for the throughput figure
+
+
+class ScheduledTask(QObject):
+    """Base class for work run by the JobScheduler. Subclasses implement run().
+
+    Signals are emitted from a pool thread and delivered to GUI slots through
+    queued connections, exactly as they were from the old per-task QThreads.
+    """
+
+    progress_updated = Signal(int)
+    task_finished = Signal()
+
+    priority = PRIORITY_BATCH
+    name = "Task"
+
+    def __init__(self, name=None, priority=None):
+        super().__init__()
+        if name is not None:
+            self.name = name
+        if priority is not None:
+            self.priority = priority
+        self.state = "queued"
+        self.progress = 0
+        self.cancel_requested = False
+        self.done_event = threading.Event()
+        self.progress_updated.connect(self._record_progress)
+
+    def run(self):
+        raise NotImplementedError
+
+    def cancel(self):
+        """Requests a clean stop; long-running subclasses check cancel_requested between items."""
+        self.cancel_requested = True
+
+    def is_running(self):
+        return self.state == "running"
+
+    def wait(self, timeout=None):
+        """Blocks until the task has finished or been cancelled."""
+        return self.done_event.wait(timeout)
+
+    def _record_progress(self, value):
+        self.progress = value
+
+
+class FunctionTask(ScheduledTask):
+    """Runs a plain callable and emits its result or error."""
+
+    result_ready = Signal(object)
+    error_raised = Signal(str)
+
+    def __init__(self, fn, *args, name=None, priority=None, **kwargs):
+        super().__init__(name=name or getattr(fn, "__name__", "Task"), priority=priority)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            self.result_ready.emit(self.fn(*self.args, **self.kwargs))
+        except Exception as e:
+            logger.error(f"Task {self.name} failed: {e}")
+            self.error_raised.emit(str(e))
+
+
+class JobScheduler(QObject):
+    """Central priority scheduler for all background work within a worker budget.
+
+    Interactive tasks always dispatch before batch tasks, and batch tasks may
+    use at most max_workers - 1 slots so a probe never queues behind a long
+    import or export. With a budget of one worker, batch work keeps that
+    worker and interactive work gets one extra reserved slot.
+    """
+
+    stats_changed = Signal(dict)
+
+    def __init__(self, max_workers=4):
+        super().__init__()
+        self.max_workers = max(1, max_workers)
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(self._capacity())
+        self.lock = threading.Lock()
+        self.queue = []  # heap of (priority, sequence, task)
+        self.sequence = itertools.count()
+        self.running = set()
+        self.completed = 0
+        self.completion_times = deque()
+
+    def set_max_workers(self, max_workers):
+        """Changes the worker budget; extra slots are used immediately."""
+        with self.lock:
+            self.max_workers = max(1, max_workers)
+            self.pool.setMaxThreadCount(self._capacity())
+        self._dispatch()
+
+    def submit(self, task):
+        """Queues a task and starts it as soon as a slot is free."""
+        with self.lock:
+            task.state = "queued"
+            heapq.heappush(self.queue, (task.priority, next(self.sequence), task))
+        logger.debug(f"Queued task {task.name} (priority {task.priority})")
+        self._dispatch()
+        return task
+
+    def run_function(self, fn, *args, on_result=None, on_error=None, name=None, priority=PRIORITY_BATCH, **kwargs):
+        """Convenience wrapper scheduling a callable; pass PRIORITY_INTERACTIVE for short work the user waits on."""
+        task = FunctionTask(fn, *args, name=name, priority=priority, **kwargs)
+        if on_result:
+            task.result_ready.connect(on_result)
+        if on_error:
+            task.error_raised.connect(on_error)
+        return self.submit(task)
+
+    def cancel(self, task):
+        """Removes a queued task or asks a running one to stop."""
+        with self.lock:
+            queued = [entry for entry in self.queue if entry[2] is task]
+            for entry in queued:
+                self.queue.remove(entry)
+            heapq.heapify(self.queue)
+
+        if queued:
+            task.state = "cancelled"
+            task.done_event.set()
+            task.task_finished.emit()
+            self._emit_stats()
+        else:
+            task.cancel()
+
+    def _batch_limit(self):
+        return max(1, self.max_workers - 1)
+
+    def _capacity(self):
+        """Total slots: the worker budget, or one batch slot plus one reserved interactive slot."""
+        return max(self.max_workers, self._batch_limit() + 1)
+
+    def _dispatch(self):
+        to_start = []
+        with self.lock:
+            deferred = []
+            while self.queue and len(self.running) < self._capacity():
+                entry = heapq.heappop(self.queue)
+                task = entry[2]
+                batch_running = sum(1 for t in self.running if t.priority >= PRIORITY_BATCH)
+                if task.priority >= PRIORITY_BATCH and batch_running >= self._batch_limit():
+                    deferred.append(entry)  # Keep one slot free for interactive work
+                    continue
+                task.state = "running"
+                self.running.add(task)
+                to_start.append(task)
+            for entry in deferred:
+                heapq.heappush(self.queue, entry)
+
+        for task in to_start:
+            self.pool.start(lambda task=task: self._run(task))
+        self._emit_stats()
+
+    def _run(self, task):
+        try:
+            task.run()
+        except Exception as e:
+            logger.error(f"Task {task.name} crashed: {e}")
+        finally:
+            with self.lock:
+                self.running.discard(task)
+                self.completed += 1
+                self.completion_times.append(time.monotonic())
+            task.state = "cancelled" if task.cancel_requested else "finished"
+            task.done_event.set()
+            task.task_finished.emit()
+            self._dispatch()
+
+    def stats(self):
+        """Returns queue depth, running tasks and recent throughput."""
+        with self.lock:
+            now = time.monotonic()
+            while self.completion_times and now - self.completion_times[0] > THROUGHPUT_WINDOW:
+                self.completion_times.popleft()
+            return {
+                "queued": [(task.name, task.priority) for _, _, task in sorted(self.queue)],
+                "running": [(task.name, task.priority, task.progress) for task in self.running],
+                "max_workers": self.max_workers,
+                "completed": self.completed,
+                "throughput": len(self.completion_times) * 60.0 / THROUGHPUT_WINDOW,
+            }
+
+    def _emit_stats(self):
+        self.stats_changed.emit(self.stats())
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Returns the application-wide scheduler, sized from the Max Threads setting."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(get_settings().value("max_threads", 4, type=int))
+        return _scheduler
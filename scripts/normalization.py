@@ -0,0 +1,191 @@
+# scripts/normalization.py
+
+import os
+import numpy as np
+from scipy.signal import lfilter
+from scripts.audio_encoder import AudioEncoder, BlockStream, BLOCK_SIZE
+from scripts.logger import logger
+
+
+def k_weighting_filters(sample_rate):
+    """Returns the two ITU-R BS.1770 K-weighting biquads for a sample rate."""
+    # Stage 1: high shelf modelling the acoustic effect of the head
+    gain_db, f0, q = 3.999843853973347, 1681.974450955533, 0.7071752369554196
+    k = np.tan(np.pi * f0 / sample_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0]
+    shelf_a = [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    # Stage 2: RLB high-pass
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = np.tan(np.pi * f0 / sample_rate)
+    a0 = 1 + k / q + k * k
+    highpass_b = [1.0, -2.0, 1.0]
+    highpass_a = [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    return (shelf_b, shelf_a), (highpass_b, highpass_a)
+
+
+def channel_weights(channels):
+    """Returns BS.1770 channel weights for a WAV-ordered layout.
+
+    Front channels are unity and surround channels +1.5 dB (1.41). In 5.1
+    and 7.1 (L, R, C, LFE, ...) the LFE channel is excluded; 4 channels
+    are taken as quad (L, R, Ls, Rs).
+    """
+    if channels == 4:
+        return np.array([1.0, 1.0, 1.41, 1.41])
+    weights = np.array([1.0 if ch < 3 else 1.41 for ch in range(channels)])
+    if channels in (6, 8):
+        weights[3] = 0.0
+    return weights
+
+
+class LoudnessMeter:
+    """Accumulates sample peak and BS.1770 integrated loudness over streamed blocks."""
+
+    HOP_SECONDS = 0.1  # Gating blocks are 400 ms with 75% overlap, i.e. four 100 ms hops
+    ABSOLUTE_GATE = -70.0
+    RELATIVE_GATE = -10.0
+
+    def __init__(self, sample_rate, channels):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.hop = max(1, int(round(sample_rate * self.HOP_SECONDS)))
+        self.peak = 0.0
+        self.frames = 0
+
+        (self.shelf_b, self.shelf_a), (self.hp_b, self.hp_a) = k_weighting_filters(sample_rate)
+        self.shelf_state = np.zeros((2, channels))
+        self.hp_state = np.zeros((2, channels))
+
+        self.weights = channel_weights(channels)
+
+        self.pending = np.zeros((0, channels))
+        self.hop_energies = []
+
+    def process(self, block):
+        """Feeds a (frames, channels) float block into the meter."""
+        if len(block) == 0:
+            return
+        self.frames += len(block)
+        self.peak = max(self.peak, float(np.max(np.abs(block))))
+
+        filtered, self.shelf_state = lfilter(self.shelf_b, self.shelf_a, block, axis=0, zi=self.shelf_state)
+        filtered, self.hp_state = lfilter(self.hp_b, self.hp_a, filtered, axis=0, zi=self.hp_state)
+
+        squared = np.concatenate([self.pending, filtered ** 2])
+        full_hops = len(squared) // self.hop
+        if full_hops:
+            hops = squared[:full_hops * self.hop].reshape(full_hops, self.hop, self.channels)
+            self.hop_energies.append(hops.sum(axis=1))
+        self.pending = squared[full_hops * self.hop:]
+
+    @property
+    def peak_db(self):
+        """Sample peak in dBFS."""
+        return 20 * np.log10(self.peak) if self.peak > 0 else -np.inf
+
+    @property
+    def integrated_lufs(self):
+        """Gated integrated loudness in LUFS."""
+        if not self.hop_energies:
+            # Clip shorter than one hop: fall back to ungated mean power
+            if len(self.pending) == 0:
+                return -np.inf
+            power = self.pending.mean(axis=0)
+            return self._loudness(power)
+
+        hops = np.concatenate(self.hop_energies)
+        if len(hops) < 4:
+            return self._loudness(hops.sum(axis=0) / (len(hops) * self.hop))
+
+        # Sum each window of four consecutive hops into one 400 ms gating block
+        cumulative = np.vstack([np.zeros(self.channels), np.cumsum(hops, axis=0)])
+        blocks = (cumulative[4:] - cumulative[:-4]) / (4 * self.hop)
+        block_loudness = -0.691 + 10 * np.log10(np.maximum(blocks @ self.weights, 1e-20))
+
+        gated = blocks[block_loudness > self.ABSOLUTE_GATE]
+        if len(gated) == 0:
+            return -np.inf
+        relative_gate = self._loudness(gated.mean(axis=0)) + self.RELATIVE_GATE
+        gated = blocks[(block_loudness > self.ABSOLUTE_GATE) & (block_loudness > relative_gate)]
+        if len(gated) == 0:
+            return -np.inf
+        return self._loudness(gated.mean(axis=0))
+
+    def _loudness(self, power):
+        weighted = float(np.dot(power, self.weights))
+        return -0.691 + 10 * np.log10(weighted) if weighted > 0 else -np.inf
+
+
+class StreamingNormalizer:
+    """Two-pass block-streamed normalizer: the first pass measures, the second applies gain and encodes."""
+
+    MODES = ["peak", "lufs"]
+    DEFAULT_TARGETS = {"peak": -1.0, "lufs": -14.0}
+
+    def __init__(self, mode="peak", target_level=None, peak_ceiling=-1.0, block_size=BLOCK_SIZE):
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported normalization mode: {mode}")
+        self.mode = mode
+        self.target_level = self.DEFAULT_TARGETS[mode] if target_level is None else float(target_level)
+        self.peak_ceiling = peak_ceiling
+        self.block_size = block_size
+
+    def measure(self, stream):
+        """First pass: streams the audio once and returns its peak and loudness."""
+        meter = LoudnessMeter(stream.sample_rate, stream.channels)
+        for block in stream:
+            meter.process(block)
+
+        return {
+            "sample_rate": meter.sample_rate,
+            "channels": meter.channels,
+            "frames": meter.frames,
+            "peak_db": meter.peak_db,
+            "lufs": meter.integrated_lufs,
+        }
+
+    def compute_gain_db(self, measurement):
+        """Returns the gain that brings a measured file to the target level."""
+        if self.mode == "peak":
+            level = measurement["peak_db"]
+        else:
+            level = measurement["lufs"]
+
+        if not np.isfinite(level):
+            return 0.0  # Digital silence: leave untouched
+
+        gain_db = self.target_level - level
+        if self.mode == "lufs" and np.isfinite(measurement["peak_db"]):
+            # Never push the sample peak above the ceiling to reach a loudness target
+            gain_db = min(gain_db, self.peak_ceiling - measurement["peak_db"])
+        return gain_db
+
+    def normalize_file(self, file_path, output_path, target_format=None, encoder=None):
+        """Normalizes a file into output_path, returning (output_path, measurement)."""
+        target_format = (target_format or os.path.splitext(output_path)[1].lstrip(".")).lower()
+        encoder = encoder or AudioEncoder()
+        stream = BlockStream(file_path, block_size=self.block_size)
+
+        measurement = self.measure(stream)
+        gain_db = self.compute_gain_db(measurement)
+        measurement["gain_db"] = gain_db
+        logger.debug(f"Normalizing {file_path}: {self.mode} target {self.target_level}, gain {gain_db:+.2f} dB")
+
+        # Second pass: stream the source again, scaling each block on its way into the encoder
+        encoder.encode_blocks(
+            self._apply_gain(stream, gain_db), stream.sample_rate, stream.channels,
+            output_path, target_format, stream.subtype,
+        )
+        return output_path, measurement
+
+    def _apply_gain(self, stream, gain_db):
+        scale = np.float32(10 ** (gain_db / 20))
+        for block in stream:
+            block *= scale
+            np.clip(block, -1.0, 1.0, out=block)
+            yield block
@@ -0,0 +1,141 @@
+# scripts/plotly_figures.py
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scripts.chart_data import get_chart_cache, prepare_chart
+from scripts.dataset_lock import read_generation
+from scripts.logger import logger
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".audionomy", "cache", "figures")
+SCATTERGL_THRESHOLD = 5000  # Above this many points traces switch to WebGL
+MAX_RAW_BARS = 200          # Larger bar charts are aggregated first
+HISTOGRAM_BINS = 60
+MEMORY_ENTRIES = 32
+DISK_ENTRIES = 256
+
+CHART_KINDS = ["bar", "scatter", "line", "histogram"]
+
+
+def _trace_type(points):
+    return "scattergl" if points > SCATTERGL_THRESHOLD else "scatter"
+
+
+def build_figure(df, kind, x, y=None, title=None):
+    """Builds a Plotly figure whose payload stays small however many rows df has."""
+    figure = go.Figure()
+
+    if kind == "histogram":
+        values = pd.to_numeric(df[x], errors="coerce").dropna().to_numpy(dtype=np.float64)
+        counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+        figure.add_bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), marker_color="#3498db")
+    elif kind == "bar":
+        if len(df) <= MAX_RAW_BARS:
+            figure.add_bar(x=df[x].astype(str), y=df[y], marker_color="#3498db")
+        else:
+            spec = prepare_chart(df, x, y, "Bar Chart")
+            figure.add_bar(x=spec["labels"], y=spec["values"], marker_color="#3498db")
+    elif kind in ("scatter", "line"):
+        if kind == "scatter":
+            # Every point is kept; large scatters are drawn on the GPU via scattergl
+            xs = pd.to_numeric(df[x], errors="coerce")
+            ys = pd.to_numeric(df[y], errors="coerce")
+            valid = xs.notna() & ys.notna()
+            spec = {"x": xs[valid].to_numpy(dtype=np.float64), "y": ys[valid].to_numpy(dtype=np.float64)}
+        else:
+            spec = prepare_chart(df, x, y, "Line Chart")
+        mode = "markers" if kind == "scatter" else "lines"
+        trace = {"type": _trace_type(len(spec["x"])), "x": spec["x"], "y": spec["y"], "mode": mode}
+        if kind == "scatter":
+            trace["marker"] = {"size": 4, "color": "#3498db"}
+        figure.add_trace(trace)
+    else:
+        raise ValueError(f"Unsupported chart kind: {kind}")
+
+    figure.update_layout(
+        title=title or (f"{y} by {x}" if y else f"Distribution of {x}"),
+        xaxis_title=x, yaxis_title=y or "count", margin=dict(l=50, r=20, t=50, b=50),
+    )
+    return figure
+
+
+class FigureCache:
+    """Figure JSON cached per (dataset, metadata generation, chart parameters).
+
+    Recent figures stay in memory and every figure is also written to disk,
+    so reopening an unchanged dataset renders without touching its metadata.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _key(self, dataset_path, generation, params):
+        # The metadata file's size and mtime guard against a recreated dataset reusing old generations
+        try:
+            stat = os.stat(os.path.join(dataset_path, "metadata.csv"))
+            version = [generation, stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            version = [generation]
+        raw = json.dumps([os.path.abspath(dataset_path), version, params], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get_figure_json(self, dataset_manager, kind, x, y=None, title=None):
+        """Returns the figure as a JSON string, building it only if this dataset version has not been drawn."""
+        generation = read_generation(dataset_manager.dataset_path)
+        params = {"kind": kind, "x": x, "y": y, "title": title}
+        key = self._key(dataset_manager.dataset_path, generation, params)
+        path = os.path.join(self.cache_dir, f"{key}.json")
+
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                figure_json = f.read()
+            os.utime(path)
+        else:
+            _, df = get_chart_cache().get_frame(dataset_manager)
+            figure_json = build_figure(df, kind, x, y, title).to_json()
+            tmp_path = f"{path}.part"
+            with open(tmp_path, "w") as f:
+                f.write(figure_json)
+            os.replace(tmp_path, path)
+            self._trim_disk()
+            logger.debug(f"Built {kind} figure for {dataset_manager.dataset_path} (generation {generation})")
+
+        with self.lock:
+            self.memory[key] = figure_json
+            while len(self.memory) > MEMORY_ENTRIES:
+                self.memory.popitem(last=False)
+        return figure_json
+
+    def _trim_disk(self):
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".json")]
+        if len(entries) <= DISK_ENTRIES:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - DISK_ENTRIES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_figure_cache = None
+
+
+def get_figure_cache():
+    """Returns the process-wide figure cache."""
+    global _figure_cache
+    if _figure_cache is None:
+        _figure_cache = FigureCache()
+    return _figure_cache
@@ -0,0 +1,173 @@
+# scripts/shard_export.py
+
+import io
+import json
+import os
+import tarfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from scripts.integrity import AUDIO_COLUMNS
+from scripts.logger import logger
+
+SHARD_PATTERN = "shard-{:06d}.tar"
+INDEX_FILE = "index.jsonl"
+SHARDS_FILE = "shards.json"
+DEFAULT_SHARD_BYTES = 1024 * 1024 * 1024  # Shards close once they would pass ~1 GB
+DEFAULT_SHARD_SAMPLES = 10000
+BLOCK = tarfile.BLOCKSIZE
+
+
+def sample_files(df, audio_dir):
+    """Returns [(row, [(member suffix, path, size, mtime)])] for rows whose audio exists, plus missing names.
+
+    A row's first audio column becomes "<ext>" and any further ones
+    "<column>.<ext>", so WebDataset readers see the primary clip under its
+    plain extension.
+    """
+    columns = [c for c in AUDIO_COLUMNS if c in df.columns]
+    samples, missing = [], []
+    for position, values in enumerate(df[columns].itertuples(index=False, name=None)):
+        files = []
+        for column, value in zip(columns, values):
+            if not isinstance(value, str) or not value.strip():
+                continue
+            name = os.path.basename(value.strip())
+            path = os.path.join(audio_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                missing.append(name)
+                continue
+            ext = os.path.splitext(name)[1].lstrip(".").lower() or "bin"
+            suffix = ext if not files else f"{column}.{ext}"
+            files.append((suffix, path, stat.st_size, int(stat.st_mtime)))
+        if files:
+            samples.append((position, files))
+    return samples, missing
+
+
+def member_bytes(size):
+    """Bytes a regular member of size bytes occupies in a tar: one header block plus padded data."""
+    return BLOCK + -(-size // BLOCK) * BLOCK
+
+
+def plan_shards(samples, shard_bytes=DEFAULT_SHARD_BYTES, shard_samples=DEFAULT_SHARD_SAMPLES):
+    """Splits samples, in order, into shards of at most shard_samples samples and about shard_bytes bytes.
+
+    Sizes come from stat, so every shard is known before any is written and
+    all of them can be written at once. A single sample larger than
+    shard_bytes gets a shard of its own.
+    """
+    shards, current, current_bytes = [], [], 0
+    for sample in samples:
+        # The per-sample JSON is small; a block for it and its header is a close enough estimate
+        size = sum(member_bytes(file[2]) for file in sample[1]) + 2 * BLOCK
+        if current and (current_bytes + size > shard_bytes or len(current) >= shard_samples):
+            shards.append(current)
+            current, current_bytes = [], 0
+        current.append(sample)
+        current_bytes += size
+    if current:
+        shards.append(current)
+    return shards
+
+
+def write_shard(path, samples, records):
+    """Writes one tar shard atomically and returns its index entries.
+
+    Each entry is {"key", "row", "files": {member: [data offset, size]}},
+    where the offset is the byte position of the member's data in the shard,
+    so a reader can fetch one sample with a ranged read.
+    """
+    entries = []
+    tmp_path = f"{path}.part"
+    with tarfile.open(tmp_path, "w", format=tarfile.PAX_FORMAT) as tar:
+        for row, files in samples:
+            key = f"{row:09d}"
+            # Open every audio file before writing anything, so a sample whose file vanished
+            # after planning is skipped whole instead of leaving its JSON without audio
+            handles = []
+            try:
+                for suffix, file_path, _, mtime in files:
+                    handles.append((f"{key}.{suffix}", open(file_path, "rb"), mtime))
+            except OSError as e:
+                for _, f, _ in handles:
+                    f.close()
+                logger.warning(f"Skipping row {row} in {os.path.basename(path)}: {e}")
+                continue
+
+            data = json.dumps(records[row], default=str).encode()
+            members = [(f"{key}.json", io.BytesIO(data), len(data), files[0][3])]
+            members += [(name, f, os.fstat(f.fileno()).st_size, mtime) for name, f, mtime in handles]
+            offsets = {}
+            try:
+                for name, f, size, mtime in members:
+                    info = tarfile.TarInfo(name)
+                    info.mtime = mtime
+                    info.size = size
+                    tar.addfile(info, f)
+                    # addfile leaves the stream just past the padded data, whatever the header length was
+                    offsets[name] = [tar.offset - -(-size // BLOCK) * BLOCK, size]
+            finally:
+                for _, f, _ in handles:
+                    f.close()
+            entries.append({"key": key, "row": row, "files": offsets})
+    os.replace(tmp_path, path)
+    return entries
+
+
+def export_shards(df, audio_dir, destination, shard_bytes=DEFAULT_SHARD_BYTES, shard_samples=DEFAULT_SHARD_SAMPLES,
+                  max_workers=None, progress_callback=None, cancel_check=None):
+    """Exports metadata rows with audio as WebDataset-style tar shards written in parallel.
+
+    Each sample is "<row>.json" (its metadata row) followed by its audio
+    files. destination gets shard-NNNNNN.tar files, shards.json (one entry
+    per shard) and index.jsonl (one line per sample with its shard and
+    member offsets). Returns a summary dict.
+    """
+    os.makedirs(destination, exist_ok=True)
+    records = df.astype(object).where(df.notna(), None).to_dict("records")
+    samples, missing = sample_files(df, audio_dir)
+    shards = plan_shards(samples, shard_bytes, shard_samples)
+    names = [SHARD_PATTERN.format(i) for i in range(len(shards))]
+    logger.info(f"Writing {len(samples)} samples to {len(shards)} shards in {destination}")
+
+    results = {}
+    # Shard writing is file copying, which releases the GIL, so threads keep every disk busy
+    with ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1)) as pool:
+        futures = {
+            pool.submit(write_shard, os.path.join(destination, name), shard, records): name
+            for name, shard in zip(names, shards)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if progress_callback:
+                progress_callback(int(done / len(futures) * 100))
+            if cancel_check and cancel_check():
+                for pending in futures:
+                    pending.cancel()
+                break
+    # Shards that were already being written when a cancel arrived still finish; index them too
+    for future, name in futures.items():
+        if name not in results and future.done() and not future.cancelled():
+            results[name] = future.result()
+
+    written = [name for name in names if name in results]
+    with open(os.path.join(destination, INDEX_FILE), "w") as f:
+        for name in written:
+            for entry in results[name]:
+                f.write(json.dumps(dict(entry, shard=name)) + "\n")
+    with open(os.path.join(destination, SHARDS_FILE), "w") as f:
+        json.dump({
+            "format": "webdataset",
+            "shards": [
+                {"name": name, "samples": len(results[name]), "bytes": os.path.getsize(os.path.join(destination, name))}
+                for name in written
+            ],
+        }, f, indent=2)
+
+    return {
+        "shards": len(written),
+        "planned": len(shards),
+        "samples": sum(len(results[name]) for name in written),
+        "missing": missing,
+    }
@@ -0,0 +1,232 @@
+# scripts/spectrogram_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import librosa
+import soundfile as sf
+from PySide6.QtCore import Signal
+from scripts.job_scheduler import ScheduledTask, PRIORITY_INTERACTIVE
+from scripts.logger import logger
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".audionomy", "cache", "spectrogram")
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+TILE_FRAMES = 512   # STFT frames per tile (~6 s at 44.1 kHz)
+FLOOR_DB = -120.0
+
+
+def _read_segment(path, start, count):
+    """Reads count mono samples starting at sample start, decoding only that span where possible."""
+    try:
+        with sf.SoundFile(path) as f:
+            f.seek(start)
+            samples = f.read(count, dtype="float32", always_2d=True)
+        return samples.mean(axis=1)
+    except RuntimeError:
+        # Formats libsndfile cannot seek in are decoded from the offset instead
+        sr = librosa.get_samplerate(path)
+        samples, _ = librosa.load(path, sr=None, mono=True, offset=start / sr, duration=count / sr)
+        return samples
+
+
+class SpectrogramCache:
+    """Per-file cache of log-mel magnitude tiles stored as .npy chunks.
+
+    Each file's spectrogram is split into tiles of TILE_FRAMES frames, each
+    computed from just the samples it covers and saved as its own float16
+    .npy file. Tiles are opened memory-mapped, so a view over a long
+    recording only reads the tiles it shows. Entries are evicted least
+    recently used under a byte budget.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def info(self, path):
+        """Returns the layout of a file's spectrogram, creating its cache entry if needed.
+
+        Entries are keyed by path, size, mtime and STFT parameters, so an
+        edited file gets a fresh entry and the old one ages out.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        raw = json.dumps([path, stat.st_size, stat.st_mtime_ns, N_FFT, HOP_LENGTH, N_MELS, TILE_FRAMES])
+        key = hashlib.sha256(raw.encode()).hexdigest()
+        entry_dir = self._entry_dir(key)
+        info_path = os.path.join(entry_dir, "info.json")
+
+        try:
+            with open(info_path, "r") as f:
+                info = json.load(f)
+            os.utime(info_path)  # Mark as recently used
+            return info
+        except (OSError, ValueError):
+            pass
+
+        try:
+            file_info = sf.info(path)
+            sample_rate, samples = file_info.samplerate, file_info.frames
+        except RuntimeError:
+            sample_rate = librosa.get_samplerate(path)
+            samples = int(librosa.get_duration(path=path) * sample_rate)
+
+        frames = 1 + max(0, samples - N_FFT) // HOP_LENGTH
+        info = {
+            "key": key,
+            "path": path,
+            "sample_rate": sample_rate,
+            "samples": samples,
+            "frames": frames,
+            "tiles": -(-frames // TILE_FRAMES),
+            "hop_length": HOP_LENGTH,
+            "n_mels": N_MELS,
+            "tile_frames": TILE_FRAMES,
+        }
+        os.makedirs(entry_dir, exist_ok=True)
+        tmp_path = f"{info_path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(info, f)
+        os.replace(tmp_path, info_path)
+        return info
+
+    def tile_path(self, info, index):
+        return os.path.join(self._entry_dir(info["key"]), f"tile_{index:06d}.npy")
+
+    def load_tile(self, info, index):
+        """Returns a tile as a read-only memory map, or None if it has not been computed."""
+        try:
+            return np.load(self.tile_path(info, index), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+    def compute_tile(self, info, index):
+        """Computes and stores one tile from the samples it covers."""
+        path = self.tile_path(info, index)
+        if os.path.exists(path):
+            return path
+
+        first_frame = index * TILE_FRAMES
+        frames = min(TILE_FRAMES, info["frames"] - first_frame)
+        count = (frames - 1) * HOP_LENGTH + N_FFT
+        samples = _read_segment(info["path"], first_frame * HOP_LENGTH, count)
+        if len(samples) < count:
+            samples = np.pad(samples, (0, count - len(samples)))
+
+        mel = librosa.feature.melspectrogram(
+            y=samples, sr=info["sample_rate"], n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=N_MELS, center=False,
+        )
+        tile = np.maximum(librosa.power_to_db(mel, ref=1.0, top_db=None), FLOOR_DB).astype(np.float16)
+
+        tmp_path = f"{path}.part"
+        with open(tmp_path, "wb") as f:
+            np.save(f, tile[:, :frames])
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            if self.total_bytes is not None:
+                self.total_bytes += os.path.getsize(path)
+            self._evict_locked(keep=info["key"])
+        return path
+
+    def read(self, path, start_frame=0, end_frame=None):
+        """Returns the dB spectrogram for a frame range, computing any missing tiles."""
+        info = self.info(path)
+        end_frame = info["frames"] if end_frame is None else min(end_frame, info["frames"])
+        first, last = start_frame // TILE_FRAMES, max(start_frame, end_frame - 1) // TILE_FRAMES
+        tiles = []
+        for index in range(first, last + 1):
+            self.compute_tile(info, index)
+            tiles.append(self.load_tile(info, index))
+        offset = first * TILE_FRAMES
+        return np.concatenate(tiles, axis=1)[:, start_frame - offset:end_frame - offset], info
+
+    def _entries(self):
+        """Yields (entry_dir, last_used, size) for every cached file."""
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, key)
+                try:
+                    size = sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+                    yield entry_dir, os.path.getmtime(os.path.join(entry_dir, "info.json")), size
+                except OSError:
+                    pass
+
+    def _evict_locked(self, keep=None):
+        if self.total_bytes is None:
+            self.total_bytes = sum(entry[2] for entry in self._entries())
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        # Evict down to 90% of the budget so eviction scans stay rare
+        goal = int(self.max_bytes * 0.9)
+        for entry_dir, _, size in sorted(self._entries(), key=lambda entry: entry[1]):
+            if self.total_bytes <= goal:
+                break
+            if os.path.basename(entry_dir) == keep:
+                continue  # Never evict the file being viewed
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            self.total_bytes -= size
+        logger.info(f"Spectrogram cache trimmed to {self.total_bytes / (1024 * 1024):.1f} MB")
+
+    def clear(self):
+        """Removes every cached spectrogram."""
+        with self.lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.total_bytes = 0
+
+
+class SpectrogramTileTask(ScheduledTask):
+    """Computes a list of tiles in the background, emitting each index as it lands."""
+
+    tile_ready = Signal(int)
+
+    name = "Spectrogram tiles"
+    priority = PRIORITY_INTERACTIVE
+
+    def __init__(self, cache, info, indexes):
+        super().__init__()
+        self.cache = cache
+        self.info = info
+        self.indexes = list(indexes)
+
+    def run(self):
+        for index in self.indexes:
+            if self.cancel_requested:
+                break
+            try:
+                self.cache.compute_tile(self.info, index)
+                self.tile_ready.emit(index)
+            except Exception as e:
+                logger.warning(f"Spectrogram tile {index} of {self.info['path']} failed: {e}")
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_spectrogram_cache(max_bytes=None):
+    """Returns the process-wide spectrogram cache, updating its byte budget if given."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SpectrogramCache()
+        if max_bytes is not None:
+            _shared_cache.max_bytes = max_bytes
+        return _shared_cache
@@ -0,0 +1,166 @@
+# scripts/thumbnails.py
+
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import soundfile as sf
+import librosa
+import matplotlib
+from matplotlib.image import imsave
+from scripts.integrity import referenced_files
+from scripts.logger import logger
+
+THUMBNAIL_DIR = "thumbnails"
+INDEX_FILE = "index.json"
+THUMBNAIL_SIZE = (160, 40)  # width, height in pixels
+WAVEFORM_COLOR = (0x34, 0x98, 0xdb, 0xff)
+KINDS = ["waveform", "spectrogram"]
+
+
+def _load_mono(path):
+    try:
+        samples, sr = sf.read(path, dtype="float32", always_2d=True)
+        return samples.mean(axis=1), sr
+    except RuntimeError:
+        return librosa.load(path, sr=None, mono=True)
+
+
+def rasterize_waveform(samples, size=THUMBNAIL_SIZE, color=WAVEFORM_COLOR):
+    """Draws a min/max waveform straight into an RGBA array, one envelope per pixel column."""
+    width, height = size
+    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+    if len(samples) == 0:
+        return rgba
+
+    columns = np.array_split(samples, width)
+    lows = np.array([c.min() if len(c) else 0.0 for c in columns])
+    highs = np.array([c.max() if len(c) else 0.0 for c in columns])
+    peak = max(float(np.abs(samples).max()), 1e-9)
+
+    # Row 0 is the top of the image; amplitude +peak maps to row 0
+    def to_row(value):
+        return np.clip(((1 - value / peak) / 2 * (height - 1)).round(), 0, height - 1).astype(np.int64)
+
+    top, bottom = to_row(highs), to_row(lows)
+    rows = np.arange(height)[:, None]
+    rgba[(rows >= top) & (rows <= bottom)] = color
+    return rgba
+
+
+def rasterize_spectrogram(samples, sr, size=THUMBNAIL_SIZE):
+    """Maps a coarse log-mel spectrogram onto an RGBA array through the magma colormap."""
+    width, height = size
+    n_fft = 2048
+    hop = max(256, len(samples) // width)
+    if len(samples) < n_fft:
+        samples = np.pad(samples, (0, n_fft - len(samples)))
+    mel = librosa.feature.melspectrogram(y=samples, sr=sr, n_fft=n_fft, hop_length=hop, n_mels=height)
+    db = librosa.power_to_db(mel, ref=np.max, top_db=80.0)
+
+    # Resample the frame axis to exactly width columns
+    picks = np.linspace(0, db.shape[1] - 1, width).round().astype(np.int64)
+    normalized = (db[::-1, picks] + 80.0) / 80.0
+    return (matplotlib.colormaps["magma"](normalized) * 255).astype(np.uint8)
+
+
+def render_file(audio_path, outputs):
+    """Renders the thumbnails for one clip. Runs in a worker process, so it never touches pyplot.
+
+    outputs maps kind ("waveform"/"spectrogram") to the PNG path to write.
+    """
+    samples, sr = _load_mono(audio_path)
+    images = {"waveform": lambda: rasterize_waveform(samples), "spectrogram": lambda: rasterize_spectrogram(samples, sr)}
+    for kind, path in outputs.items():
+        tmp_path = f"{path}.part.png"
+        imsave(tmp_path, images[kind]())
+        os.replace(tmp_path, path)
+    return audio_path
+
+
+class ThumbnailCache:
+    """Waveform and spectrogram thumbnails for every clip in a dataset.
+
+    Thumbnails live in <dataset>/thumbnails as small PNGs, with an index of
+    the (size, mtime) each was rendered from. Rendering runs across a
+    process pool; readers such as the dataset table only look up paths and
+    never decode audio.
+    """
+
+    def __init__(self, dataset_manager, max_workers=None):
+        self.dataset_manager = dataset_manager
+        self.thumbnail_dir = os.path.join(dataset_manager.dataset_path, THUMBNAIL_DIR)
+        self.index_path = os.path.join(self.thumbnail_dir, INDEX_FILE)
+        self.max_workers = max_workers
+        self.index = self.load_index()
+
+    def load_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        os.makedirs(self.thumbnail_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def thumbnail_path(self, name, kind="waveform"):
+        return os.path.join(self.thumbnail_dir, f"{name}.{kind}.png")
+
+    def get(self, name, kind="waveform"):
+        """Returns the thumbnail path for a clip if one has been rendered, without touching the audio."""
+        return self.thumbnail_path(name, kind) if name in self.index else None
+
+    def stale(self):
+        """Returns the referenced clips whose thumbnails are missing or older than the audio."""
+        names = []
+        for name in referenced_files(self.dataset_manager.get_metadata()):
+            try:
+                stat = os.stat(os.path.join(self.dataset_manager.audio_dir, name))
+            except OSError:
+                continue
+            if self.index.get(name) != [stat.st_size, stat.st_mtime_ns]:
+                names.append(name)
+        return names
+
+    def render_all(self, kinds=KINDS, progress_callback=None, cancel_check=None):
+        """Renders thumbnails for every stale clip across a process pool; returns how many were rendered."""
+        names = self.stale()
+        if not names:
+            return 0
+        os.makedirs(self.thumbnail_dir, exist_ok=True)
+
+        rendered = 0
+        # Spawned workers: forking a process that is running Qt threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+            futures = {}
+            for name in names:
+                audio_path = os.path.join(self.dataset_manager.audio_dir, name)
+                stat = os.stat(audio_path)
+                outputs = {kind: self.thumbnail_path(name, kind) for kind in kinds}
+                futures[pool.submit(render_file, audio_path, outputs)] = (name, [stat.st_size, stat.st_mtime_ns])
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                name, signature = futures[future]
+                try:
+                    future.result()
+                    self.index[name] = signature
+                    rendered += 1
+                except Exception as e:
+                    logger.warning(f"Could not render thumbnails for {name}: {e}")
+                if progress_callback:
+                    progress_callback(int(done / len(futures) * 100))
+                if cancel_check and cancel_check():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+        self.save_index()
+        logger.info(f"Rendered thumbnails for {rendered} of {len(names)} clips in {self.dataset_manager.dataset_path}")
+        return rendered
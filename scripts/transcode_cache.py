@@ -0,0 +1,204 @@
+# scripts/transcode_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from scripts.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".audionomy", "cache", "transcode")
+DEFAULT_MAX_BYTES = 1000 * 1024 * 1024
+FICLONE = 0x40049409  # Linux ioctl that shares a file's extents copy-on-write
+
+
+def _clone(src, dst):
+    """Makes dst a copy-on-write clone of src (btrfs, XFS); returns False where that is unsupported."""
+    if fcntl is None:
+        return False
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            return True
+        except OSError:
+            return False
+
+
+def clone_or_copy(src, dst):
+    """Copies src to dst, as a copy-on-write clone where the filesystem supports it.
+
+    Cache entries never share storage with dataset audio the way hard links
+    would, so rewriting either file in place (tags, normalization) cannot
+    silently change the other.
+    """
+    tmp_path = f"{dst}.{uuid.uuid4().hex}.part"
+    try:
+        if not _clone(src, tmp_path):
+            shutil.copyfile(src, tmp_path)
+        shutil.copystat(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class TranscodeCache:
+    """Content-addressed cache of transcoded files, evicted least-recently-used under a byte budget.
+
+    Entries are keyed by the source content hash plus every encoding
+    parameter, so a repeated conversion becomes a clone (or copy) of a
+    previous result instead of a fresh encode. Each entry is stored as the
+    encoded file plus a small JSON sidecar; file mtimes track recency.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.digests = {}  # absolute path -> (size, mtime_ns, sha256)
+        self.total_bytes = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def source_digest(self, path):
+        """Returns the SHA-256 of a file, memoized on (size, mtime)."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        memo = self.digests.get(path)
+        if memo and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            return memo[2]
+
+        with open(path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        self.digests[path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def make_key(self, source_path, params):
+        """Builds the cache key from the source hash and encoding parameters.
+
+        params holds target_format, sample_rate, channels, bitrate and
+        normalization; None means "same as the source".
+        """
+        payload = json.dumps([self.source_digest(source_path), params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _entry_paths(self, key, target_format):
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return f"{base}.{target_format}", f"{base}.json"
+
+    def lookup(self, key, target_format, output_path):
+        """Places a cached result at output_path, returning its stored info or None on a miss."""
+        data_path, info_path = self._entry_paths(key, target_format)
+        try:
+            with open(info_path, "r") as f:
+                info = json.load(f)
+            clone_or_copy(data_path, output_path)
+        except (OSError, ValueError):
+            return None
+
+        os.utime(info_path)  # Mark as recently used
+        return info.get("extra", {})
+
+    def store(self, key, target_format, produced_path, params, extra=None):
+        """Adds a freshly produced file to the cache."""
+        data_path, info_path = self._entry_paths(key, target_format)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        try:
+            clone_or_copy(produced_path, data_path)
+            tmp_info = f"{info_path}.part"
+            with open(tmp_info, "w") as f:
+                json.dump({"params": params, "extra": extra or {}}, f)
+            os.replace(tmp_info, info_path)
+        except OSError as e:
+            logger.warning(f"Could not cache transcode of {produced_path}: {e}")
+            return
+
+        with self.lock:
+            if self.total_bytes is not None:
+                self.total_bytes += os.path.getsize(data_path)
+            self._evict_locked()
+
+    def transcode(self, source_path, output_path, params, produce):
+        """Returns cached output for the source and params, or calls produce(output_path) and caches it.
+
+        produce must write output_path and may return a dict of extra info
+        (e.g. the applied normalization gain) to remember with the entry.
+        Returns (extra, hit).
+        """
+        target_format = params["target_format"]
+        key = self.make_key(source_path, params)
+
+        extra = self.lookup(key, target_format, output_path)
+        if extra is not None:
+            logger.debug(f"Transcode cache hit: {source_path} -> {output_path}")
+            return extra, True
+
+        extra = produce(output_path) or {}
+        self.store(key, target_format, output_path, params, extra)
+        return extra, False
+
+    def _entries(self):
+        """Yields (info_path, data_path, last_used, size) for every cached entry."""
+        for root, _, files in os.walk(self.cache_dir):
+            data_files = {
+                name.split(".", 1)[0]: name for name in files
+                if not name.endswith((".json", ".part"))
+            }
+            for name in files:
+                if not name.endswith(".json") or name.split(".", 1)[0] not in data_files:
+                    continue
+                info_path = os.path.join(root, name)
+                data_path = os.path.join(root, data_files[name.split(".", 1)[0]])
+                try:
+                    yield info_path, data_path, os.path.getmtime(info_path), os.path.getsize(data_path)
+                except OSError:
+                    pass
+
+    def _evict_locked(self):
+        if self.total_bytes is None:
+            self.total_bytes = sum(entry[3] for entry in self._entries())
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        # Evict down to 90% of the budget so eviction scans stay rare
+        goal = int(self.max_bytes * 0.9)
+        for info_path, data_path, _, size in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self.total_bytes <= goal:
+                break
+            for path in (info_path, data_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.total_bytes -= size
+        logger.info(f"Transcode cache trimmed to {self.total_bytes / (1024 * 1024):.1f} MB")
+
+    def clear(self):
+        """Removes every cached entry."""
+        with self.lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.total_bytes = 0
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_transcode_cache(max_bytes=None):
+    """Returns the process-wide transcode cache, updating its byte budget if given."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = TranscodeCache()
+        if max_bytes is not None:
+            _shared_cache.max_bytes = max_bytes
+        return _shared_cache
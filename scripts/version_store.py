@@ -0,0 +1,354 @@
+# scripts/version_store.py
+
+import datetime
+import gzip
+import json
+import os
+import numpy as np
+import pandas as pd
+from scripts.logger import logger
+
+VERSIONS_DIR = "versions"
+KEY_CANDIDATES = ["filename", "audio_file", "audio_file_1"]
+
+
+def pick_key_column(df):
+    """Returns the first candidate column that uniquely identifies rows, or None for positional rows."""
+    for column in KEY_CANDIDATES:
+        if column in df.columns:
+            values = df[column]
+            if values.notna().all() and values.is_unique:
+                return column
+    return None
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _records(df):
+    """Converts rows to JSON-safe lists of values (NaN -> None)."""
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def _key_index(df, key):
+    """Returns df indexed by its key column, with keys as plain objects so string and category dtypes hash."""
+    return df.set_index(pd.Index(df[key].to_numpy(dtype=object)))
+
+
+def _comparable(old, new):
+    """Returns two versions of a column in one dtype.
+
+    A typed frame (float32, Int16, datetime) and the same data rebuilt from
+    a snapshot CSV (float64, object strings) must compare equal, so when
+    either side is numeric or datetime both are converted that way.
+    """
+    for convert, is_kind in ((pd.to_datetime, pd.api.types.is_datetime64_any_dtype),
+                             (pd.to_numeric, pd.api.types.is_numeric_dtype)):
+        if is_kind(old.dtype) or is_kind(new.dtype):
+            try:
+                return convert(old), convert(new)
+            except (ValueError, TypeError):
+                break  # Text on one side; compare as objects
+    return old.astype(object), new.astype(object)
+
+
+def _cell_differences(old, new):
+    """Cell mask of values that differ, treating missing == missing across dtypes (NaN, None, pd.NA).
+
+    Numbers are compared with a float32-sized tolerance, so reloading a
+    float32 column as float64 does not mark every row changed.
+    """
+    differences = np.zeros(old.shape, dtype=bool)
+    for i in range(old.shape[1]):
+        a, b = _comparable(old.iloc[:, i], new.iloc[:, i])
+        if pd.api.types.is_numeric_dtype(a.dtype) and pd.api.types.is_numeric_dtype(b.dtype) \
+                and not pd.api.types.is_bool_dtype(a.dtype) and not pd.api.types.is_bool_dtype(b.dtype):
+            a = a.to_numpy(dtype="float64", na_value=np.nan)
+            b = b.to_numpy(dtype="float64", na_value=np.nan)
+            differences[:, i] = ~np.isclose(a, b, rtol=1e-6, atol=0, equal_nan=True)
+        else:
+            a_values = a.astype(object).where(a.notna(), None).values
+            b_values = b.astype(object).where(b.notna(), None).values
+            differences[:, i] = a_values != b_values
+    return differences
+
+
+def _changed_mask(old, new):
+    """Row mask of positions where any cell differs, treating NaN == NaN."""
+    return _cell_differences(old, new).any(axis=1)
+
+
+def compute_delta(old, new):
+    """Computes a compact row-level delta turning old into new, or None if a snapshot is cheaper."""
+    columns = list(new.columns)
+    key = pick_key_column(new) if pick_key_column(old) == pick_key_column(new) else None
+
+    if key is None:
+        # Positional rows: only in-place edits and appends can be expressed as a delta
+        if len(new) < len(old):
+            return None
+        head = new.iloc[:len(old)].reset_index(drop=True)
+        base = old.reindex(columns=columns).reset_index(drop=True)
+        changed = np.flatnonzero(_changed_mask(base, head)) if len(old) else np.array([], dtype=int)
+        return {
+            "key": None,
+            "columns": columns,
+            "deletes": [],
+            "upserts": [[int(i), row] for i, row in zip(changed, _records(new.iloc[changed]))],
+            "append": _records(new.iloc[len(old):]),
+            "order": None,
+        }
+
+    old_i = _key_index(old.reindex(columns=columns), key)
+    new_i = _key_index(new, key)
+    deletes = old_i.index.difference(new_i.index, sort=False)
+    common = new_i.index.intersection(old_i.index, sort=False)
+    added = new_i.index.difference(old_i.index, sort=False)
+
+    changed = common[_changed_mask(old_i.loc[common], new_i.loc[common])] if len(common) else common
+    upsert_keys = changed.append(added)
+
+    deleted = set(deletes)
+    expected = [k for k in old_i.index if k not in deleted] + list(added)
+    order = None if expected == list(new_i.index) else list(new_i.index)
+
+    return {
+        "key": key,
+        "columns": columns,
+        "deletes": list(deletes),
+        "upserts": [[k, row] for k, row in zip(upsert_keys, _records(new_i.loc[upsert_keys]))],
+        "append": [],
+        "order": order,
+    }
+
+
+def apply_delta(df, delta):
+    """Applies a delta produced by compute_delta."""
+    columns = delta["columns"]
+    key = delta["key"]
+    df = df.reindex(columns=columns)
+
+    if key is None:
+        df = df.reset_index(drop=True)
+        if delta["upserts"]:
+            positions = [position for position, _ in delta["upserts"]]
+            df.iloc[positions] = [row for _, row in delta["upserts"]]
+    else:
+        df = _key_index(df, key)
+        if delta["deletes"]:
+            df = df.drop(index=delta["deletes"])
+        upserts = pd.DataFrame([row for _, row in delta["upserts"]], columns=columns,
+                               index=[k for k, _ in delta["upserts"]])
+        existing = upserts.index.isin(df.index)
+        if existing.any():
+            df.loc[upserts.index[existing]] = upserts[existing].values
+        df = pd.concat([df, upserts[~existing]])
+        if delta["order"] is not None:
+            df = df.loc[delta["order"]]
+
+    if delta["append"]:
+        df = pd.concat([df, pd.DataFrame(delta["append"], columns=columns)])
+    return df.reset_index(drop=True)
+
+
+class VersionStore:
+    """Metadata history kept as periodic snapshots plus compact row-level deltas.
+
+    Versions are numbered from 1 and stored in <dataset>/versions/ as either
+    vNNNNNN.snapshot.csv.gz or vNNNNNN.delta.json.gz, with a log.jsonl
+    summary. A snapshot is written every SNAPSHOT_INTERVAL versions or
+    whenever a delta would be large, so restoring any version replays at
+    most SNAPSHOT_INTERVAL - 1 deltas.
+    """
+
+    SNAPSHOT_INTERVAL = 20
+    SNAPSHOT_RATIO = 0.5  # Snapshot instead when a delta touches more than this share of rows
+
+    def __init__(self, dataset_path, keep_versions=200, max_age_days=30):
+        self.versions_dir = os.path.join(dataset_path, VERSIONS_DIR)
+        self.log_path = os.path.join(self.versions_dir, "log.jsonl")
+        self.keep_versions = keep_versions
+        self.max_age_days = max_age_days
+        self.cached_version = None
+        self.cached_df = None
+
+    def _path(self, version, kind):
+        suffix = "snapshot.csv.gz" if kind == "snapshot" else "delta.json.gz"
+        return os.path.join(self.versions_dir, f"v{version:06d}.{suffix}")
+
+    def list_versions(self):
+        """Returns version summaries, oldest first."""
+        if not os.path.exists(self.log_path):
+            return []
+        versions = {}
+        with open(self.log_path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if os.path.exists(self._path(entry["version"], entry["kind"])):
+                    versions[entry["version"]] = entry
+        return [versions[v] for v in sorted(versions)]
+
+    def head(self):
+        versions = self.list_versions()
+        return versions[-1]["version"] if versions else 0
+
+    def record_baseline(self, df):
+        """Records df as version 1 if no version exists yet, so the first change can be diffed and undone.
+
+        Returns the version, or None if versions exist already or df has no rows.
+        """
+        if self.head() or df.empty:
+            return None
+        self._write(1, df, None)
+        return 1
+
+    def record(self, df):
+        """Records df as the next version; call with the dataset lock held."""
+        versions = self.list_versions()
+        head = versions[-1]["version"] if versions else 0
+        version = head + 1
+
+        delta = None
+        if head and version - self._last_snapshot(versions) < self.SNAPSHOT_INTERVAL:
+            delta = compute_delta(self.get_version(head), df)
+            if delta is not None:
+                touched = len(delta["upserts"]) + len(delta["deletes"]) + len(delta["append"])
+                if touched > max(1, len(df)) * self.SNAPSHOT_RATIO and len(df) > 100:
+                    delta = None
+
+        self._write(version, df, delta)
+        self.apply_retention()
+        return version
+
+    def record_append(self, rows):
+        """Records an append-only change as a delta without diffing the whole table."""
+        versions = self.list_versions()
+        head = versions[-1]["version"] if versions else 0
+        if not head or head + 1 - self._last_snapshot(versions) >= self.SNAPSHOT_INTERVAL:
+            return None  # Caller must fall back to record() with the full table
+
+        base = self.get_version(head)
+        appended = pd.DataFrame(rows)
+        columns = list(base.columns) + [c for c in appended.columns if c not in base.columns]
+        delta = {
+            "key": None, "columns": columns, "deletes": [], "upserts": [],
+            "append": _records(appended.reindex(columns=columns)), "order": None,
+        }
+        self._write(head + 1, apply_delta(base, delta), delta)
+        self.apply_retention()
+        return head + 1
+
+    def _last_snapshot(self, versions):
+        snapshots = [entry["version"] for entry in versions if entry["kind"] == "snapshot"]
+        return snapshots[-1] if snapshots else 0
+
+    def _write(self, version, df, delta):
+        os.makedirs(self.versions_dir, exist_ok=True)
+        kind = "snapshot" if delta is None else "delta"
+        path = self._path(version, kind)
+        tmp_path = f"{path}.part"
+
+        if delta is None:
+            df.to_csv(tmp_path, index=False, compression="gzip")
+            changes = len(df)
+        else:
+            delta["version"] = version
+            with gzip.open(tmp_path, "wt") as f:
+                json.dump(delta, f, default=_json_default)
+            changes = len(delta["upserts"]) + len(delta["deletes"]) + len(delta["append"])
+        os.replace(tmp_path, path)
+
+        entry = {
+            "version": version,
+            "kind": kind,
+            "created_at": datetime.datetime.now().isoformat(),
+            "rows": len(df),
+            "changes": changes,
+        }
+        with open(self.log_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        self.cached_version, self.cached_df = version, df.copy()
+        logger.debug(f"Recorded metadata version {version} ({kind}, {changes} changes)")
+
+    def get_version(self, version):
+        """Reconstructs a version from its nearest snapshot and the deltas after it."""
+        if version == self.cached_version:
+            return self.cached_df.copy()
+
+        versions = {entry["version"]: entry for entry in self.list_versions()}
+        if version not in versions:
+            raise KeyError(f"Unknown metadata version: {version}")
+
+        base = max(v for v, entry in versions.items() if entry["kind"] == "snapshot" and v <= version)
+        df = pd.read_csv(self._path(base, "snapshot"), compression="gzip")
+        for v in range(base + 1, version + 1):
+            with gzip.open(self._path(v, "delta"), "rt") as f:
+                df = apply_delta(df, json.load(f))
+
+        self.cached_version, self.cached_df = version, df.copy()
+        return df
+
+    def diff(self, old_version, new_version):
+        """Returns added, removed and modified rows between two versions."""
+        old = self.get_version(old_version)
+        new = self.get_version(new_version)
+        key = pick_key_column(new) if pick_key_column(old) == pick_key_column(new) else None
+        if key is None:
+            old_i, new_i = old.reset_index(drop=True), new.reset_index(drop=True)
+        else:
+            old_i, new_i = _key_index(old, key), _key_index(new, key)
+
+        columns = [c for c in new_i.columns if c in old_i.columns]
+        common = new_i.index.intersection(old_i.index, sort=False)
+        old_c, new_c = old_i.loc[common, columns], new_i.loc[common, columns]
+        differs = _cell_differences(old_c, new_c)
+
+        modified = [
+            {"row": common[r], "column": columns[c], "old": old_c.iat[r, c], "new": new_c.iat[r, c]}
+            for r, c in zip(*np.nonzero(differs))
+        ]
+        return {
+            "key": key,
+            "added": new_i.loc[new_i.index.difference(old_i.index, sort=False)],
+            "removed": old_i.loc[old_i.index.difference(new_i.index, sort=False)],
+            "modified": modified,
+            "added_columns": [c for c in new_i.columns if c not in old_i.columns],
+            "removed_columns": [c for c in old_i.columns if c not in new_i.columns],
+        }
+
+    def apply_retention(self):
+        """Drops versions older than the retention window, keeping the snapshot that anchors the oldest kept delta."""
+        versions = self.list_versions()
+        if not versions:
+            return
+
+        head = versions[-1]["version"]
+        oldest_kept = head - self.keep_versions + 1
+        if self.max_age_days is not None:
+            cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.max_age_days)).isoformat()
+            recent = [entry["version"] for entry in versions if entry["created_at"] >= cutoff]
+            oldest_kept = max(oldest_kept, min(recent) if recent else head)
+
+        anchors = [e["version"] for e in versions if e["kind"] == "snapshot" and e["version"] <= oldest_kept]
+        if not anchors:
+            return
+        for entry in versions:
+            if entry["version"] >= anchors[-1]:
+                break
+            os.remove(self._path(entry["version"], entry["kind"]))
+
+        # Compact the log once it holds many lines for deleted versions
+        remaining = self.list_versions()
+        if len(remaining) < len(versions):
+            tmp_path = f"{self.log_path}.part"
+            with open(tmp_path, "w") as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.log_path)